@@ -0,0 +1,87 @@
+"""Набор микробенчмарков со сравнением с базовой линией.
+
+Запуск из корня проекта:
+    python -m benchmarks                        # 1k, 10k, 100k и сравнение с baseline.json
+    python -m benchmarks --sizes 1k,10k,100k,1m # с набором на миллион заявок
+    python -m benchmarks --update-baseline      # перезаписать baseline.json
+
+Код возврата 1, если какой-либо бенчмарк стал медленнее базовой линии
+больше чем в --threshold раз.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+from benchmarks.datasets import SIZES
+from benchmarks.suite import run
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("с", 1), ("мс", 1e-3), ("мкс", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} нс"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"{'бенчмарк':<40} {'сейчас':>12} {'база':>12} {'отношение':>10}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {format_time(seconds):>12} {'—':>12}")
+            continue
+        ratio = seconds / base
+        mark = "  РЕГРЕССИЯ" if ratio > threshold else ""
+        print(f"{name:<40} {format_time(seconds):>12} {format_time(base):>12} {ratio:>9.2f}x{mark}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--sizes", default="1k,10k,100k", help=f"размеры наборов: {', '.join(SIZES)}")
+    parser.add_argument("--only", help="запускать только бенчмарки, в имени которых есть подстрока")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=2.0, help="допустимое замедление относительно базы")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [SIZES[size.strip()] for size in args.sizes.split(",")]
+    results = run(sizes, args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "results": results}, file, ensure_ascii=False, indent=4)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)["results"]
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "results": baseline}, file, ensure_ascii=False, indent=4)
+        print(f"Базовая линия обновлена: {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    except FileNotFoundError:
+        baseline = {}
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Замедлились больше чем в {args.threshold} раза: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
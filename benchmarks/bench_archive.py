@@ -0,0 +1,82 @@
+"""Архивация завершённых заявок: загрузка хранилища до и после, поиск в архиве.
+
+Сравнивает время загрузки orders.json со всеми заявками и с одними
+активными после переноса завершённых в архив, а также время получения
+архивной заявки: первое обращение к сегменту (чтение с диска) и повторное
+(из кеша). Время загрузки — медиана нескольких загрузок, перед каждой
+предыдущее хранилище освобождается, чтобы сборщик мусора не обходил его.
+
+Запуск из корня проекта: python -m benchmarks.bench_archive --size 100k
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.datasets import SIZES, write_orders_file
+from order_archive import OrderArchive
+from order_store import OrderStore
+
+
+def make_store(tmp_dir: str) -> OrderStore:
+    return OrderStore(
+        os.path.join(tmp_dir, "orders.json"), archive=OrderArchive(os.path.join(tmp_dir, "archive")),
+        archive_after_days=30,
+    )
+
+
+async def timed_load(tmp_dir: str, repeat: int) -> tuple[OrderStore, float]:
+    times = []
+    for _ in range(repeat):
+        store = None
+        gc.collect()
+        store = make_store(tmp_dir)
+        start = time.perf_counter()
+        await store.load()
+        times.append(time.perf_counter() - start)
+        await store.close()
+    return store, statistics.median(times)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", choices=SIZES, default="100k")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_orders_file(os.path.join(tmp_dir, "orders.json"), SIZES[args.size])
+        store, before = await timed_load(tmp_dir, args.repeat)
+        total = len(store)
+        start = time.perf_counter()
+        moved = await store.archive_orders()
+        archiving = time.perf_counter() - start
+        await store.close()
+
+        store, after = await timed_load(tmp_dir, args.repeat)
+        segments = sorted(os.listdir(os.path.join(tmp_dir, "archive")))
+        archive_bytes = sum(os.path.getsize(os.path.join(tmp_dir, "archive", name)) for name in segments)
+        print(f"заявок: {total}, перенесено в архив: {moved} за {archiving:.2f} с")
+        print(f"сегментов: {sum(name.endswith('.jsonl.gz') for name in segments)}, {archive_bytes / 1e6:.1f} МБ")
+        print(f"загрузка хранилища: {before:.2f} с -> {after:.2f} с (активных заявок: {len(store)})")
+
+        archived_ids = random.Random(1).sample(sorted(store.archive._orders), args.lookups)
+        cold, warm = [], []
+        for order_id in archived_ids:
+            store.archive._cache.clear()
+            start = time.perf_counter()
+            await store.get(order_id)
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await store.get(order_id)
+            warm.append(time.perf_counter() - start)
+        print(f"архивная заявка, с диска: {statistics.median(cold) * 1e3:.1f} мс, из кеша: {statistics.median(warm) * 1e6:.1f} мкс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
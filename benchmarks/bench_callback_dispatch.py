@@ -0,0 +1,82 @@
+"""Стоимость поиска обработчика нажатия: цепочка фильтров aiogram против CallbackTable.
+
+Регистрирует --handlers обработчиков двумя способами и измеряет время
+callback_query.trigger для кнопки в начале, середине и конце списка,
+а также для префиксной кнопки.
+
+Запуск из корня проекта: python -m benchmarks.bench_callback_dispatch
+"""
+import argparse
+import asyncio
+import time
+
+from aiogram import F, Router
+from aiogram.types import CallbackQuery, User
+
+from callback_table import CallbackTable
+
+
+async def handler(callback_query: CallbackQuery):
+    return True
+
+
+def build_filter_chain(count: int) -> Router:
+    router = Router()
+    for i in range(count):
+        # Как в bot.py до таблицы: часть фильтров через F, часть через lambda
+        if i % 3:
+            router.callback_query.register(handler, F.data == f"button_{i}")
+        else:
+            router.callback_query.register(handler, lambda c, data=f"button_{i}": c.data == data)
+    router.callback_query.register(handler, F.data.startswith("page:"))
+    return router
+
+
+def build_table(count: int) -> Router:
+    router = Router()
+    table = CallbackTable()
+    for i in range(count):
+        table.exact(f"button_{i}")(handler)
+    table.prefix("page:")(handler)
+    table.attach(router)
+    return router
+
+
+def make_callback(data: str) -> CallbackQuery:
+    return CallbackQuery(
+        id="1", chat_instance="1", data=data,
+        from_user=User(id=1, is_bot=False, first_name="Тест"),
+    )
+
+
+async def measure(router: Router, event: CallbackQuery, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await router.callback_query.trigger(event)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--handlers", type=int, default=120)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    routers = {"цепочка фильтров": build_filter_chain(args.handlers), "CallbackTable": build_table(args.handlers)}
+    cases = {
+        "первая кнопка": "button_0",
+        "средняя кнопка": f"button_{args.handlers // 2}",
+        "последняя кнопка": f"button_{args.handlers - 1}",
+        "префикс page:17": "page:17",
+    }
+
+    print(f"Обработчиков: {args.handlers}, время одного нажатия в мкс")
+    print(f"{'кнопка':<20}" + "".join(f"{name:>20}" for name in routers))
+    for case, data in cases.items():
+        event = make_callback(data)
+        row = [await measure(router, event, args.iterations) * 1e6 for router in routers.values()]
+        print(f"{case:<20}" + "".join(f"{value:>20.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
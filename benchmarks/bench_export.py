@@ -0,0 +1,53 @@
+"""Выгрузка заявок (/export): время, размер файла и пик памяти на разных объёмах.
+
+Пик памяти меряется tracemalloc отдельным прогоном (трассировка сильно
+замедляет выделения) и только на время выгрузки, уже после загрузки
+хранилища, то есть это добавочная память самой выгрузки. Она должна
+оставаться примерно одинаковой при любом числе заявок.
+
+Запуск из корня проекта: python -m benchmarks.bench_export --sizes 10k,100k
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.datasets import SIZES, write_orders_file
+from order_export import EXPORT_FORMATS, export_orders
+from order_store import OrderStore
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10k,100k")
+    args = parser.parse_args()
+
+    print(f"{'заявок':>8}{'формат':>8}{'время, с':>10}{'файл, МБ':>10}{'пик памяти, МБ':>16}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes.split(","):
+            count = SIZES[size]
+            path = os.path.join(tmp_dir, f"orders_{count}.json")
+            write_orders_file(path, count)
+            store = OrderStore(path, id_path=os.path.join(tmp_dir, f"orders_{count}.id"))
+            await store.load()
+            for fmt in EXPORT_FORMATS:
+                start = time.perf_counter()
+                export_path, exported = await export_orders(store, fmt)
+                seconds = time.perf_counter() - start
+                size_mb = os.path.getsize(export_path) / 1e6
+                os.remove(export_path)
+                assert exported == count
+
+                tracemalloc.start()
+                export_path, _ = await export_orders(store, fmt)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                os.remove(export_path)
+                print(f"{count:>8}{fmt:>8}{seconds:>10.2f}{size_mb:>10.1f}{peak / 1e6:>16.2f}")
+            await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
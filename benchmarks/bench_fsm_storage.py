@@ -0,0 +1,71 @@
+"""Задержка get_state/set_data: MemoryStorage против SqliteFSMStorage.
+
+Запуск из корня проекта: python -m benchmarks.bench_fsm_storage
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from fsm_storage import SqliteFSMStorage
+
+ORDER_DATA = {
+    "full_name": "Иванов Иван Иванович",
+    "address": "г. Алматы, ул. Абая, 10",
+    "service": "🔧 Компьютерная помощь",
+    "phone_number": "+77071234567",
+}
+
+
+async def measure(storage, keys, rounds: int) -> dict:
+    results = {}
+    for name, operation in (
+        ("set_state", lambda key: storage.set_state(key, "OrderForm:address")),
+        ("set_data", lambda key: storage.set_data(key, ORDER_DATA)),
+        ("get_state", lambda key: storage.get_state(key)),
+        ("get_data", lambda key: storage.get_data(key)),
+    ):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for key in keys:
+                await operation(key)
+        results[name] = (time.perf_counter() - start) / (rounds * len(keys)) * 1e6
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    keys = [StorageKey(bot_id=1, chat_id=user_id, user_id=user_id) for user_id in range(args.users)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fsm.db")
+        memory = await measure(MemoryStorage(), keys, args.rounds)
+
+        storage = SqliteFSMStorage(path, cache_size=args.users)
+        hot = await measure(storage, keys, args.rounds)
+        await storage.close()
+
+        # Холодный старт: кеш пуст, каждое первое чтение идёт в базу
+        storage = SqliteFSMStorage(path, cache_size=args.users)
+        start = time.perf_counter()
+        for key in keys:
+            await storage.get_state(key)
+        cold = (time.perf_counter() - start) / len(keys) * 1e6
+        await storage.close()
+
+    print(f"Диалогов: {args.users}, повторов: {args.rounds}; мкс на операцию")
+    print(f"{'операция':<12}{'Memory':>10}{'SQLite (кеш)':>16}")
+    for name in memory:
+        print(f"{name:<12}{memory[name]:>10.2f}{hot[name]:>16.2f}")
+    print(f"get_state после перезапуска (промах кеша, чтение из SQLite): {cold:.1f} мкс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
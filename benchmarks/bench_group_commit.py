@@ -0,0 +1,79 @@
+"""Пропускная способность записи заявок: до и после групповой записи журнала.
+
+Запуск из корня проекта: python -m benchmarks.bench_group_commit
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.datasets import make_orders
+from order_store import OrderStore
+
+
+async def bench_whole_file(path: str, mutations: int) -> float:
+    """Прежняя схема: каждое изменение перечитывает и переписывает весь orders.json.
+
+    Изменения выполняются по очереди: при параллельном запуске файл
+    повреждается из-за перемежающихся чтений и записей.
+    """
+    def mutate(i):
+        with open(path, "r", encoding="utf-8") as file:
+            orders = json.load(file)
+        orders[i % len(orders)]["status"] = "🔧 В работе"
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(orders, file, ensure_ascii=False, indent=4)
+
+    start = time.perf_counter()
+    for i in range(mutations):
+        await asyncio.to_thread(mutate, i)
+    return time.perf_counter() - start
+
+
+async def bench_store(path: str, mutations: int, count: int, flush_interval: float, batch_size: int) -> float:
+    store = OrderStore(path, flush_interval=flush_interval, flush_batch_size=batch_size)
+    await store.load()
+    store.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        store.update(i % count + 1, {"status": "🔧 В работе"}) for i in range(mutations)
+    ))
+    elapsed = time.perf_counter() - start
+    await store.close()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--mutations", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orders.json")
+        orders = make_orders(args.orders)
+
+        def reset():
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(orders, file, ensure_ascii=False, indent=4)
+            log_path = os.path.splitext(path)[0] + ".log"
+            if os.path.exists(log_path):
+                os.remove(log_path)
+
+        results = {}
+        reset()
+        results["весь файл на каждое изменение"] = await bench_whole_file(path, args.mutations)
+        reset()
+        results["журнал, fsync на каждое изменение"] = await bench_store(path, args.mutations, args.orders, 0, 1)
+        reset()
+        results["журнал, групповая запись 20 мс / 100"] = await bench_store(path, args.mutations, args.orders, 0.02, 100)
+
+    print(f"Заявок: {args.orders}, параллельных изменений: {args.mutations}")
+    for name, elapsed in results.items():
+        print(f"{name:<40} {elapsed:8.3f} с  {args.mutations / elapsed:10.0f} изм/с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
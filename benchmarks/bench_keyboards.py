@@ -0,0 +1,70 @@
+"""Время и память на клавиатуры за одно обновление: сборка заново против кеша.
+
+Смесь клавиатур примерно повторяет то, что бот отправляет в ответ на
+типичные нажатия. Некешированный вариант вызывает исходные функции через
+__wrapped__, то есть каждый раз собирает и валидирует модели pydantic.
+
+Запуск из корня проекта: python -m benchmarks.bench_keyboards
+"""
+import argparse
+import time
+import tracemalloc
+
+import keyboards
+
+ADMIN_IDS = [111111111, 222222222, 333333333]
+
+
+def update_mix(cached: bool):
+    def call(func, *args, **kwargs):
+        return (func if cached else func.__wrapped__)(*args, **kwargs)
+
+    remove_admin = keyboards.remove_admin_keyboard if cached else keyboards._remove_admin_keyboard.__wrapped__
+    return [
+        lambda: call(keyboards.start_button_keyboard, admin=False),
+        lambda: call(keyboards.start_button_keyboard, admin=True),
+        lambda: call(keyboards.main_menu_keyboard),
+        lambda: call(keyboards.services_keyboard),
+        lambda: call(keyboards.edit_request_keyboard),
+        lambda: call(keyboards.admin_panel_keyboard),
+        lambda: remove_admin(ADMIN_IDS if cached else tuple(ADMIN_IDS)),
+        lambda: keyboards.orders_page_keyboard("all", 120, 116, True, True),
+    ]
+
+
+def measure(calls: list, iterations: int) -> tuple[float, float]:
+    """Среднее время и число выделенных байт на одно обновление (один вызов из смеси)."""
+    for call in calls:
+        call()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for call in calls:
+            call()
+    seconds = (time.perf_counter() - start) / (iterations * len(calls))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for call in calls:
+        call()
+    allocated = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return seconds, allocated / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {
+        "сборка на каждый вызов": measure(update_mix(cached=False), args.iterations),
+        "кеш клавиатур": measure(update_mix(cached=True), args.iterations),
+    }
+    print(f"{'':<26}{'мкс на обновление':>20}{'байт (пик)':>14}")
+    for name, (seconds, allocated) in results.items():
+        print(f"{name:<26}{seconds * 1e6:>20.1f}{allocated:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Заявки словарями и компактными Order: память и стоимость обращения к полям.
+
+Оба представления строятся из одного и того же JSON кусками по 10 тысяч
+заявок (как при загрузке orders.json: ключи общие, а строки статуса, услуги
+и времени у каждой заявки свои). Память меряется tracemalloc, пока в памяти
+только одно из представлений. Время чтения полей — проход по всем заявкам
+(у словаря order["..."], у Order атрибуты), время (де)сериализации — на
+первых --sample заявках.
+
+Запуск из корня проекта: python -m benchmarks.bench_order_model --size 1m
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.datasets import SIZES, make_order
+from order_model import Order, json_default
+
+
+def load_orders(count: int, convert, chunk: int = 10_000) -> tuple[list, float]:
+    """Строит заявки и возвращает их вместе с занятой ими памятью в байтах."""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    gc.collect()
+    tracemalloc.start()
+    orders = []
+    for first in range(1, count + 1, chunk):
+        text = json.dumps([make_order(order_id, rng, start) for order_id in range(first, min(first + chunk, count + 1))],
+                          ensure_ascii=False)
+        orders.extend(convert(order) for order in json.loads(text))
+    del text
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return orders, memory
+
+
+def per_item(func, items) -> float:
+    """Время func(items) в наносекундах на элемент, лучшее из трёх прогонов."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        func(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items) * 1e9
+
+
+def dict_access(orders: list) -> dict[str, float]:
+    return {
+        "статус": per_item(lambda xs: [order["status"] for order in xs], orders),
+        "ФИО": per_item(lambda xs: [order["full_name"] for order in xs], orders),
+        "время создания": per_item(lambda xs: [order["created_at"] for order in xs], orders),
+        "статус через get()": per_item(lambda xs: [order.get("status") for order in xs], orders),
+    }
+
+
+def order_access(orders: list) -> dict[str, float]:
+    return {
+        "статус": per_item(lambda xs: [order.status for order in xs], orders),
+        "ФИО": per_item(lambda xs: [order.full_name for order in xs], orders),
+        "время создания": per_item(lambda xs: [order.created_at for order in xs], orders),
+        "статус через get()": per_item(lambda xs: [order.get("status") for order in xs], orders),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", choices=SIZES, default="1m")
+    parser.add_argument("--sample", type=int, default=100_000)
+    args = parser.parse_args()
+    count = SIZES[args.size]
+
+    orders, dict_memory = load_orders(count, lambda order: order)
+    sample = orders[:args.sample]
+    lines = [json.dumps(order, ensure_ascii=False) for order in sample]
+    dict_results = dict_access(orders)
+    dict_results["разбор из JSON"] = per_item(lambda xs: [json.loads(line) for line in xs], lines)
+    dict_results["запись в JSON"] = per_item(
+        lambda xs: [json.dumps(order, ensure_ascii=False) for order in xs], sample)
+    del orders, sample
+
+    orders, order_memory = load_orders(count, Order.from_dict)
+    sample = orders[:args.sample]
+    order_results = order_access(orders)
+    order_results["разбор из JSON"] = per_item(
+        lambda xs: [Order.from_dict(json.loads(line)) for line in xs], lines)
+    order_results["запись в JSON"] = per_item(
+        lambda xs: [json.dumps(order, ensure_ascii=False, default=json_default) for order in xs], sample)
+
+    print(f"заявок: {count}")
+    print(f"память: словари {dict_memory / count:.0f} Б/заявка ({dict_memory / 1e6:.0f} МБ), "
+          f"Order {order_memory / count:.0f} Б/заявка ({order_memory / 1e6:.0f} МБ), "
+          f"в {dict_memory / order_memory:.1f} раза меньше")
+    print(f"{'нс на заявку':<22}{'словарь':>10}{'Order':>10}")
+    for name, seconds in dict_results.items():
+        print(f"{name:<22}{seconds:>10.0f}{order_results[name]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
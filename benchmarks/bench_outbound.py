@@ -0,0 +1,91 @@
+"""Ответы пользователям во время рассылки администраторам: с очередью и без.
+
+Каждый «обработчик» повторяет process_feedback: уведомляет всех
+администраторов и отвечает пользователю. Без очереди обработчик ждёт
+рассылку целиком, как раньше делал notify_admins; с очередью рассылка
+уходит в фон с низким приоритетом, а ответ — с высоким. Показывает время
+до ответа пользователю и наибольшее число запросов к API за секунду.
+
+Запуск из корня проекта: python -m benchmarks.bench_outbound
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.fake_telegram import FakeTelegram
+from notifier import AdminNotifier
+from outbound_queue import PRIORITY_BROADCAST, OutboundQueue
+
+API_PORT = 8083
+
+
+class _Spy:
+    """Внутренняя мидлварь сессии: время каждого запроса, дошедшего до API."""
+
+    def __init__(self):
+        self.sent_at: list[float] = []
+
+    async def __call__(self, make_request, bot, method):
+        self.sent_at.append(time.perf_counter())
+        return await make_request(bot, method)
+
+    def peak_rate(self) -> int:
+        peak, start = 0, 0
+        for end, t in enumerate(self.sent_at):
+            while t - self.sent_at[start] >= 1:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+
+async def run(use_queue: bool, handlers: int, admins: int, api_latency: float) -> tuple[list[float], int]:
+    fake = FakeTelegram(latency=api_latency)
+    await fake.start(port=API_PORT)
+    bot = Bot("123456:FAKE", session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}")))
+    queue, spy = OutboundQueue(), _Spy()
+    if use_queue:
+        bot.session.middleware(queue)
+        queue.start()
+    bot.session.middleware(spy)
+    notifier = AdminNotifier(list(range(1, admins + 1)))
+
+    async def handler(user_id: int) -> float:
+        start = time.perf_counter()
+        if use_queue:
+            queue.spawn(notifier.broadcast(bot, f"Отзыв от {user_id}"), PRIORITY_BROADCAST)
+        else:
+            await notifier.broadcast(bot, f"Отзыв от {user_id}")
+        await bot.send_message(user_id, "📎 Спасибо за Ваш отзыв!")
+        return time.perf_counter() - start
+
+    async def staggered(i: int) -> float:
+        await asyncio.sleep(i * 0.1)
+        return await handler(10_000 + i)
+
+    latencies = await asyncio.gather(*(staggered(i) for i in range(handlers)))
+    await queue.close(timeout=60)
+    await bot.session.close()
+    await fake.stop()
+    return latencies, spy.peak_rate()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--handlers", type=int, default=10)
+    parser.add_argument("--admins", type=int, default=10)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="задержка фейкового Bot API, с")
+    args = parser.parse_args()
+
+    print(f"{'':<14}{'ответ p50, с':>14}{'ответ max, с':>14}{'пик запросов/с':>16}")
+    for name, use_queue in (("без очереди", False), ("очередь", True)):
+        latencies, peak = await run(use_queue, args.handlers, args.admins, args.api_latency)
+        print(f"{name:<14}{statistics.median(latencies):>14.2f}{max(latencies):>14.2f}{peak:>16}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
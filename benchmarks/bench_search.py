@@ -0,0 +1,97 @@
+"""Поиск заявок через SearchIndex: построение, загрузка с диска и время запроса.
+
+Для сравнения те же запросы выполняются перебором всех заявок с подстрочным
+поиском — так бот искал бы без индекса.
+
+Запуск из корня проекта: python -m benchmarks.bench_search --size 100k
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.datasets import SIZES, make_orders
+from search_index import SEARCH_FIELDS, SearchIndex
+
+QUERIES = [
+    "абая", "Абая 15", "переустановку windows", "клиент 4242", "клиент", "+7 707 555",
+    "достык ноутбук", "термопаста", "нет такого",
+]
+
+
+class _Store:
+    def __init__(self, orders: list[dict]):
+        self.orders = orders
+
+    async def count_by_status(self) -> dict[str, int]:
+        return {"all": len(self.orders)}
+
+    async def all(self) -> list[dict]:
+        return self.orders
+
+
+def scan(orders: list[dict], query: str, limit: int = 10) -> list[int]:
+    words = query.lower().replace("ё", "е").split()
+    found = []
+    for order in reversed(orders):
+        text = " ".join(str(order.get(field, "")) for field in SEARCH_FIELDS + ("phone_number",)).lower()
+        if all(word in text for word in words):
+            found.append(order["id"])
+            if len(found) == limit:
+                break
+    return found
+
+
+def timings(func, repeat: int) -> list[float]:
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.append(time.perf_counter() - start)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", choices=SIZES, default="100k")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    orders = make_orders(SIZES[args.size])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "search_index.json")
+        index = SearchIndex(path)
+        start = time.perf_counter()
+        index.rebuild(orders)
+        print(f"построение по {len(orders)} заявкам: {time.perf_counter() - start:.2f} с")
+        start = time.perf_counter()
+        await index.save()
+        print(f"сохранение: {time.perf_counter() - start:.2f} с, {os.path.getsize(path) / 1e6:.1f} МБ")
+
+        loaded = SearchIndex(path)
+        start = time.perf_counter()
+        await loaded.load(_Store(orders))
+        print(f"загрузка с диска: {time.perf_counter() - start:.2f} с")
+
+        start = time.perf_counter()
+        for order_id in range(1, 1001):
+            order = dict(orders[order_id - 1], address="ул. Новая, 1")
+            loaded.add(order)
+        print(f"правка заявки: {(time.perf_counter() - start) / 1000 * 1e6:.0f} мкс")
+
+    print(f"\n{'запрос':<26}{'найдено':>9}{'индекс, мс p50/max':>22}{'перебор, мс':>14}")
+    for query in QUERIES:
+        found = index.search(query)
+        indexed = timings(lambda: index.search(query), args.repeat)
+        scanned = timings(lambda: scan(orders, query), 3)
+        print(
+            f"{query:<26}{len(found):>9}"
+            f"{statistics.median(indexed) * 1e3:>13.3f} / {max(indexed) * 1e3:<6.3f}"
+            f"{statistics.median(scanned) * 1e3:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""Холодный старт бота: время импорта и время до ответа на первое обновление.
+
+1. Несколько раз запускает python -X importtime -c "import bot" и печатает
+   медианное время импорта и самые тяжёлые модули верхнего уровня.
+2. Поднимает FakeTelegram с одним обновлением /start в очереди, запускает
+   python bot.py --mode polling и замеряет время от запуска процесса до
+   первого sendMessage. Прайс-лист рендерится в пустой кеш только при
+   первом запуске, поэтому первый прогон показывается отдельно.
+
+Токен настоящего бота не нужен. Запуск из корня проекта:
+python -m benchmarks.bench_startup
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_webhook import make_update
+from benchmarks.fake_telegram import FakeTelegram
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_PORT = 8083
+
+
+def bot_env(tmp: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "123456:FAKE",
+        "ADMIN_ID": "1",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{API_PORT}",
+        "METRICS_PORT": "0",
+        "ORDERS_FILE_PATH": os.path.join(tmp, "orders.json"),
+        "ORDERS_DB_PATH": os.path.join(tmp, "orders.db"),
+        "ARCHIVE_DIR": os.path.join(tmp, "archive"),
+        "EVENTS_DIR": os.path.join(tmp, "events"),
+        "STATS_FILE_PATH": os.path.join(tmp, "stats.json"),
+        "SEARCH_INDEX_PATH": os.path.join(tmp, "search_index.json"),
+        "FSM_DB_PATH": os.path.join(tmp, "fsm.db"),
+        "PDF_CACHE_DIR": os.path.join(tmp, "pdf_cache"),
+        "PRICE_CACHE_PATH": os.path.join(tmp, "price_cache.json"),
+    })
+    return env
+
+
+def parse_importtime(stderr: str) -> tuple[int, dict[str, int]]:
+    """Общее время импорта bot и накопленное время модулей верхнего уровня, мкс."""
+    total, modules = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == "bot":
+            total = int(cumulative)
+        elif depth == 1:
+            modules[name.strip()] = int(cumulative)
+    return total, modules
+
+
+def measure_imports(env: dict, runs: int, top: int):
+    totals, per_module = [], {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import bot"],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        total, modules = parse_importtime(result.stderr)
+        totals.append(total)
+        for name, micros in modules.items():
+            per_module.setdefault(name, []).append(micros)
+
+    print(f"Импорт bot: медиана {statistics.median(totals) / 1000:.0f} мс из {runs} запусков")
+    heaviest = sorted(per_module.items(), key=lambda item: -statistics.median(item[1]))[:top]
+    for name, values in heaviest:
+        print(f"  {name:<40} {statistics.median(values) / 1000:8.1f} мс")
+
+
+async def time_to_first_update(env: dict, timeout: float) -> float:
+    fake = FakeTelegram()
+    await fake.start(port=API_PORT)
+    fake.push_update(make_update(1, 1001))
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "bot.py", "--mode", "polling", cwd=ROOT, env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        while "sendMessage" not in fake.first_call_at:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("Бот не ответил на первое обновление")
+            await asyncio.sleep(0.01)
+        return fake.first_call_at["sendMessage"] - start
+    finally:
+        process.terminate()
+        await process.wait()
+        await fake.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="сколько самых тяжёлых модулей показать")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = bot_env(tmp)
+        measure_imports(env, args.runs, args.top)
+        timings = [await time_to_first_update(env, args.timeout) for _ in range(args.runs)]
+
+    print(f"До первого ответа: первый запуск {timings[0] * 1000:.0f} мс (пустой кеш прайс-листа), "
+          f"далее медиана {statistics.median(timings[1:] or timings) * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
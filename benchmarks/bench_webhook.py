@@ -0,0 +1,107 @@
+"""Нагрузочная проверка режима webhook против фейкового сервера Bot API.
+
+Поднимает FakeTelegram, вебхук бота и отправляет в него пачку команд /start
+от разных пользователей. Показывает время ответа вебхука и время до
+последнего ответа бота. Токен настоящего бота не нужен.
+
+Запуск из корня проекта: python -m benchmarks.bench_webhook
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks.fake_telegram import FakeTelegram
+
+API_PORT = 8081
+WEBHOOK_PORT = 8082
+SECRET = "bench-secret"
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="задержка фейкового Bot API, с")
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "BOT_TOKEN": "123456:FAKE",
+        "ADMIN_ID": "1",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{API_PORT}",
+        "METRICS_PORT": "0",
+        "FSM_STORAGE": "memory",
+        "ORDERS_FILE_PATH": os.path.join(tmp, "orders.json"),
+        "ORDERS_DB_PATH": os.path.join(tmp, "orders.db"),
+        "ARCHIVE_DIR": os.path.join(tmp, "archive"),
+        "EVENTS_DIR": os.path.join(tmp, "events"),
+        "STATS_FILE_PATH": os.path.join(tmp, "stats.json"),
+        "SEARCH_INDEX_PATH": os.path.join(tmp, "search_index.json"),
+        "PDF_CACHE_DIR": os.path.join(tmp, "pdf_cache"),
+        "PRICE_CACHE_PATH": os.path.join(tmp, "price_cache.json"),
+        "WEBHOOK_MAX_CONCURRENCY": str(args.concurrency),
+    })
+    import bot as bot_module
+    from webhook import WebhookServer
+
+    fake = FakeTelegram(latency=args.api_latency)
+    await fake.start(port=API_PORT)
+    bot_module.dp.include_router(bot_module.router)
+    server = WebhookServer(bot_module.dp, bot_module.bot, secret_token=SECRET, max_concurrency=args.concurrency)
+    await server.start("127.0.0.1", WEBHOOK_PORT)
+
+    url = f"http://127.0.0.1:{WEBHOOK_PORT}/webhook"
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=make_update(0, 1)) as response:
+            assert response.status == 401, "запрос без секретного токена должен отклоняться"
+
+        response_times = []
+
+        async def post(i):
+            started = time.perf_counter()
+            async with session.post(url, json=make_update(i, 1000 + i),
+                                    headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as response:
+                assert response.status == 200
+            response_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(i) for i in range(1, args.updates + 1)))
+        accepted = time.perf_counter() - started
+        while fake.calls["sendMessage"] < args.updates:
+            await asyncio.sleep(0.01)
+        finished = time.perf_counter() - started
+
+    await server.stop()
+    await fake.stop()
+    await bot_module.bot.session.close()
+
+    response_times.sort()
+    print(f"Обновлений: {args.updates}, задержка Bot API: {args.api_latency * 1000:.0f} мс, "
+          f"параллельно: {args.concurrency}")
+    print(f"Ответ вебхука p50 / p99: {response_times[len(response_times) // 2] * 1000:.1f} / "
+          f"{response_times[int(len(response_times) * 0.99)] * 1000:.1f} мс")
+    print(f"Все обновления приняты за {accepted:.2f} с, все ответы бота отправлены за {finished:.2f} с "
+          f"({args.updates / finished:.0f} обн/с)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""Синтетические наборы заявок для бенчмарков."""
+import json
+import random
+from datetime import datetime, timedelta
+
+from statuses import STATUS_IN_PROGRESS, STATUS_PENDING, STATUS_PROCESSED
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+_STREETS = ["ул. Абая", "пр. Достык", "ул. Толе би", "мкр. Самал-2", "ул. Жандосова", "пр. Аль-Фараби"]
+_REASONS = [
+    "Переустановка Windows", "Не включается ноутбук", "Чистка от пыли и замена термопасты",
+    "Настройка Wi-Fi роутера", "Установка 1С и Office", "Медленно работает компьютер",
+]
+_SERVICES = ["🔧 Компьютерная помощь", "🔧 Монтажные работы"]
+_STATUSES = [STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_PROCESSED]
+
+
+def make_order(order_id: int, rng: random.Random, start: datetime) -> dict:
+    created_at = start + timedelta(minutes=order_id)
+    status = rng.choice(_STATUSES)
+    history = []
+    if status != STATUS_PENDING:
+        history.append({
+            "timestamp": (created_at + timedelta(minutes=rng.randint(5, 600))).isoformat(),
+            "status": status,
+            "admin_id": 1,
+        })
+    return {
+        "id": order_id,
+        "full_name": f"Клиент {order_id}",
+        "address": f"г. Алматы, {rng.choice(_STREETS)}, {rng.randint(1, 300)}",
+        "service": rng.choice(_SERVICES),
+        "phone_number": f"+7707{rng.randint(1000000, 9999999)}",
+        "reason": rng.choice(_REASONS),
+        "status": status,
+        "user_id": 100_000 + rng.randint(0, order_id // 3 + 1),
+        "created_at": created_at.isoformat(),
+        "history": history,
+    }
+
+
+def make_orders(count: int, seed: int = 42) -> list[dict]:
+    """Детерминированный набор из count заявок."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [make_order(order_id, rng, start) for order_id in range(1, count + 1)]
+
+
+def write_orders_file(path: str, count: int):
+    """Пишет набор в формате orders.json."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(make_orders(count), file, ensure_ascii=False, indent=4)
@@ -0,0 +1,80 @@
+"""Фейковый сервер Bot API для локальной проверки бота без Telegram.
+
+Отвечает успехом на любой метод, для sendMessage/editMessageText/sendDocument
+возвращает правдоподобное сообщение и считает вызовы. Обновления,
+добавленные через push_update, отдаются боту в getUpdates.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from aiohttp import web
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.first_call = None
+        self.last_call = None
+        # Время первого вызова каждого метода (time.perf_counter)
+        self.first_call_at: dict[str, float] = {}
+        self._updates: list[dict] = []
+        self._new_update = asyncio.Event()
+        self._runner = None
+
+    def push_update(self, update: dict):
+        self._updates.append(update)
+        self._new_update.set()
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        payload = dict(await request.post()) if request.content_type != "application/json" else await request.json()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        now = time.perf_counter()
+        self.first_call = self.first_call or now
+        self.last_call = now
+        self.calls[method] += 1
+        self.first_call_at.setdefault(method, now)
+
+        if method == "getUpdates":
+            return web.json_response({"ok": True, "result": await self._get_updates(payload)})
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        elif method in ("sendMessage", "editMessageText", "sendPhoto", "sendDocument"):
+            result = {
+                "message_id": self.calls[method],
+                "date": int(time.time()),
+                "chat": {"id": int(payload.get("chat_id", 0)), "type": "private"},
+                "text": payload.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, payload: dict) -> list[dict]:
+        offset = int(payload.get("offset") or 0)
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates:
+            # Короткий long polling, чтобы бот не крутился вхолостую
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout=min(float(payload.get("timeout") or 0), 1.0))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081):
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
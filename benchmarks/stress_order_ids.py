@@ -0,0 +1,82 @@
+"""Проверка уникальности ID заявок при параллельном оформлении и перезапусках.
+
+Для каждого бэкенда хранилища несколько раундов подряд: параллельно
+добавляются --orders заявок, затем удаляются заявки с самыми большими ID
+(как при отмене), хранилище закрывается и открывается заново. Все выданные
+за все раунды ID должны быть уникальны, а ID нового раунда — больше любого
+выданного раньше. При нарушении скрипт завершается с кодом 1.
+
+Запуск из корня проекта: python -m benchmarks.stress_order_ids
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.datasets import make_orders
+from order_store import OrderStore
+
+
+def open_store(backend: str, tmp: str):
+    if backend == "sqlite":
+        from sqlite_store import SqliteOrderStore
+
+        return SqliteOrderStore(os.path.join(tmp, "orders.db"))
+    return OrderStore(os.path.join(tmp, "orders.json"))
+
+
+async def stress(backend: str, rounds: int, count: int, cancel: int) -> list[str]:
+    errors = []
+    issued: set[int] = set()
+    with tempfile.TemporaryDirectory() as tmp:
+        for round_number in range(1, rounds + 1):
+            store = open_store(backend, tmp)
+            await store.load()
+            orders = make_orders(count, seed=round_number)
+            for order in orders:
+                del order["id"]
+
+            start = time.perf_counter()
+            added = await asyncio.gather(*(store.add(order) for order in orders))
+            elapsed = time.perf_counter() - start
+            ids = [order["id"] for order in added]
+
+            if len(set(ids)) != len(ids):
+                errors.append(f"{backend}, раунд {round_number}: повторяющиеся ID внутри раунда")
+            if issued and min(ids) <= max(issued):
+                errors.append(f"{backend}, раунд {round_number}: ID {min(ids)} не больше уже выданного {max(issued)}")
+            if issued & set(ids):
+                errors.append(f"{backend}, раунд {round_number}: повторно выданы ID {sorted(issued & set(ids))[:5]}")
+            issued.update(ids)
+
+            # Отмена последних заявок: их номера не должны вернуться в оборот
+            for order_id in sorted(ids)[-cancel:]:
+                await store.delete(order_id)
+            await store.close()
+            print(f"{backend:<7} раунд {round_number}: {count} заявок за {elapsed:.2f} с, "
+                  f"ID {min(ids)}..{max(ids)}")
+    return errors
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=5000, help="заявок в раунде")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--cancel", type=int, default=10, help="сколько последних заявок отменять в раунде")
+    parser.add_argument("--backends", default="json,sqlite")
+    args = parser.parse_args()
+
+    errors = []
+    for backend in args.backends.split(","):
+        errors += await stress(backend.strip(), args.rounds, args.orders, args.cancel)
+    for error in errors:
+        print(f"ОШИБКА: {error}")
+    if errors:
+        sys.exit(1)
+    print("Все ID уникальны и не переиспользуются.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""Проверка, что параллельные изменения одной заявки не теряются.
+
+На каждом бэкенде хранилища создаётся --orders заявок, и для каждой
+одновременно запускаются --updates смен статуса (update_order_status) и
+столько же отзывов (save_feedback_to_json) — как если бы несколько
+администраторов и пользователь действовали разом. После этого в истории
+каждой заявки должно быть ровно --updates записей, а в отзывах — столько же
+отзывов. Перед каждой записью хранилище отдаёт управление циклу событий, как
+при настоящем вводе-выводе, — иначе у хранилища в памяти между чтением
+заявки и записью её новой версии другие корутины не выполнятся никогда.
+
+С ключом --no-locks блокировки по заявкам отключаются, и обновления должны
+теряться. Код возврата 1, если с блокировками что-то потеряно или если без
+них не потеряно ничего (проверка ничего бы не доказывала).
+
+Запуск из корня проекта: python -m benchmarks.stress_order_locks
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+import utils
+from benchmarks.datasets import make_orders
+from order_stats import OrderStats
+from order_store import OrderStore
+from statuses import STATUS_IN_PROGRESS, STATUS_PROCESSED
+
+
+def open_store(backend: str, tmp: str):
+    if backend == "sqlite":
+        from sqlite_store import SqliteOrderStore
+
+        return SqliteOrderStore(os.path.join(tmp, "orders.db"))
+    return OrderStore(os.path.join(tmp, "orders.json"))
+
+
+def yield_before_updates(store):
+    """Перед каждой записью заявки отдаёт управление другим корутинам."""
+    update = store.update
+
+    async def yielding_update(order_id: int, fields: dict):
+        await asyncio.sleep(0)
+        return await update(order_id, fields)
+
+    store.update = yielding_update
+
+
+async def stress(backend: str, orders_count: int, updates: int) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = open_store(backend, tmp)
+        await store.load()
+        yield_before_updates(store)
+        utils.order_store = store
+        utils.order_stats = OrderStats(os.path.join(tmp, "stats.json"))
+        ids = []
+        for order in make_orders(orders_count):
+            del order["id"]
+            order["history"] = []
+            ids.append((await store.add(order))["id"])
+
+        statuses = [STATUS_IN_PROGRESS, STATUS_PROCESSED]
+        calls = [
+            utils.update_order_status(order_id, statuses[i % 2], admin_id=i)
+            for order_id in ids for i in range(updates)
+        ] + [
+            utils.save_feedback_to_json(order_id, f"Отзыв {i}")
+            for order_id in ids for i in range(updates)
+        ]
+        random.Random(1).shuffle(calls)
+        start = time.perf_counter()
+        await asyncio.gather(*calls)
+        elapsed = time.perf_counter() - start
+
+        lost = 0
+        for order_id in ids:
+            order = await store.get(order_id)
+            lost += updates - len(order.get("history", [])) + updates - len(order.get("feedback", []))
+        await store.close()
+
+    print(f"{backend:<7} {len(calls)} изменений {orders_count} заявок за {elapsed:.2f} с, потеряно: {lost}")
+    return lost
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=100, help="смен статуса и отзывов на каждую заявку")
+    parser.add_argument("--backends", default="json,sqlite")
+    parser.add_argument("--no-locks", action="store_true", help="отключить блокировки по заявкам")
+    args = parser.parse_args()
+
+    if args.no_locks:
+        utils.order_locks = lambda order_id: contextlib.nullcontext()
+
+    failed = False
+    for backend in args.backends.split(","):
+        lost = await stress(backend.strip(), args.orders, args.updates)
+        if args.no_locks and not lost:
+            print(f"{backend}: без блокировок ни одно обновление не потеряно — проверка не воспроизводит гонку")
+            failed = True
+        elif lost and not args.no_locks:
+            print(f"{backend}: потеряно обновлений: {lost}")
+            failed = True
+    if failed:
+        sys.exit(1)
+    if args.no_locks:
+        print("Без блокировок обновления теряются, как и ожидалось.")
+    else:
+        print("Ни одно обновление не потеряно.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
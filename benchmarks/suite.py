@@ -0,0 +1,128 @@
+"""Микробенчмарки горячих путей: хранилище заявок, форматирование, валидация.
+
+Каждый бенчмарк возвращает время одного вызова в секундах. Бенчмарки,
+зависящие от числа заявок, запускаются на каждом размере набора.
+"""
+import asyncio
+import gc
+import logging
+import os
+import tempfile
+import time
+
+import utils
+import validators
+from benchmarks.datasets import write_orders_file
+from order_store import OrderStore
+from statuses import STATUS_PROCESSED
+
+
+def measure(func, min_time: float = 0.2, repeat: int = 5) -> float:
+    """Минимальное по нескольким прогонам время одного вызова func().
+
+    Как и timeit, на время замеров отключает сборщик мусора.
+    """
+    func()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(func, min_time, repeat)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _measure(func, min_time: float, repeat: int) -> float:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1_000_000:
+            break
+        number *= 10
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def measure_async(loop, make_coro, inner: int = 1, **kwargs) -> float:
+    """Время одного await make_coro(); inner вызовов идут в одном прогоне цикла,
+    чтобы накладные расходы run_until_complete не заслоняли быстрые операции."""
+    async def batch():
+        for _ in range(inner):
+            await make_coro()
+
+    return measure(lambda: loop.run_until_complete(batch()), **kwargs) / inner
+
+
+# Бенчмарки, не зависящие от числа заявок
+
+TEXT_1K = ("Заявка #123: ул. Абая, 10-15 (3 этаж)! Телефон +7-707-123-45-67. " * 16)[:1024]
+TEXT_100K = "\n".join(f"🆔 ID заявки: {i}\n👤 ФИО: Клиент {i}\n🏠 Адрес: ул. Абая, {i}" for i in range(2000))
+
+
+def fixed_benchmarks(loop) -> dict:
+    prices = utils.load_prices()
+    catalog = utils.price_catalog
+    loop.run_until_complete(catalog.reload())
+    return {
+        "escape_md[1KB]": lambda: utils.escape_md(TEXT_1K),
+        "load_prices": utils.load_prices,
+        "format_prices": lambda: utils.format_prices(prices),
+        "price_catalog_get": lambda: loop.run_until_complete(catalog.get()),
+        "split_message[100KB]": lambda: utils.split_message(TEXT_100K),
+        "is_valid_phone_number": lambda: validators.is_valid_phone_number("+77071234567"),
+        "is_valid_address": lambda: validators.is_valid_address("г. Алматы, ул. Абая, 10"),
+        "sanitize_input[1KB]": lambda: validators.sanitize_input(TEXT_1K),
+    }
+
+
+# Бенчмарки на наборе из count заявок
+
+def sized_benchmarks(loop, tmp_dir: str, count: int) -> dict:
+    path = os.path.join(tmp_dir, f"orders_{count}.json")
+    write_orders_file(path, count)
+    store = OrderStore(path)
+    loop.run_until_complete(store.load())
+    utils.order_store = store
+    middle = count // 2
+    quick = dict(min_time=0.05, repeat=2) if count >= 100_000 else {}
+
+    results = {
+        "store_load": measure_async(loop, lambda: OrderStore(path).load(), **quick),
+        "store_snapshot": measure(store._write_snapshot, **quick),
+        "store_get": measure_async(loop, lambda: store.get(middle), inner=1000),
+        "store_page": measure_async(loop, lambda: store.page(STATUS_PROCESSED, before_id=middle, limit=10), inner=100),
+        "store_list_by_user": measure_async(loop, lambda: store.list_by_user(100_000 + middle // 6), inner=100),
+        "store_count_by_status": measure_async(loop, store.count_by_status, inner=1000),
+        "get_new_orders_list": measure_async(loop, utils.get_new_orders_list, **quick),
+    }
+
+    async def updates(n=100):
+        await asyncio.gather(*(store.update(middle + i % 10, {"reason": "Обновлено"}) for i in range(n)))
+
+    results["store_update"] = measure_async(loop, updates, min_time=0.05, repeat=2) / 100
+    loop.run_until_complete(store.close())
+    return {f"{name}[{count}]": seconds for name, seconds in results.items()}
+
+
+def run(sizes: list[int], only: str | None = None) -> dict:
+    logging.getLogger().setLevel(logging.WARNING)
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        results.update({name: measure(func) for name, func in fixed_benchmarks(loop).items()})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for count in sizes:
+                results.update(sized_benchmarks(loop, tmp_dir, count))
+    finally:
+        loop.close()
+    if only:
+        results = {name: seconds for name, seconds in results.items() if only in name}
+    return results
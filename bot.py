@@ -1,58 +1,93 @@
 import asyncio
+import base64
 import logging
 import os
 import json
-import pyotp
 import html
-from aiogram import Bot, Dispatcher, types, F, Router, BaseMiddleware
-from aiogram.filters import Command, StateFilter
+import secrets
+from aiogram import Bot, Dispatcher, types, F, Router
+from aiogram.filters import Command, CommandObject, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove, TelegramObject, InlineKeyboardButton, InlineKeyboardMarkup, FSInputFile
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup, FSInputFile
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.exceptions import TelegramBadRequest
-from dotenv import load_dotenv, set_key
-from datetime import datetime
+from dotenv import set_key
+from datetime import date, datetime, timedelta
 
 from states import OrderForm, StatusForm
-from keyboards import remove_admin_keyboard, start_button_keyboard, main_menu_keyboard, edit_request_keyboard, services_keyboard, services_keyboard_1, admin_panel_keyboard
-from utils import pdf_to_image, escape_md, process_pdf, convert_pdf_to_images, notify_user, cancel_order, save_feedback_to_json, notify_admins, get_new_orders_list, save_order_to_json, get_order_status, load_orders, save_orders, update_order_status, is_valid_request_id, update_request, get_order_data_by_id
+from keyboards import remove_admin_keyboard, start_button_keyboard, main_menu_keyboard, edit_request_keyboard, services_keyboard, services_keyboard_1, admin_panel_keyboard, orders_page_keyboard, my_orders_keyboard, my_order_keyboard
+from utils import pdf_to_image, escape_md, process_pdf, convert_pdf_to_images, notify_user, cancel_order, save_feedback_to_json, notify_admins, get_new_orders_list, save_order_to_json, get_order_status, order_store, update_order_status, is_valid_request_id, update_request, get_order_data_by_id, pdf_renderer, split_message, order_stats, price_catalog, event_log, search_index, outbound, admin_notifier
 from validators import sanitize_input, is_valid_phone_number, is_valid_address
-from pdf2image import convert_from_path
-
-# Загрузка переменных окружения
-load_dotenv()
+from config import (
+    ADMIN_IDS, BOT_MODE, BOT_TOKEN, FSM_CACHE_SIZE, FSM_DB_PATH, FSM_STORAGE, FSM_TTL, METRICS_HOST, METRICS_PORT, MY_ORDERS_LIMIT,
+    ORDERS_FILE_PATH, ORDERS_PAGE_SIZE, PRICE_CACHE_PATH, PRICE_PDF_PATH, TELEGRAM_API_URL, WEBHOOK_BASE_URL, WEBHOOK_HOST,
+    WEBHOOK_MAX_CONCURRENCY, WEBHOOK_PATH, WEBHOOK_PORT, WEBHOOK_SECRET,
+)
+from callback_table import CallbackTable
+from metrics import Metrics, MetricsMiddleware, TelegramMetricsMiddleware, start_metrics_server
+from order_export import EXPORT_FORMATS, export_orders
+from outbound_queue import PRIORITY_NOTIFICATION
+from price_table import PriceTable
+from statuses import STATUS_IN_PROGRESS, STATUS_PENDING, STATUS_PROCESSED
 
-# Генерация секретного ключа для 2FA
-secret = pyotp.random_base32()
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
 
-# Получение списка admin_ids из переменной окружения
-admin_ids_str = os.getenv("ADMIN_ID")
-if admin_ids_str:
-    admin_ids = list(map(int, admin_ids_str.strip("'").split(',')))
-else:
-    admin_ids = []
+# Генерация секретного ключа для 2FA (base32, как pyotp.random_base32;
+# сам pyotp импортируется только в команде /2fa)
+secret = base64.b32encode(secrets.token_bytes(20)).decode()
 
-# Получение токена бота и ID админа
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = os.getenv("ADMIN_ID")
 if not BOT_TOKEN or not ADMIN_IDS:
     raise ValueError("Токен бота или ID админа не найден. Убедитесь, что переменные окружения BOT_TOKEN и ADMIN_ID заданы.")
 
-# Преобразование строки с ID админов в список целых чисел
-if ADMIN_IDS:
-    ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS.split(',')]
+# Единственный экземпляр Bot и его HTTP-сессия на весь процесс
+if TELEGRAM_API_URL:
+    bot = Bot(token=BOT_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)))
 else:
-    ADMIN_IDS = []
+    bot = Bot(token=BOT_TOKEN)
+
+# Метрики обработчиков, хранилища заявок и вызовов Telegram API
+metrics = Metrics()
+metrics.describe("bot_updates_total", "Входящие сообщения и нажатия кнопок по типу и состоянию FSM")
+metrics.describe("bot_handlers_in_flight", "Обработчики, выполняющиеся в данный момент")
+metrics.describe("bot_handler_seconds", "Время выполнения обработчиков")
+metrics.describe("bot_handler_errors_total", "Исключения в обработчиках")
+metrics.describe("bot_storage_seconds", "Время операций хранилища заявок")
+metrics.describe("bot_storage_errors_total", "Ошибки операций хранилища заявок")
+metrics.describe("bot_telegram_api_seconds", "Время вызовов Telegram Bot API")
+metrics.describe("bot_telegram_api_errors_total", "Ошибки вызовов Telegram Bot API")
+metrics.describe("bot_outbound_queue_depth", "Исходящие запросы в очереди по классу приоритета")
+metrics.describe("bot_outbound_wait_seconds", "Время ожидания исходящего запроса в очереди")
+metrics.describe("bot_outbound_requests_total", "Исходящие запросы, прошедшие через очередь")
+metrics.describe("bot_admin_notifications_total", "Уведомления администраторам: доставленные и недоставленные")
+metrics.describe("bot_admin_notification_retries_total", "Повторные попытки отправки уведомлений администраторам")
+metrics.describe("bot_admin_notification_seconds", "Время доставки уведомления администратору с учётом лимитов и повторов")
+admin_notifier.metrics = metrics
+# Очередь подключается первой, чтобы время вызовов API не включало ожидание в ней
+outbound.metrics = metrics
+bot.session.middleware(outbound)
+bot.session.middleware(TelegramMetricsMiddleware(metrics))
+metrics.instrument(order_store, "bot_storage", [
+    "get", "exists", "all", "add", "update", "delete", "page", "list_by_status", "list_by_user", "count_by_status",
+])
 
-# Создаём экземпляр Bot
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+# Состояния диалогов хранятся в SQLite, чтобы не теряться при перезапуске
+if FSM_STORAGE == "memory":
+    fsm_storage = MemoryStorage()
+else:
+    from fsm_storage import SqliteFSMStorage
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+    fsm_storage = SqliteFSMStorage(FSM_DB_PATH, cache_size=FSM_CACHE_SIZE, ttl=FSM_TTL)
+dp = Dispatcher(storage=fsm_storage)
+
+# Прайс-лист рендерится при запуске, дальше отправляется по file_id
+price_table = PriceTable(PRICE_PDF_PATH, pdf_renderer, PRICE_CACHE_PATH)
 
 # Определение состояний
 class OrderForm(StatesGroup):
@@ -84,17 +119,17 @@ class FeedbackForm(StatesGroup):
 # Создаём экземпляр Router для маршрутизации обновлений
 router = Router()
 
-# Мидлварь для логирования входящих событий
-class LoggingMiddleware(BaseMiddleware):
-    async def __call__(self, handler, event: TelegramObject, data: dict):
-        return await handler(event, data)
+# Нажатия на кнопки ищутся по callback_data в таблице, а не перебором фильтров
+callbacks = CallbackTable()
+callbacks.attach(router)
 
-# Регистрация мидлвари
-router.message.middleware(LoggingMiddleware())
+# Мидлварь метрик: задержка, ошибки и состояние FSM для сообщений и кнопок
+router.message.middleware(MetricsMiddleware(metrics))
+router.callback_query.middleware(MetricsMiddleware(metrics))
 
 # Клавиатура с кнопкой "Отменить заявку"
 cancel_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-    [InlineKeyboardButton(text="🚫 Отменить заявку", callback_data="cancel_request")]
+    [InlineKeyboardButton(text="🚫 Отменить заявку", callback_data="cancel_order_form")]
 ])
 
 # Обработка команды /start
@@ -112,9 +147,9 @@ async def start_command(message: Message):
         )
 
 # Обработка нажатия "Старт"
-@router.callback_query(lambda c: c.data == "start_work")
+@callbacks.exact("start_work")
 async def start_work(callback_query: CallbackQuery):
-    if callback_query.from_user.id in admin_ids:
+    if callback_query.from_user.id in ADMIN_IDS:
         await callback_query.message.edit_text("📋 Выберите действие из меню:", reply_markup=main_menu_keyboard(admin=True))
     else:
         await callback_query.message.edit_text("📋 Выберите действие из меню:", reply_markup=main_menu_keyboard(admin=False))
@@ -123,6 +158,8 @@ async def start_work(callback_query: CallbackQuery):
 @router.message(Command("2fa"))
 async def enable_2fa(message: Message):
     if message.from_user.id in ADMIN_IDS:
+        import pyotp
+
         totp = pyotp.TOTP(secret)
         uri = totp.provisioning_uri(name=message.from_user.username, issuer_name="OutsourcingBot")
         await message.answer(
@@ -142,37 +179,172 @@ async def verify_2fa(message: Message):
     else:
         await message.answer("🚫 У вас нет прав для выполнения этого действия.")
 
-# Обработка нажатия на кнопку "Общий список заявок"
-@router.callback_query(F.data == 'show_all_orders')
-async def show_all_orders(callback_query: CallbackQuery):
-    orders = load_orders()
-    if not orders:
-        await bot.send_message(callback_query.from_user.id, "📭 Список заявок пуст.")
+# Обработка команды /metrics: сводка метрик для администраторов
+@router.message(Command("metrics"))
+async def show_metrics(message: Message):
+    if message.from_user.id not in ADMIN_IDS:
+        await message.answer("🚫 У вас нет прав для выполнения этого действия.")
         return
+    for part in split_message(metrics.summary()):
+        await message.answer(part)
 
-    orders_text = "📋 Общий список заявок:\n\n"
+# Обработка команды /prices: прайс-лист текстом
+@router.message(Command("prices"))
+async def show_prices_text(message: Message):
+    await price_catalog.send(message)
+
+# Сколько найденных заявок показывать в ответе на /search
+SEARCH_RESULTS_LIMIT = 10
+
+# Обработка команды /search: поиск заявок по ФИО, адресу, причине, услуге и телефону
+@router.message(Command("search"))
+async def search_orders(message: Message, command: CommandObject):
+    if message.from_user.id not in ADMIN_IDS:
+        await message.answer("🚫 У вас нет прав для выполнения этого действия.")
+        return
+    if not command.args:
+        await message.answer("🔍 Укажите запрос: /search <ФИО, адрес, услуга или телефон>")
+        return
+    order_ids = search_index.search(command.args, limit=SEARCH_RESULTS_LIMIT)
+    if not order_ids:
+        await message.answer("🔍 Ничего не найдено.")
+        return
+    lines = []
+    for order_id in order_ids:
+        order = await order_store.get(order_id)
+        if order is not None:
+            lines.append(
+                f"🆔 #{order['id']} · {order.get('status', 'Статус не указан')}\n"
+                f"👤 {order.get('full_name', '—')}, 📞 {order.get('phone_number', '—')}\n"
+                f"🏠 {order.get('address', '—')}\n"
+                f"🔧 {order.get('service') or order.get('reason', '—')}"
+            )
+    for part in split_message("\n\n".join(lines)):
+        await message.answer(part)
+
+# Фильтры постраничного списка заявок: код в callback_data -> статус
+ORDER_FILTERS = {
+    "all": (None, "все"),
+    "new": (STATUS_PENDING, "новые"),
+    "work": (STATUS_IN_PROGRESS, "в работе"),
+    "done": (STATUS_PROCESSED, "обработанные"),
+}
+
+# Выгрузка заявок: лимит размера документа у Bot API и частота сообщений о прогрессе
+EXPORT_MAX_BYTES = 50 * 1024 * 1024
+EXPORT_PROGRESS_INTERVAL = 3.0
+EXPORT_USAGE = (
+    "📦 Использование: /export [csv|jsonl] [all|new|work|done] [с ГГГГ-ММ-ДД] [по ГГГГ-ММ-ДД]\n"
+    "Например: /export csv done 2024-01-01 2024-03-31"
+)
+# Администраторы, у которых сейчас выполняется выгрузка
+running_exports: set[int] = set()
+
+def parse_export_args(args: str | None):
+    """Разбирает аргументы /export в (формат, статус, с даты, по дату)."""
+    fmt, status, dates = "csv", None, []
+    for arg in (args or "").lower().split():
+        if arg in EXPORT_FORMATS:
+            fmt = arg
+        elif arg in ORDER_FILTERS:
+            status = ORDER_FILTERS[arg][0]
+        elif len(dates) < 2:
+            dates.append(date.fromisoformat(arg))
+        else:
+            raise ValueError(arg)
+    return fmt, status, *(dates + [None, None])[:2]
+
+async def run_export(chat_id: int, status_message: Message, fmt: str, status: str | None,
+                     start: date | None, end: date | None):
+    """Выгружает заявки в фоне, сообщая о прогрессе, и отправляет файл документом."""
+    counts = await order_store.count_by_status()
+    total = counts.get(status, 0) if status is not None else sum(counts.values())
+    last_report = asyncio.get_running_loop().time()
+
+    async def progress(count: int):
+        nonlocal last_report
+        now = asyncio.get_running_loop().time()
+        if now - last_report >= EXPORT_PROGRESS_INTERVAL:
+            last_report = now
+            await status_message.edit_text(f"⏳ Выгружено заявок: {count} из {total}")
+
+    path = None
+    try:
+        path, count = await export_orders(order_store, fmt, status, start, end, progress=progress)
+        if not count:
+            await status_message.edit_text("📭 Заявок по этим условиям нет.")
+        elif os.path.getsize(path) > EXPORT_MAX_BYTES:
+            await status_message.edit_text("🚫 Файл выгрузки больше 50 МБ. Сузьте период или выберите jsonl.")
+        else:
+            filename = f"orders_{datetime.now():%Y%m%d_%H%M}{'.csv' if fmt == 'csv' else '.jsonl.gz'}"
+            await bot.send_document(chat_id, FSInputFile(path, filename=filename), caption=f"📦 Заявок: {count}")
+            await status_message.edit_text(f"✅ Выгрузка готова: {count} заявок.")
+    except Exception as e:
+        logging.error(f"Ошибка выгрузки заявок: {e}")
+        await status_message.edit_text("🚫 Не удалось выгрузить заявки.")
+    finally:
+        running_exports.discard(chat_id)
+        if path is not None:
+            os.remove(path)
+
+# Обработка команды /export: выгрузка заявок файлом CSV или JSONL.gz
+@router.message(Command("export"))
+async def export_command(message: Message, command: CommandObject):
+    if message.from_user.id not in ADMIN_IDS:
+        await message.answer("🚫 У вас нет прав для выполнения этого действия.")
+        return
+    try:
+        fmt, status, start, end = parse_export_args(command.args)
+    except ValueError:
+        await message.answer(EXPORT_USAGE)
+        return
+    if message.chat.id in running_exports:
+        await message.answer("⏳ Предыдущая выгрузка ещё не закончилась.")
+        return
+    running_exports.add(message.chat.id)
+    status_message = await message.answer("⏳ Выгрузка заявок началась...")
+    # Выгрузка идёт в фоне: обработчик не ждёт её, а бот продолжает отвечать
+    outbound.spawn(run_export(message.chat.id, status_message, fmt, status, start, end), PRIORITY_NOTIFICATION)
+
+async def render_orders_page(status_filter: str, before_id: int | None = None, after_id: int | None = None):
+    """Готовит текст и клавиатуру одной страницы списка заявок."""
+    status, title = ORDER_FILTERS[status_filter]
+    orders, has_newer, has_older = await order_store.page(
+        status, before_id=before_id, after_id=after_id, limit=ORDERS_PAGE_SIZE
+    )
+    if not orders:
+        return f"📭 Заявок нет ({title}).", orders_page_keyboard(status_filter)
+
+    response_text = f"📋 Список заявок ({title}):\n\n"
     for order in orders:
-        orders_text += (
-            f"🆔 ID: {escape_md(str(order.get('id', 'N/A')))}\n"
-            f"👤 Имя: {escape_md(order.get('full_name', 'N/A'))}\n"
-            f"📞 Телефон: {escape_md(order.get('phone_number', 'N/A'))}\n"
-            f"🏠 Адрес: {escape_md(order.get('address', 'N/A'))}\n"
-            f"💼 Услуга: {escape_md(order.get('service', 'N/A'))}\n"
-            f"📋 Статус: {escape_md(order.get('status', 'N/A'))}\n"
-            f"❓ Причина обращения: {escape_md(order.get('reason', 'N/A'))}\n"
-            f"📅 Дата создания: {escape_md(order.get('created_at', 'N/A'))}\n"
-            f"{escape_md('-' * 20)}\n"
+        response_text += (
+            f"🆔 ID заявки: {order['id']}\n"
+            f"👤 ФИО: {order.get('full_name', 'N/A')}\n"
+            f"🏠 Адрес: {order.get('address', 'N/A')}\n"
+            f"📞 Телефон: {order.get('phone_number', 'N/A')}\n"
+            f"💼 Услуга: {order.get('service', 'N/A')}\n"
+            f"❓ Причина: {order.get('reason', 'N/A')}\n"
+            f"📋 Статус: {order.get('status', 'N/A')}\n"
+            f"📅 Дата создания: {order.get('created_at', 'N/A')}\n\n"
         )
+    keyboard = orders_page_keyboard(status_filter, orders[0]['id'], orders[-1]['id'], has_newer, has_older)
+    # Страница из нескольких заявок укладывается в лимит, но длинные причины обращения
+    # всё же могут его превысить
+    return split_message(response_text)[0], keyboard
 
-    await bot.send_message(callback_query.from_user.id, orders_text, parse_mode="MarkdownV2")
+# Обработка нажатия на кнопку "Общий список заявок"
+@callbacks.exact("show_all_orders")
+async def show_all_orders(callback_query: CallbackQuery):
+    text, keyboard = await render_orders_page("all")
+    await bot.send_message(callback_query.from_user.id, text, reply_markup=keyboard)
 
 # Обработка кнопки "Услуги"
-@router.callback_query(F.data == "services")
+@callbacks.exact("services")
 async def show_services(callback_query: CallbackQuery):
     await callback_query.message.edit_text("🔧 Выберите услугу:", reply_markup=services_keyboard())
 
 # Обработка кнопки "Компьютерная помощь"
-@router.callback_query(F.data == "service_1")
+@callbacks.exact("service_1")
 async def computer_help(callback_query: CallbackQuery):
     await callback_query.message.edit_text(
         "Мы предлагаем:\n"
@@ -188,7 +360,7 @@ async def computer_help(callback_query: CallbackQuery):
     )
 
 # Обработка кнопки "Предложения по монтажным работам"
-@router.callback_query(F.data == "service_2")
+@callbacks.exact("service_2")
 async def installation_proposals(callback_query: CallbackQuery):
     await callback_query.message.edit_text(
         "Устали от медленного интернета, обрывов соединения и хаоса с проводами?\n"
@@ -207,13 +379,13 @@ async def installation_proposals(callback_query: CallbackQuery):
     )
 
 # Обработка кнопки "Заказ на выезд"
-@router.callback_query(F.data == "service_3")
+@callbacks.exact("service_3")
 async def order_visit(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("Пожалуйста, введите ваше полное имя для оформления заявки:")
     await state.set_state(OrderForm.full_name)
 
 # Обработка кнопки "Редактировать заявку"
-@router.callback_query(F.data == "edit_request")
+@callbacks.exact("edit_request")
 async def edit_request(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🆔 Введите номер Вашей ID Заявки:")
     await state.set_state(OrderForm.request_id)
@@ -222,42 +394,42 @@ async def edit_request(callback_query: CallbackQuery, state: FSMContext):
 @router.message(StateFilter(OrderForm.request_id))
 async def process_request_id(message: Message, state: FSMContext):
     request_id = int(message.text.strip())
-    if not is_valid_request_id(request_id):
+    if not await is_valid_request_id(request_id):
         await message.answer("🚫 Неверный ID заявки. Пожалуйста, введите корректный номер ID.")
         return
     
-    order_data = get_order_data_by_id(request_id)
+    order_data = await get_order_data_by_id(request_id)
     if not order_data:
         await message.answer("🚫 Заявка с таким ID не найдена. Пожалуйста, введите корректный номер ID.")
         return
     
-    await state.update_data(request_id=request_id, order_data=order_data)
+    await state.update_data(request_id=request_id)
     await message.answer("Выберите, что вы хотите изменить:", reply_markup=edit_request_keyboard())
     await state.set_state(OrderForm.edit_field)
 
 # Обработка кнопки "Редактировать имя"
-@router.callback_query(F.data == "edit_full_name")
+@callbacks.exact("edit_full_name")
 async def edit_name(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("👤 Введите новое имя:")
     await state.set_state(OrderForm.edit_value)
     await state.update_data(edit_field="full_name")
 
 # Обработка кнопки "Редактировать адрес"
-@router.callback_query(F.data == "edit_address")
+@callbacks.exact("edit_address")
 async def edit_address(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🏠 Введите новый адрес:")
     await state.set_state(OrderForm.edit_value)
     await state.update_data(edit_field="address")
 
 # Обработка кнопки "Редактировать телефон"
-@router.callback_query(F.data == "edit_phone_number")
+@callbacks.exact("edit_phone_number")
 async def edit_phone(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("📞 Введите новый номер телефона:")
     await state.set_state(OrderForm.edit_value)
     await state.update_data(edit_field="phone_number")
 
 # Обработка кнопки "Редактировать причину"
-@router.callback_query(F.data == "edit_reason")
+@callbacks.exact("edit_reason")
 async def edit_reason(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("❓ Введите новую причину обращения:")
     await state.set_state(OrderForm.edit_value)
@@ -270,14 +442,11 @@ async def process_edit_value(message: Message, state: FSMContext):
     data = await state.get_data()
     request_id = data['request_id']
     field = data['edit_field']
-    orders = load_orders()
-    order_data = next((order for order in orders if order['id'] == request_id), None)
-    if order_data is None:
+    if not await is_valid_request_id(request_id):
         await message.answer("🚫 Заявка с указанным ID не найдена.")
         return
     if field in ["full_name", "address", "phone_number", "reason"]:
-        order_data[field] = value
-        save_orders(orders)
+        await update_request(request_id, {field: value})
         await message.answer(f"💾 Поле {field} успешно обновлено.")
     else:
         await message.answer("🚫 Неверное поле для редактирования.")
@@ -285,7 +454,7 @@ async def process_edit_value(message: Message, state: FSMContext):
     await state.set_state(OrderForm.edit_field)
 
 # Обработка кнопки "Оформить заявку"
-@router.callback_query(F.data == "apply_request")
+@callbacks.exact("apply_request")
 async def create_request(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("👤 Пожалуйста, введите ваше полное имя:", reply_markup=cancel_keyboard)
     await state.set_state(OrderForm.full_name)
@@ -310,14 +479,14 @@ async def process_address(message: Message, state: FSMContext):
     await state.set_state(OrderForm.service)
 
 # Обработка нажатия на кнопку "Компьютерная помощь"
-@router.callback_query(F.data == 'computer_help')
+@callbacks.exact("computer_help")
 async def computer_help(callback_query: CallbackQuery, state: FSMContext):
     await state.update_data(service="🔧 Компьютерная помощь")
     await callback_query.message.answer("📞 Введите номер телефона:", reply_markup=cancel_keyboard)
     await state.set_state(OrderForm.phone_number)
 
 # Обработка нажатия на кнопку "Монтажные работы"
-@router.callback_query(F.data == 'installation_work')
+@callbacks.exact("installation_work")
 async def installation_work(callback_query: CallbackQuery, state: FSMContext):
     await state.update_data(service="🔧 Монтажные работы")
     await callback_query.message.answer("📞 Введите номер телефона:", reply_markup=cancel_keyboard)
@@ -334,8 +503,10 @@ async def process_phone_number(message: Message, state: FSMContext):
     await message.answer("❓ Введите причину обращения:", reply_markup=cancel_keyboard)
     await state.set_state(OrderForm.reason)
 
-# Обработка кнопки "Отменить заявку" во время оформления
-@router.callback_query(F.data == "cancel_request")
+# Обработка кнопки "Отменить заявку" во время оформления. Раньше у неё была
+# та же callback_data, что и у отмены готовой заявки из меню, и второй
+# обработчик никогда не срабатывал
+@callbacks.exact("cancel_order_form")
 async def cancel_request_during_creation(callback_query: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback_query.message.edit_text("🚫 Оформление заявки отменено.")
@@ -346,7 +517,7 @@ async def cancel_request_during_creation(callback_query: CallbackQuery, state: F
 async def process_reason(message: Message, state: FSMContext):
     reason = sanitize_input(message.text.strip())
     await state.update_data(reason=reason)
-    await state.update_data(status="Ожидает обработки", user_id=message.from_user.id)
+    await state.update_data(status=STATUS_PENDING, user_id=message.from_user.id)
     order_data = await state.get_data()
     order_id = await save_order_to_json(bot, order_data)
     order_data['id'] = order_id
@@ -364,19 +535,19 @@ async def process_reason(message: Message, state: FSMContext):
     await state.clear()
 
 # Обработка кнопки "Назад" в меню услуг
-@router.callback_query(F.data == "back_to_main")
+@callbacks.exact("back_to_main")
 async def back_to_main(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("📋 Выберите действие из меню:", reply_markup=main_menu_keyboard())
     await state.clear()
 
 # Обработка кнопки "Панель администратора"
-@router.callback_query(F.data == "admin_panel")
+@callbacks.exact("admin_panel")
 async def admin_panel(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🆔 Введите номер Вашей ID Заявки для изменения статуса:")
     await state.set_state(AdminState.request_id)
 
 # Обработка кнопки "Назад" в панели администратора
-@router.callback_query(F.data == "back_to_start")
+@callbacks.exact("back_to_start")
 async def back_to_start(callback_query: CallbackQuery):
     is_admin = callback_query.from_user.id in ADMIN_IDS
     await callback_query.message.edit_text("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=is_admin))
@@ -385,7 +556,7 @@ async def back_to_start(callback_query: CallbackQuery):
 @router.message(StateFilter(AdminState.request_id))
 async def process_admin_request_id(message: Message, state: FSMContext):
     request_id = int(message.text.strip())
-    if not is_valid_request_id(request_id):
+    if not await is_valid_request_id(request_id):
         await message.answer("🚫 Неверный ID заявки. Пожалуйста, введите корректный номер ID.")
         return
     await state.update_data(request_id=request_id)
@@ -393,104 +564,120 @@ async def process_admin_request_id(message: Message, state: FSMContext):
     await state.set_state(AdminState.status)
 
 # Обработка кнопки "Обработано"
-@router.callback_query(F.data == "status_processed")
+@callbacks.exact("status_processed")
 async def status_processed(callback_query: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     request_id = data.get('request_id')
-    orders = load_orders()
-    for order in orders:
-        if order['id'] == request_id:
-            order['status'] = "Обработано"
-            save_orders(orders)
-            if 'history' not in order:
-                order['history'] = []
-            order['history'].append({
-                'timestamp': datetime.now().isoformat(),
-                'status': "✅ Обработано",
-                'admin_id': callback_query.from_user.id
-            })
-            save_orders(orders)      
-            await callback_query.message.edit_text(
-                f"🆔 Статус заявки #{request_id} изменен на '✅ Обработано'.\n"
-                f"👤 Имя: {order['full_name']}\n"
-                f"🏠 Адрес: {order['address']}\n"
-                f"📞 Телефон: {order['phone_number']}\n"
-                f"❓ Причина обращения: {order['reason']}\n"
-                f"📋 Статус: {order['status']}\n"
-                f"👤 Обработал администратор: {callback_query.from_user.first_name} {callback_query.from_user.last_name}"
-            )
-            await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=True))
-            
-            # Уведомление пользователя и предложение оставить отзыв
-            feedback_button = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🗂️ Оставить отзыв", callback_data=f"leave_feedback:{request_id}")]
-            ])
-            await bot.send_message(order["user_id"], "✅ Ваша заявка завершена. Пожалуйста, оставьте отзыв.", reply_markup=feedback_button)
-            break
+    order = await update_order_status(request_id, STATUS_PROCESSED, admin_id=callback_query.from_user.id)
+    if order:
+        await callback_query.message.edit_text(
+            f"🆔 Статус заявки #{request_id} изменен на '✅ Обработано'.\n"
+            f"👤 Имя: {order['full_name']}\n"
+            f"🏠 Адрес: {order['address']}\n"
+            f"📞 Телефон: {order['phone_number']}\n"
+            f"❓ Причина обращения: {order['reason']}\n"
+            f"📋 Статус: {order['status']}\n"
+            f"👤 Обработал администратор: {callback_query.from_user.first_name} {callback_query.from_user.last_name}"
+        )
+        await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=True))
+        
+        # Уведомление пользователя и предложение оставить отзыв
+        feedback_button = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="🗂️ Оставить отзыв", callback_data=f"leave_feedback:{request_id}")]
+        ])
+        await notify_user(bot, order["user_id"], "✅ Ваша заявка завершена. Пожалуйста, оставьте отзыв.", reply_markup=feedback_button)
     else:
         await callback_query.message.edit_text(f"🚫 Не удалось изменить статус заявки #{request_id}.")
     await state.clear()
 
 # Обработка кнопки "В работе"
-@router.callback_query(F.data == "status_in_progress")
+@callbacks.exact("status_in_progress")
 async def status_in_progress(callback_query: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     request_id = data.get('request_id')
-    orders = load_orders()
-    for order in orders:
-        if order['id'] == request_id:
-            order['status'] = "🔧 В работе"
-            if 'history' not in order:
-                order['history'] = []
-                order['history'].append({
-                    'timestamp': datetime.now().isoformat(),
-                   'status': "🔧 В работе",
-                    'admin_id': callback_query.from_user.id
-                })
-            save_orders(orders)
-            await callback_query.message.edit_text(
-                f"🆔 Статус заявки #{request_id} изменен на '🔧 В работе'.\n"
-                f"👤 Имя: {order['full_name']}\n"
-                f"🏠 Адрес: {order['address']}\n"
-                f"📞 Телефон: {order['phone_number']}\n"
-                f"❓ Причина обращения: {order['reason']}\n"
-                f"📋 Статус: {order['status']}\n"
-                f"👤 Обработал администратор: {callback_query.from_user.first_name} {callback_query.from_user.last_name}"
-            )
-            await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=True))
-            break
+    order = await update_order_status(request_id, STATUS_IN_PROGRESS, admin_id=callback_query.from_user.id)
+    if order:
+        await callback_query.message.edit_text(
+            f"🆔 Статус заявки #{request_id} изменен на '🔧 В работе'.\n"
+            f"👤 Имя: {order['full_name']}\n"
+            f"🏠 Адрес: {order['address']}\n"
+            f"📞 Телефон: {order['phone_number']}\n"
+            f"❓ Причина обращения: {order['reason']}\n"
+            f"📋 Статус: {order['status']}\n"
+            f"👤 Обработал администратор: {callback_query.from_user.first_name} {callback_query.from_user.last_name}"
+        )
+        await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=True))
     else:
         await callback_query.message.edit_text(f"🚫 Не удалось изменить статус заявки #{request_id}.")
     await state.clear()
 
 # Обработка нажатия на кнопку "Список новых заявок"
-@router.callback_query(F.data == "list_new_orders")
+@callbacks.exact("list_new_orders")
 async def list_new_orders(callback_query: CallbackQuery):
-    try:
-        with open("orders.json", "r", encoding="utf-8") as file:
-            orders = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        orders = []
+    text, keyboard = await render_orders_page("new")
+    await callback_query.message.answer(text, reply_markup=keyboard)
+    await callback_query.answer()
 
-    if not orders:
-        await callback_query.message.answer("📭 Нет новых заявок.")
+# Листание и фильтр списка заявок: orders:<фильтр>[:<a|b>:<id>]
+@callbacks.prefix("orders:")
+async def orders_page(callback_query: CallbackQuery):
+    if callback_query.from_user.id not in ADMIN_IDS:
+        await callback_query.answer("🚫 У вас нет прав для выполнения этого действия.", show_alert=True)
         return
 
-    response_text = "📋 Список новых заявок:\n\n"
-    for order in orders:
-        response_text += (
-            f"🆔 ID заявки: {order['id']}\n"
-            f"👤 ФИО: {order['full_name']}\n"
-            f"🏠 Адрес: {order['address']}\n"
-            f"📞 Телефон: {order['phone_number']}\n"
-            f"❓ Причина: {order['reason']}\n\n"
-        )
+    parts = callback_query.data.split(":")
+    status_filter = parts[1] if parts[1] in ORDER_FILTERS else "all"
+    before_id = after_id = None
+    if len(parts) == 4:
+        if parts[2] == "a":
+            after_id = int(parts[3])
+        else:
+            before_id = int(parts[3])
 
-    await callback_query.message.answer(response_text)
+    text, keyboard = await render_orders_page(status_filter, before_id=before_id, after_id=after_id)
+    try:
+        await callback_query.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest:
+        # Страница не изменилась (повторное нажатие)
+        pass
     await callback_query.answer()
 
+# Обработка кнопки "Мои заявки"
+@callbacks.exact("my_orders")
+async def my_orders(callback_query: CallbackQuery, state: FSMContext):
+    await state.clear()
+    orders = await order_store.list_by_user(callback_query.from_user.id)
+    if not orders:
+        await callback_query.message.edit_text("📭 У вас пока нет заявок.", reply_markup=main_menu_keyboard())
+        return
+    recent = orders[-MY_ORDERS_LIMIT:][::-1]
+    await callback_query.message.edit_text(
+        f"📦 Ваши заявки ({len(orders)}). Выберите заявку, чтобы посмотреть подробности:",
+        reply_markup=my_orders_keyboard(recent),
+    )
+
+# Обработка нажатия на заявку в разделе "Мои заявки"
+@callbacks.prefix("my_order:")
+async def my_order_details(callback_query: CallbackQuery):
+    request_id = int(callback_query.data.split(":")[1])
+    order = await order_store.get(request_id)
+    if order is None or order.get('user_id') != callback_query.from_user.id:
+        await callback_query.answer("🚫 Заявка не найдена.", show_alert=True)
+        return
+    await callback_query.message.edit_text(
+        f"🆔 Заявка #{request_id}\n"
+        f"👤 Имя: {order.get('full_name', 'N/A')}\n"
+        f"🏠 Адрес: {order.get('address', 'N/A')}\n"
+        f"💼 Услуга: {order.get('service', 'N/A')}\n"
+        f"📞 Телефон: {order.get('phone_number', 'N/A')}\n"
+        f"❓ Причина обращения: {order.get('reason', 'N/A')}\n"
+        f"📋 Статус: {order.get('status', 'N/A')}\n"
+        f"📅 Дата создания: {order.get('created_at', 'N/A')}",
+        reply_markup=my_order_keyboard(),
+    )
+
 # Обработка кнопки "Статус заявки"
-@router.callback_query(F.data == "status_request")
+@callbacks.exact("status_request")
 async def status_request(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🔍 Введите номер Вашей ID Заявки для просмотра статуса:")
     await state.set_state(StatusRequestForm.request_id)
@@ -499,32 +686,29 @@ async def status_request(callback_query: CallbackQuery, state: FSMContext):
 @router.message(StateFilter(StatusRequestForm.request_id))
 async def process_status_request_id(message: Message, state: FSMContext):
     request_id = int(message.text.strip())
-    orders = load_orders()
+    order = await order_store.get(request_id)
     user_id = message.from_user.id
     is_admin = user_id in ADMIN_IDS
-    for order in orders:
-        if order['id'] == request_id:
-            if is_admin or order.get('user_id') == user_id:
-                await message.answer(
-                    f"Статус заявки #{request_id}:\n"
-                    f"Имя: {order['full_name']}\n"
-                    f"Адрес: {order['address']}\n"
-                    f"Телефон: {order['phone_number']}\n"
-                    f"Причина обращения: {order['reason']}\n"
-                    f"Статус: {order['status']}"
-                )
-            else:
-                await message.answer("🚫 Отказано в доступе к этой заявке.")
-            break
-    else:
+    if order is None:
         await message.answer(f"🆔 Заявка с ID #{request_id} не найдена.")
+    elif is_admin or order.get('user_id') == user_id:
+        await message.answer(
+            f"Статус заявки #{request_id}:\n"
+            f"Имя: {order['full_name']}\n"
+            f"Адрес: {order['address']}\n"
+            f"Телефон: {order['phone_number']}\n"
+            f"Причина обращения: {order['reason']}\n"
+            f"Статус: {order['status']}"
+        )
+    else:
+        await message.answer("🚫 Отказано в доступе к этой заявке.")
     
     # Возврат в главное меню после показа статуса заявки
     await message.answer("📋 Выберите действие из меню:", reply_markup=main_menu_keyboard())
     await state.clear()
 
 # Обработка кнопки "Добавить администратора"
-@router.callback_query(F.data == "add_admin")
+@callbacks.exact("add_admin")
 async def add_admin(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🆔 Введите ID нового администратора:")
     await state.set_state(AdminState.new_admin_id)
@@ -554,12 +738,12 @@ async def process_new_admin_id(message: Message, state: FSMContext):
     await state.clear()
 
 # Обработка кнопки "Удалить администратора"
-@router.callback_query(F.data == "remove_admin")
+@callbacks.exact("remove_admin")
 async def remove_admin(callback_query: CallbackQuery):
     await callback_query.message.edit_text("💬 Выберите администратора для удаления:", reply_markup=remove_admin_keyboard(ADMIN_IDS))
 
 # Обработка подтверждения удаления администратора
-@router.callback_query(F.data.startswith("confirm_remove_admin_"))
+@callbacks.prefix("confirm_remove_admin_")
 async def confirm_remove_admin(callback_query: CallbackQuery):
     admin_id = int(callback_query.data.split("_")[-1])
     if admin_id in ADMIN_IDS: # type: ignore
@@ -574,36 +758,40 @@ async def confirm_remove_admin(callback_query: CallbackQuery):
     await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=start_button_keyboard(admin=True))
 
 # Аналитика заявок (только для администраторов)
-@router.callback_query(lambda c: c.data == "show_stats")
+@callbacks.exact("show_stats")
 async def show_stats(callback_query: CallbackQuery):
-    if callback_query.from_user.id not in admin_ids:
+    if callback_query.from_user.id not in ADMIN_IDS:
         await callback_query.answer("🚫 У вас нет прав для выполнения этого действия.", show_alert=True)
         return
 
-    orders = load_orders()
-    total_orders = len(orders)
-    processed_orders = len([order for order in orders if order['status'] == "✅ Обработано"])
-    in_progress_orders = len([order for order in orders if order['status'] == "🔧 В работе"])
-    pending_orders = len([order for order in orders if order['status'] == "🔄 Ожидает обработки"])
-    
-    avg_processing_time = sum(
-        [
-            (datetime.fromisoformat(order['history'][-1]['timestamp']) - datetime.fromisoformat(order['history'][0]['timestamp'])).total_seconds()
-            for order in orders
-            if order['status'] == "✅ Обработано" and 'history' in order and len(order['history']) > 1
-        ]
-    ) / processed_orders if processed_orders > 0 else 0
-    
-    stats_text = f"Всего заявок: {total_orders}\n"
-    stats_text += f"✅ Обработано: {processed_orders}\n"
-    stats_text += f"🔧 В работе: {in_progress_orders}\n"
-    stats_text += f"🔄 Ожидает обработки: {pending_orders}\n"
-    stats_text += f"📈 Среднее время обработки: {avg_processing_time / 60:.2f} минут\n"
+    stats = order_stats.snapshot()
+    counts = stats["by_status"]
     
+    stats_text = f"Всего заявок: {stats['total']}\n"
+    stats_text += f"✅ Обработано: {counts.get(STATUS_PROCESSED, 0)}\n"
+    stats_text += f"🔧 В работе: {counts.get(STATUS_IN_PROGRESS, 0)}\n"
+    stats_text += f"🔄 Ожидает обработки: {counts.get(STATUS_PENDING, 0)}\n"
+    stats_text += f"🚫 Отменено: {stats['cancelled']}\n"
+    stats_text += f"📈 Среднее время обработки: {stats['avg_processing'] / 60:.2f} минут\n"
+    stats_text += (
+        f"⏱ Время обработки p50 / p90 / p99: {stats['p50'] / 60:.1f} / "
+        f"{stats['p90'] / 60:.1f} / {stats['p99'] / 60:.1f} минут\n"
+    )
+
+    # За неделю — из журнала событий: читаются только сегменты последних 7 дней
+    now = datetime.now()
+    closed = await event_log.closed_between(now - timedelta(days=7), now)
+    stats_text += f"\n📅 Закрыто за 7 дней: {len(closed)}\n"
+    workload = event_log.projections.workload
+    if workload:
+        stats_text += "👥 Нагрузка администраторов (в работе / закрыто всего):\n"
+        for admin_id, load in sorted(workload.items(), key=lambda item: -item[1]["in_progress"]):
+            stats_text += f"  {admin_id}: {load['in_progress']} / {load['processed']}\n"
+
     await callback_query.message.answer(stats_text)
 
 # Обработка кнопки "FAQ"
-@router.callback_query(F.data == "show_faq")
+@callbacks.exact("show_faq")
 async def show_faq(callback_query: CallbackQuery):
     faq_text = "❓ Часто задаваемые вопросы:\n\n"
     faq_text += "1. 📜 Как оформить заявку?\n"
@@ -624,7 +812,7 @@ async def show_faq(callback_query: CallbackQuery):
     await callback_query.message.answer("📋 Выберите действие из меню:", reply_markup=main_menu_keyboard())
 
 # Обработка кнопки "Отменить заявку"
-@router.callback_query(F.data == "cancel_request")
+@callbacks.exact("cancel_request")
 async def cancel_request(callback_query: CallbackQuery, state: FSMContext):
     await callback_query.message.edit_text("🆔 Введите номер Вашей ID Заявки для отмены:")
     await state.set_state(CancelOrderForm.request_id)
@@ -632,12 +820,12 @@ async def cancel_request(callback_query: CallbackQuery, state: FSMContext):
 @router.message(StateFilter(CancelOrderForm.request_id))
 async def process_cancel_request_id(message: Message, state: FSMContext):
     request_id = int(message.text.strip())
-    if not get_order_data_by_id(request_id):
+    if not await get_order_data_by_id(request_id):
         await message.answer("🚫 Неверный ID заявки. Пожалуйста, введите корректный номер ID.")
         await state.clear()
         return
     
-    cancel_order(request_id)
+    await cancel_order(request_id)
     await message.answer("✅ Ваша заявка успешно отменена.")
     await notify_admins(bot, f"👤 Заявка с ID {request_id} была отменена пользователем.")
     
@@ -646,7 +834,7 @@ async def process_cancel_request_id(message: Message, state: FSMContext):
     await state.clear()
 
 # Обработка кнопки "Оставить отзыв"
-@router.callback_query(F.data.startswith("leave_feedback:"))
+@callbacks.prefix("leave_feedback:")
 async def leave_feedback(callback_query: CallbackQuery, state: FSMContext):
     request_id = int(callback_query.data.split(":")[1])
     await state.update_data(request_id=request_id)
@@ -660,7 +848,7 @@ async def process_feedback(message: Message, state: FSMContext):
     feedback = sanitize_input(message.text)
 
     # Сохранение отзыва в JSON-файл
-    save_feedback_to_json(request_id, feedback)
+    await save_feedback_to_json(request_id, feedback)
     await message.answer("📎 Спасибо за Ваш отзыв!")
     await notify_admins(bot, f"👤 Пользователь оставил отзыв на заявку с ID {request_id}: {feedback}")
     
@@ -684,7 +872,7 @@ async def process_phone_number(message: Message, state: FSMContext):
 # async def show_price(callback_query: CallbackQuery):
 #     # Конвертация готового PDF в изображение
 #     pdf_path = "price_table.pdf"  # Путь к готовому PDF-файлу
-#     image_paths = convert_pdf_to_images(pdf_path, "price_table_image")
+#     image_paths = await convert_pdf_to_images(pdf_path, "price_table_image")
     
 #     # Отправка изображения
 #     for image_path in image_paths:
@@ -697,53 +885,95 @@ async def process_phone_number(message: Message, state: FSMContext):
 #     await process_pdf(message)
 
 # Обработка кнопки "Стоимость услуг"
-@router.callback_query(F.data == "show_price")
+@callbacks.exact("show_price")
 async def show_price(callback_query: CallbackQuery):
-    # Абсолютный путь к PDF-файлу
-    pdf_path = r'C:\Users\User\Desktop\WorkStation\OutsorcingBot\price_table.pdf'
-    
-    # Абсолютный путь к выходной папке для изображений
-    output_folder = r'C:\Users\User\Desktop\WorkStation\OutsorcingBot\images'
-    
-    # Убедитесь, что выходная папка существует
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Путь к Poppler
-    poppler_path = r'C:\poppler-24.08.0\Library\bin'
-    
-    # Преобразуем PDF в изображения
-    images = convert_from_path(pdf_path, poppler_path=poppler_path)
-    
-    image_paths = []
-    for i, image in enumerate(images):
-        image_path = os.path.join(output_folder, f'page_{i + 1}.png')
-        image.save(image_path, 'PNG')
-        image_paths.append(image_path)
-    
-    # Отправляем каждое изображение пользователю
-    for image_path in image_paths:
-        if os.path.exists(image_path):
-            photo = FSInputFile(image_path)
-            await callback_query.message.answer_photo(photo)
-        else:
-            await callback_query.message.answer("Ошибка: изображение не найдено.")
+    try:
+        await price_table.send(callback_query.message)
+    except (OSError, KeyError) as e:
+        # PDF недоступен — отправляем тот же прайс-лист текстом
+        logging.error(f"Не удалось отправить прайс-лист картинками: {e}")
+        await price_catalog.send(callback_query.message)
+
+async def run_webhook():
+    if not WEBHOOK_BASE_URL:
+        raise ValueError("Для режима webhook задайте WEBHOOK_BASE_URL.")
+    from webhook import WebhookServer
+
+    server = WebhookServer(
+        dp, bot,
+        path=WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET or None,
+        max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+    )
+    await server.start(WEBHOOK_HOST, WEBHOOK_PORT)
+    try:
+        await bot.set_webhook(
+            WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
 
-async def main():
+async def main(mode: str = BOT_MODE):
     dp.include_router(router)
+    logging.info(f"Используемый путь к файлу: {ORDERS_FILE_PATH}")
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(metrics, METRICS_HOST, METRICS_PORT)
+    outbound.start()
+    await order_store.load()
+    order_store.start()
+    await order_stats.load(order_store)
+    order_stats.start()
+    if not await event_log.load():
+        orders = await order_store.all()
+        if orders:
+            await event_log.backfill(orders)
+    event_log.start()
+    await search_index.load(order_store)
+    search_index.start()
+    try:
+        await price_table.prepare()
+    except Exception as e:
+        logging.error(f"Не удалось подготовить прайс-лист: {e}")
     try:
-        await dp.start_polling(bot)
+        await price_catalog.reload()
+    except (OSError, ValueError, KeyError) as e:
+        logging.error(f"Не удалось загрузить prices.json: {e}")
+    try:
+        if mode == "webhook":
+            await run_webhook()
+        else:
+            # Пока установлен вебхук, getUpdates не работает
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except asyncio.CancelledError:
         logging.info("✅ Бот остановлен!")
     finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         await shutdown(dp)
 
 async def shutdown(dispatcher: Dispatcher):
+    await outbound.close()
     await dispatcher.storage.close()
+    await order_store.close()
+    await order_stats.close()
+    await event_log.close()
+    await search_index.close()
+    await pdf_renderer.close()
     await bot.session.close()
 
 if __name__ == "__main__":
-    import asyncio
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OutsourcingBot")
+    parser.add_argument("--mode", choices=["polling", "webhook"], default=BOT_MODE,
+                        help="способ получения обновлений (по умолчанию BOT_MODE из окружения)")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.mode))
     except KeyboardInterrupt:
         logging.info("✅ Бот остановлен!")
\ No newline at end of file
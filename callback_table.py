@@ -0,0 +1,98 @@
+from aiogram import Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery
+
+# Ключ узла префиксного дерева, под которым лежит обработчик
+_HANDLER = ""
+
+
+class CallbackTable:
+    """Таблица обработчиков нажатий на кнопки по callback_data.
+
+    aiogram проверяет фильтры обработчиков по очереди, поэтому при десятках
+    кнопок каждое нажатие проходит по всей цепочке F.data == .... Здесь
+    точные значения лежат в словаре, а префиксы ("orders:", "my_order:") —
+    в префиксном дереве, так что поиск не зависит от числа обработчиков.
+    При совпадении нескольких префиксов выбирается самый длинный; точное
+    значение важнее префикса. Повторная регистрация того же значения или
+    префикса — ошибка, которая обнаруживается при запуске.
+    """
+
+    def __init__(self):
+        self._exact: dict[str, HandlerObject] = {}
+        self._prefixes: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._exact) + self._count_prefixes(self._prefixes)
+
+    def _count_prefixes(self, node: dict) -> int:
+        return sum(
+            1 if key == _HANDLER else self._count_prefixes(child)
+            for key, child in node.items()
+        )
+
+    # Регистрация
+
+    def exact(self, data: str):
+        """Декоратор обработчика для callback_data, равной data."""
+        def decorator(callback):
+            if data in self._exact:
+                raise ValueError(
+                    f"callback_data {data!r} уже обрабатывает {self._exact[data].callback.__name__}"
+                )
+            self._exact[data] = HandlerObject(callback=callback)
+            return callback
+        return decorator
+
+    def prefix(self, prefix: str):
+        """Декоратор обработчика для callback_data, начинающейся с prefix."""
+        if not prefix:
+            raise ValueError("Префикс callback_data не может быть пустым")
+
+        def decorator(callback):
+            node = self._prefixes
+            for char in prefix:
+                node = node.setdefault(char, {})
+            if _HANDLER in node:
+                raise ValueError(
+                    f"Префикс callback_data {prefix!r} уже обрабатывает {node[_HANDLER].callback.__name__}"
+                )
+            node[_HANDLER] = HandlerObject(callback=callback)
+            return callback
+        return decorator
+
+    # Поиск
+
+    def resolve(self, data: str | None) -> HandlerObject | None:
+        if data is None:
+            return None
+        handler = self._exact.get(data)
+        if handler is not None:
+            return handler
+        node = self._prefixes
+        for char in data:
+            node = node.get(char)
+            if node is None:
+                break
+            handler = node.get(_HANDLER, handler)
+        return handler
+
+    # Подключение к роутеру
+
+    def attach(self, router: Router):
+        """Регистрирует таблицу в роутере одним обработчиком callback_query.
+
+        Найденный обработчик подставляется в data["handler"], поэтому
+        мидлвари видят настоящий обработчик, а не диспетчер таблицы.
+        """
+        router.callback_query.register(self._dispatch, self._filter)
+
+    async def _filter(self, callback_query: CallbackQuery):
+        handler = self.resolve(callback_query.data)
+        if handler is None:
+            return False
+        return {"handler": handler}
+
+    @staticmethod
+    async def _dispatch(callback_query: CallbackQuery, handler: HandlerObject, **data):
+        return await handler.call(callback_query, handler=handler, **data)
@@ -0,0 +1,102 @@
+import os
+
+from dotenv import load_dotenv
+
+# Загрузка переменных окружения
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Токен бота и ID администраторов через запятую. Список ADMIN_IDS общий для
+# всего бота: добавление и удаление администраторов меняют его на месте
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+ADMIN_IDS = [int(admin_id) for admin_id in os.getenv("ADMIN_ID", "").strip("'").split(",") if admin_id.strip()]
+
+# Хранилище заявок: "json" (orders.json + журнал изменений) или "sqlite"
+ORDER_STORAGE = os.getenv("ORDER_STORAGE", "json").lower()
+
+# Указываем абсолютный путь к файлу orders.json
+ORDERS_FILE_PATH = os.getenv("ORDERS_FILE_PATH", os.path.join(BASE_DIR, 'orders.json'))
+
+# База SQLite (используется при ORDER_STORAGE=sqlite)
+ORDERS_DB_PATH = os.getenv("ORDERS_DB_PATH", os.path.join(BASE_DIR, 'orders.db'))
+
+# Архив завершённых заявок (только для ORDER_STORAGE=json): каталог сегментов,
+# через сколько дней после обработки заявка без отзыва уходит в архив, как часто
+# запускать перенос (0 — не запускать), сколько сегментов держать в памяти
+# и сколько заявок максимум в одном сегменте
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, 'archive'))
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+ARCHIVE_CACHE_SEGMENTS = int(os.getenv("ARCHIVE_CACHE_SEGMENTS", "4"))
+ARCHIVE_SEGMENT_SIZE = int(os.getenv("ARCHIVE_SEGMENT_SIZE", "2000"))
+
+# Журнал событий заявок, по сегменту на день
+EVENTS_DIR = os.getenv("EVENTS_DIR", os.path.join(BASE_DIR, 'events'))
+
+# Статистика заявок (счётчики и гистограмма времени обработки)
+STATS_FILE_PATH = os.getenv("STATS_FILE_PATH", os.path.join(BASE_DIR, 'stats.json'))
+
+# Поисковый индекс заявок для команды /search
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(BASE_DIR, 'search_index.json'))
+
+# Групповая запись журнала заявок: окно в секундах и максимальный размер пачки
+ORDERS_FLUSH_INTERVAL = float(os.getenv("ORDERS_FLUSH_INTERVAL", "0.02"))
+ORDERS_FLUSH_BATCH_SIZE = int(os.getenv("ORDERS_FLUSH_BATCH_SIZE", "100"))
+
+# Прайс-лист текстом (перечитывается при изменении файла)
+PRICES_PATH = os.getenv("PRICES_PATH", os.path.join(BASE_DIR, 'prices.json'))
+
+# Прайс-лист: PDF и кеш file_id Telegram
+PRICE_PDF_PATH = os.getenv("PRICE_PDF_PATH", os.path.join(BASE_DIR, 'price_table.pdf'))
+PRICE_CACHE_PATH = os.getenv("PRICE_CACHE_PATH", os.path.join(BASE_DIR, 'price_cache.json'))
+
+# Путь к Poppler (нужен pdf2image). По умолчанию — из PATH, а на Windows —
+# копия из папки "Доп установки для ПДФ", если она есть
+_BUNDLED_POPPLER = os.path.join(BASE_DIR, 'Доп установки для ПДФ', 'poppler-24.08.0', 'Library', 'bin')
+POPPLER_PATH = os.getenv("POPPLER_PATH") or (
+    _BUNDLED_POPPLER if os.name == "nt" and os.path.isdir(_BUNDLED_POPPLER) else None
+)
+
+# Растеризация PDF: движок ("fitz" — PyMuPDF или "poppler"), пул процессов и кеш страниц
+PDF_RENDER_ENGINE = os.getenv("PDF_RENDER_ENGINE", "fitz").lower()
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_QUEUE = int(os.getenv("PDF_RENDER_QUEUE", "8"))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(BASE_DIR, 'pdf_cache'))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Количество заявок на одной странице списка для администраторов
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "5"))
+
+# Хранилище состояний FSM: "sqlite" (переживает перезапуск) или "memory"
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite").lower()
+FSM_DB_PATH = os.getenv("FSM_DB_PATH", os.path.join(BASE_DIR, 'fsm.db'))
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+# Через сколько секунд бездействия диалог считается брошенным
+FSM_TTL = float(os.getenv("FSM_TTL", str(24 * 60 * 60)))
+
+# Режим получения обновлений: "polling" или "webhook" (можно переопределить ключом --mode)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+# Публичный адрес, на который Telegram будет слать обновления, например https://bot.example.com
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "64"))
+
+# Адрес Bot API (для локального сервера Bot API или тестового фейкового сервера)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Сколько последних заявок показывать в разделе "Мои заявки"
+MY_ORDERS_LIMIT = int(os.getenv("MY_ORDERS_LIMIT", "20"))
+
+# HTTP-адрес метрик в формате Prometheus (/metrics); порт 0 отключает сервер
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# Очередь исходящих сообщений: общий лимит запросов в секунду, число
+# воркеров и вместимость очереди каждого класса приоритета
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "30"))
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "4"))
+OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", "1000"))
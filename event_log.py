@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from statuses import STATUS_IN_PROGRESS, STATUS_PENDING, STATUS_PROCESSED, normalize_status
+
+# Типы событий (короткие коды, чтобы записи журнала были компактными)
+EVENT_CREATED = "c"
+EVENT_STATUS = "s"
+EVENT_EDIT = "e"
+EVENT_CANCEL = "x"
+EVENT_FEEDBACK = "f"
+
+
+def _timestamp(value) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _segment_date(t: int) -> date:
+    return datetime.fromtimestamp(t).date()
+
+
+class _OrderState:
+    __slots__ = ("status", "created", "updated", "admin", "closed_by")
+
+    def __init__(self, created: int):
+        self.status = STATUS_PENDING
+        self.created = created
+        self.updated = created
+        self.admin = None
+        # Администратор, которому засчитано закрытие заявки
+        self.closed_by = None
+
+
+class Projections:
+    """Состояние, выведенное из событий: текущий статус заявок и нагрузка администраторов.
+
+    Обновляется по каждому событию, так что вопросы «что сейчас в работе у
+    администратора» не требуют просмотра журнала.
+    """
+
+    def __init__(self):
+        self.orders: dict[int, _OrderState] = {}
+        # ID администратора -> {"in_progress": заявок в работе сейчас, "processed": закрыто всего,
+        # каждая заявка считается один раз}
+        self.workload: dict[int, dict[str, int]] = {}
+
+    def _admin(self, admin_id) -> dict[str, int]:
+        return self.workload.setdefault(admin_id, {"in_progress": 0, "processed": 0})
+
+    def _release(self, state: _OrderState):
+        if state.status == STATUS_IN_PROGRESS and state.admin is not None:
+            self._admin(state.admin)["in_progress"] -= 1
+
+    def apply(self, event: dict):
+        order_id, t, kind = event["o"], event["t"], event["e"]
+        if kind == EVENT_CREATED:
+            self.orders[order_id] = _OrderState(t)
+            return
+        state = self.orders.get(order_id)
+        if state is None:
+            return
+        state.updated = t
+        if kind == EVENT_STATUS:
+            self._release(state)
+            state.status, state.admin = event["v"], event.get("a")
+            if state.status == STATUS_IN_PROGRESS and state.admin is not None:
+                self._admin(state.admin)["in_progress"] += 1
+            elif state.status == STATUS_PROCESSED:
+                # Повторно закрытая заявка засчитывается один раз — по последнему закрытию
+                if state.closed_by is not None:
+                    self._admin(state.closed_by)["processed"] -= 1
+                state.closed_by = state.admin
+                if state.admin is not None:
+                    self._admin(state.admin)["processed"] += 1
+        elif kind == EVENT_CANCEL:
+            self._release(state)
+            del self.orders[order_id]
+
+    def processing_seconds(self, order_id: int, closed_at: int) -> int | None:
+        state = self.orders.get(order_id)
+        return closed_at - state.created if state is not None else None
+
+
+class EventLog:
+    """Журнал событий заявок (только дозапись), разбитый на сегменты по дням.
+
+    Каждое событие — одна короткая JSON-строка {"t": время, "o": ID заявки,
+    "e": тип, "a": кто, "v": значение} в файле events/ГГГГ-ММ-ДД.jsonl.
+    Выборка за период читает только сегменты нужных дней, поэтому вопрос
+    «что закрыто за неделю» не зависит от общего числа заявок. Из событий
+    строятся проекции: текущий статус заявок и нагрузка администраторов.
+
+    События попадают в память сразу, а на диск сбрасываются пачкой раз в
+    flush_interval секунд одной записью на сегмент.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.projections = Projections()
+        self._pending: list[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    def _segment_path(self, day: date) -> str:
+        return os.path.join(self.directory, f"{day.isoformat()}.jsonl")
+
+    def _segments(self) -> list[date]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        days = []
+        for name in names:
+            if name.endswith(".jsonl"):
+                try:
+                    days.append(date.fromisoformat(name[:-len(".jsonl")]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def _read_segment(self, day: date) -> list[dict]:
+        events = []
+        with open(self._segment_path(day), "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning(f"Пропущена повреждённая запись журнала событий ({day}).")
+        return events
+
+    # Загрузка и запись
+
+    async def load(self):
+        """Строит проекции, проигрывая журнал с начала."""
+        def replay():
+            projections, count = Projections(), 0
+            for day in self._segments():
+                for event in self._read_segment(day):
+                    projections.apply(event)
+                    count += 1
+            return projections, count
+
+        self.projections, count = await asyncio.to_thread(replay)
+        logging.info(f"Журнал событий загружен: {count} событий, заявок в проекции: {len(self.projections.orders)}")
+        return count
+
+    def _write(self, events: list[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        by_day: dict[date, list[str]] = {}
+        for event in events:
+            by_day.setdefault(_segment_date(event["t"]), []).append(
+                json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+            )
+        for day, lines in by_day.items():
+            with open(self._segment_path(day), "a", encoding="utf-8") as file:
+                file.write("".join(lines))
+                file.flush()
+                os.fsync(file.fileno())
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            events, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, events)
+            except OSError:
+                self._pending = events + self._pending
+                raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                logging.error(f"Ошибка записи журнала событий: {e}")
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def append(self, kind: str, order_id: int, actor: int | None = None, value=None, at=None) -> dict:
+        """Записывает событие и сразу применяет его к проекциям."""
+        event = {"t": _timestamp(at) if at is not None else int(time.time()), "o": order_id, "e": kind}
+        if actor is not None:
+            event["a"] = actor
+        if value is not None:
+            event["v"] = value
+        self.projections.apply(event)
+        self._pending.append(event)
+        return event
+
+    async def backfill(self, orders: list[dict]):
+        """Один раз заполняет пустой журнал по созданию и истории существующих заявок."""
+        events = []
+        for order in orders:
+            created_at = order.get("created_at") or next(
+                (entry.get("timestamp") for entry in order.get("history", [])), None
+            )
+            if not created_at:
+                continue
+            events.append({"t": _timestamp(created_at), "o": order["id"], "e": EVENT_CREATED})
+            for entry in order.get("history", []):
+                event = {"t": _timestamp(entry["timestamp"]), "o": order["id"], "e": EVENT_STATUS,
+                         "v": normalize_status(entry.get("status"))}
+                if entry.get("admin_id") is not None:
+                    event["a"] = entry["admin_id"]
+                events.append(event)
+        events.sort(key=lambda event: event["t"])
+        for event in events:
+            self.projections.apply(event)
+        await asyncio.to_thread(self._write, events)
+        logging.info(f"Журнал событий заполнен по существующим заявкам: {len(events)} событий")
+
+    # Выборки
+
+    async def scan(self, start: datetime, end: datetime, kinds: set[str] | None = None) -> list[dict]:
+        """События с временем в [start, end), читаются только сегменты этих дней."""
+        t_start, t_end = _timestamp(start.timestamp()), _timestamp(end.timestamp())
+        first, last = start.date(), (end - timedelta(microseconds=1)).date()
+
+        def read():
+            events = []
+            for day in self._segments():
+                if first <= day <= last:
+                    events.extend(self._read_segment(day))
+            return events
+
+        # Пока идёт чтение, сброс не переносит события из _pending на диск:
+        # иначе событие попало бы в выборку дважды или не попало вовсе
+        async with self._flush_lock:
+            events = await asyncio.to_thread(read) + list(self._pending)
+        return [
+            event for event in events
+            if t_start <= event["t"] < t_end and (kinds is None or event["e"] in kinds)
+        ]
+
+    async def closed_between(self, start: datetime, end: datetime) -> list[dict]:
+        """Заявки, переведённые в «Обработано» за период, со временем обработки."""
+        closed = []
+        for event in await self.scan(start, end, {EVENT_STATUS}):
+            if event.get("v") == STATUS_PROCESSED:
+                closed.append({
+                    "id": event["o"],
+                    "closed_at": event["t"],
+                    "admin_id": event.get("a"),
+                    "seconds": self.projections.processing_seconds(event["o"], event["t"]),
+                })
+        return closed
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import aiosqlite
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fsm_updated_at ON fsm (updated_at);
+"""
+
+
+class _Record:
+    __slots__ = ("state", "data", "updated_at", "dirty")
+
+    def __init__(self, state=None, data=None, updated_at=0.0, dirty=False):
+        self.state = state
+        self.data = data if data is not None else {}
+        self.updated_at = updated_at
+        self.dirty = dirty
+
+
+class SqliteFSMStorage(BaseStorage):
+    """Хранилище FSM в SQLite с горячим LRU-кешем в памяти.
+
+    Состояния и данные диалогов переживают перезапуск бота. Последние
+    cache_size диалогов держатся в памяти, так что get_state/get_data обычно
+    не обращаются к базе. Изменения копятся в памяти и раз в flush_interval
+    секунд записываются в базу одной транзакцией. Диалоги, в которых ничего
+    не происходило дольше ttl секунд, считаются брошенными и удаляются.
+    """
+
+    def __init__(self, path: str, cache_size: int = 10000, ttl: float = 24 * 60 * 60,
+                 flush_interval: float = 1.0, cleanup_interval: float = 10 * 60):
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cleanup_interval = cleanup_interval
+        self._cache: OrderedDict[str, _Record] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._db: aiosqlite.Connection | None = None
+        self._open_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return (f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:"
+                f"{key.business_connection_id or ''}:{key.destiny}")
+
+    # База
+
+    async def _ensure_open(self):
+        if self._db is not None:
+            return
+        async with self._open_lock:
+            if self._db is not None:
+                return
+            db = await aiosqlite.connect(self.path)
+            await db.execute("PRAGMA journal_mode=WAL")
+            await db.execute("PRAGMA synchronous=NORMAL")
+            await db.executescript(SCHEMA)
+            await db.commit()
+            self._db = db
+            self._tasks = [
+                asyncio.create_task(self._periodic(self.flush, self.flush_interval)),
+                asyncio.create_task(self._periodic(self.expire, self.cleanup_interval)),
+            ]
+
+    async def _periodic(self, action, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await action()
+            except Exception as e:
+                logging.error(f"Ошибка обслуживания хранилища FSM: {e}")
+
+    async def flush(self):
+        """Записывает накопленные изменения в базу."""
+        if not self._dirty or self._db is None:
+            return
+        upserts, deletes, written = [], [], []
+        for skey in list(self._dirty):
+            record = self._cache.get(skey)
+            if record is None:
+                self._dirty.discard(skey)
+                continue
+            if record.state is None and not record.data:
+                deletes.append((skey,))
+            else:
+                try:
+                    data = json.dumps(record.data, ensure_ascii=False)
+                except (TypeError, ValueError) as e:
+                    # Такую запись не сохранить никогда: она остаётся только в памяти,
+                    # чтобы не срывать запись остальных и вытеснение из кеша
+                    logging.error(f"Данные диалога FSM {skey} не сериализуются, в базу не записаны: {e}")
+                    record.dirty = False
+                    self._dirty.discard(skey)
+                    continue
+                upserts.append((skey, record.state, data, record.updated_at))
+            written.append((skey, record, record.updated_at))
+        try:
+            if upserts:
+                await self._db.executemany(
+                    "INSERT OR REPLACE INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?)", upserts
+                )
+            if deletes:
+                await self._db.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            raise
+        # Записи, изменённые во время записи в базу, остаются несохранёнными до следующего раза
+        for skey, record, updated_at in written:
+            if record.updated_at == updated_at:
+                record.dirty = False
+                self._dirty.discard(skey)
+        self._evict()
+
+    async def expire(self):
+        """Удаляет диалоги, неактивные дольше ttl."""
+        deadline = time.time() - self.ttl
+        for skey in [skey for skey, record in self._cache.items() if record.updated_at < deadline]:
+            del self._cache[skey]
+            self._dirty.discard(skey)
+        if self._db is not None:
+            cursor = await self._db.execute("DELETE FROM fsm WHERE updated_at < ?", (deadline,))
+            await self._db.commit()
+            if cursor.rowcount:
+                logging.info(f"Удалено брошенных диалогов FSM: {cursor.rowcount}")
+
+    # Кеш
+
+    def _evict(self):
+        # Несохранённые записи не вытесняются, пока не попадут в базу
+        while len(self._cache) > self.cache_size:
+            for skey, record in self._cache.items():
+                if not record.dirty:
+                    del self._cache[skey]
+                    break
+            else:
+                return
+
+    async def _get_record(self, key: StorageKey) -> _Record:
+        skey = self._key(key)
+        record = self._cache.get(skey)
+        if record is None:
+            await self._ensure_open()
+            async with self._db.execute("SELECT state, data, updated_at FROM fsm WHERE key = ?", (skey,)) as cursor:
+                row = await cursor.fetchone()
+            # Пока шёл запрос, запись могла появиться в кеше
+            record = self._cache.get(skey)
+            if record is None:
+                record = _Record(row[0], json.loads(row[1]), row[2]) if row else _Record()
+                # Вытеснение до вставки: иначе при кеше из одних несохранённых
+                # записей вытеснялась бы сама новая запись
+                self._evict()
+                self._cache[skey] = record
+        else:
+            self._cache.move_to_end(skey)
+        if record.updated_at and record.updated_at < time.time() - self.ttl:
+            record.state, record.data = None, {}
+            self._touch(skey, record)
+        return record
+
+    def _touch(self, skey: str, record: _Record):
+        record.updated_at = time.time()
+        record.dirty = True
+        self._dirty.add(skey)
+
+    # Интерфейс BaseStorage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._touch(self._key(key), record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get_record(key)
+        record.data = dict(data)
+        self._touch(self._key(key), record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict((await self._get_record(key)).data)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._db is not None:
+            try:
+                await self.flush()
+            finally:
+                await self._db.close()
+                self._db = None
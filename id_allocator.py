@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import os
+
+
+class IdAllocator:
+    """Монотонный генератор ID заявок с сохранённой верхней границей.
+
+    На диске хранится наибольший зарезервированный ID. Номера выдаются
+    из памяти блоками по block_size: граница записывается (с fsync) один раз
+    на блок, а не на каждую заявку. После перезапуска выдача продолжается
+    с границы, так что неиспользованный остаток блока пропускается, но ни
+    один номер не выдаётся повторно — ни после отмены заявки, ни после
+    аварийного завершения.
+    """
+
+    def __init__(self, path: str, block_size: int = 100):
+        self.path = path
+        self.block_size = block_size
+        self._next = 1
+        self._reserved = 0
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> int:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return int(file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write(self, reserved: int):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(str(reserved))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    @property
+    def reserved(self) -> int:
+        """Наибольший зарезервированный ID: номера до него включительно заняты или пропущены."""
+        return self._reserved
+
+    async def load(self, floor: int = 0):
+        """Читает границу с диска. floor — наибольший уже занятый ID (например,
+        из существующих заявок), чтобы не выдать его при первом запуске."""
+        reserved = await asyncio.to_thread(self._read)
+        if floor > reserved:
+            logging.info(f"Граница ID заявок поднята до {floor} по существующим заявкам.")
+            reserved = floor
+        self._reserved = reserved
+        self._next = reserved + 1
+
+    async def allocate(self) -> int:
+        """Возвращает следующий ID. Запись на диск — только при начале нового блока."""
+        while self._next > self._reserved:
+            async with self._lock:
+                if self._next > self._reserved:
+                    reserved = self._next + self.block_size - 1
+                    await asyncio.to_thread(self._write, reserved)
+                    self._reserved = reserved
+        order_id = self._next
+        self._next += 1
+        return order_id
@@ -1,5 +1,12 @@
+from functools import lru_cache
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+# Клавиатуры — неизменяемые модели pydantic, поэтому постоянные клавиатуры
+# собираются один раз на каждый вариант и дальше отдаются из кеша, а не
+# валидируются заново на каждом обновлении.
+
+@lru_cache(maxsize=None)
 def start_button_keyboard(admin=False):
     buttons = [
         [InlineKeyboardButton(text="🚀 Старт", callback_data="start_work")]
@@ -16,10 +23,12 @@ def start_button_keyboard(admin=False):
         ])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
 def main_menu_keyboard(admin=False):
     buttons = [ 
         [InlineKeyboardButton(text="📋 Услуги", callback_data="services")],
         [InlineKeyboardButton(text="📝 Оформить заявку", callback_data="apply_request")],
+        [InlineKeyboardButton(text="📦 Мои заявки", callback_data="my_orders")],
         [InlineKeyboardButton(text="📦 Статус заявки", callback_data="status_request")],
         [InlineKeyboardButton(text="✏️ Редактировать заявку", callback_data="edit_request")],
         [InlineKeyboardButton(text="❓ FAQ", callback_data="show_faq")]
@@ -27,6 +36,7 @@ def main_menu_keyboard(admin=False):
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
 def services_keyboard():
     button1 = InlineKeyboardButton(text="🔧 Компьютерная помощь", callback_data="service_1")
     button2 = InlineKeyboardButton(text="🛠️ Предложения по монтажным работам", callback_data="service_2")
@@ -44,6 +54,7 @@ def services_keyboard():
 
     return keyboard
 
+@lru_cache(maxsize=None)
 def services_keyboard_1():
      buttons = [
         [InlineKeyboardButton(text="🔧 Компьютерная помощь", callback_data="computer_help")],
@@ -51,6 +62,7 @@ def services_keyboard_1():
         ]
      return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
 def edit_request_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✒️ Редактировать имя", callback_data="edit_full_name")],
@@ -60,6 +72,7 @@ def edit_request_keyboard():
         [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")]
     ])
 
+@lru_cache(maxsize=None)
 def admin_panel_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✅ Обработано", callback_data="status_processed")],
@@ -68,8 +81,60 @@ def admin_panel_keyboard():
     ])
 
 def remove_admin_keyboard(admin_ids):
+    # Ключ кеша — текущий состав администраторов: клавиатура пересобирается,
+    # только когда список меняется
+    return _remove_admin_keyboard(tuple(admin_ids))
+
+@lru_cache(maxsize=8)
+def _remove_admin_keyboard(admin_ids):
     buttons = []
     for admin_id in admin_ids:
         buttons.append([InlineKeyboardButton(text=f"🗑️ Удалить администратора {admin_id}", callback_data=f"confirm_remove_admin_{admin_id}")])
-        buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_start")])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
\ No newline at end of file
+    buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_start")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+def orders_page_keyboard(status_filter, first_id=None, last_id=None, has_newer=False, has_older=False):
+    """Клавиатура постраничного списка заявок: листание и фильтр по статусу.
+
+    В callback_data передаётся курсор — ID крайней заявки на странице:
+    orders:<фильтр>:a:<id> — более новые, orders:<фильтр>:b:<id> — более старые.
+    """
+    buttons = []
+    navigation = []
+    if has_newer:
+        navigation.append(InlineKeyboardButton(text="◀", callback_data=f"orders:{status_filter}:a:{first_id}"))
+    if has_older:
+        navigation.append(InlineKeyboardButton(text="▶", callback_data=f"orders:{status_filter}:b:{last_id}"))
+    if navigation:
+        buttons.append(navigation)
+    buttons.extend(_orders_filter_rows(status_filter))
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@lru_cache(maxsize=None)
+def _orders_filter_rows(status_filter):
+    """Постоянная часть клавиатуры списка заявок: фильтры и кнопка «Назад»."""
+    return (
+        [
+            InlineKeyboardButton(text=("• " if status_filter == code else "") + title, callback_data=f"orders:{code}")
+            for code, title in (("all", "Все"), ("new", "Новые"), ("work", "В работе"), ("done", "Обработано"))
+        ],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_start")],
+    )
+
+
+def my_orders_keyboard(orders):
+    """Заявки пользователя кнопками, от новых к старым."""
+    buttons = [
+        [InlineKeyboardButton(text=f"🆔 #{order['id']} · {order.get('status', 'N/A')}", callback_data=f"my_order:{order['id']}")]
+        for order in orders
+    ]
+    buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@lru_cache(maxsize=None)
+def my_order_keyboard():
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ К моим заявкам", callback_data="my_orders")]
+    ])
@@ -0,0 +1,218 @@
+import functools
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import CallbackQuery, TelegramObject
+
+# Границы корзин гистограмм задержки в секундах (как в клиентах Prometheus)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts[:-1]):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i]
+        return float("inf")
+
+
+class Metrics:
+    """Счётчики, датчики и гистограммы задержек в памяти процесса.
+
+    Метрики с метками хранятся как словари «кортеж меток → значение» и
+    отдаются в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._counters: dict[str, dict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: dict[str, dict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: dict[str, dict[tuple, Histogram]] = defaultdict(lambda: defaultdict(Histogram))
+        self._help: dict[str, str] = {}
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        self._counters[name][tuple(labels.items())] += amount
+
+    def gauge_add(self, name: str, amount: float, **labels):
+        self._gauges[name][tuple(labels.items())] += amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        self._histograms[name][tuple(labels.items())].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Замеряет время блока; при исключении увеличивает счётчик <name>_errors_total."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{name}_errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def instrument(self, obj, name: str, methods: list[str]):
+        """Подменяет асинхронные методы объекта обёртками, замеряющими время вызовов."""
+        for method_name in methods:
+            method = getattr(obj, method_name)
+
+            @functools.wraps(method)
+            async def wrapper(*args, _method=method, _label=method_name, **kwargs):
+                with self.timer(name, operation=_label):
+                    return await _method(*args, **kwargs)
+
+            setattr(obj, method_name, wrapper)
+
+    # Выдача
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            lines.extend(f"{name}{_format_labels(labels)} {value:g}" for labels, value in series.items())
+        for name, series in sorted(self._gauges.items()):
+            header(name, "gauge")
+            lines.extend(f"{name}{_format_labels(labels)} {value:g}" for labels, value in series.items())
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        lines.append(f"process_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 10) -> str:
+        """Краткая сводка для администратора в чате."""
+        def top(name: str, label: str) -> list[str]:
+            series = sorted(self._histograms.get(name, {}).items(), key=lambda item: -item[1].count)
+            errors = self._counters.get(f"{name[:-len('_seconds')]}_errors_total", {})
+            rows = []
+            for labels, histogram in series[:limit]:
+                key = dict(labels)[label]
+                failed = sum(value for error_labels, value in errors.items() if dict(error_labels).get(label) == key)
+                rows.append(
+                    f"{key}: {histogram.count} шт., ср. {histogram.sum / histogram.count * 1000:.0f} мс, "
+                    f"p99 ≤ {histogram.quantile(0.99) * 1000:.0f} мс" + (f", ошибок {failed:g}" if failed else "")
+                )
+            return rows or ["нет данных"]
+
+        def notifications() -> str:
+            results = {dict(labels)["result"]: value
+                       for labels, value in self._counters.get("bot_admin_notifications_total", {}).items()}
+            retries = sum(self._counters.get("bot_admin_notification_retries_total", {}).values())
+            delivery = self._histograms.get("bot_admin_notification_seconds", {}).get(())
+            line = (f"доставлено {results.get('sent', 0):g}, не доставлено {results.get('dropped', 0):g}, "
+                    f"повторов {retries:g}")
+            if delivery is not None:
+                line += f", p95 ≤ {delivery.quantile(0.95) * 1000:.0f} мс"
+            return line
+
+        in_flight = sum(self._gauges.get("bot_handlers_in_flight", {}).values())
+        uptime = int(time.time() - self.started_at)
+        parts = [
+            f"⏱ Аптайм: {uptime // 3600} ч {uptime % 3600 // 60} мин, обрабатывается сейчас: {in_flight:g}",
+            "\n🧩 Обработчики:", *top("bot_handler_seconds", "handler"),
+            "\n💾 Хранилище:", *top("bot_storage_seconds", "operation"),
+            "\n📡 Telegram API:", *top("bot_telegram_api_seconds", "method"),
+            "\n📣 Уведомления администраторам:", notifications(),
+        ]
+        return "\n".join(parts)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Мидлварь обработчиков: задержка, ошибки, число одновременно
+    выполняемых обработчиков и состояние FSM, в котором пришло событие."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler, event: TelegramObject, data: dict):
+        handler_object: HandlerObject | None = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+        event_type = "callback_query" if isinstance(event, CallbackQuery) else "message"
+        self.metrics.inc("bot_updates_total", type=event_type, state=data.get("raw_state") or "none")
+        self.metrics.gauge_add("bot_handlers_in_flight", 1, handler=name)
+        try:
+            with self.metrics.timer("bot_handler", handler=name):
+                return await handler(event, data)
+        finally:
+            self.metrics.gauge_add("bot_handlers_in_flight", -1, handler=name)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Мидлварь сессии бота: время каждого вызова Telegram Bot API по методам."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, make_request, bot, method):
+        with self.metrics.timer("bot_telegram_api", method=type(method).__name__):
+            return await make_request(bot, method)
+
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int) -> "web.AppRunner":
+    """Поднимает HTTP-сервер с метриками по адресу /metrics."""
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"Метрики доступны по адресу http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+from rate_limiter import TokenBucket
+
+
+class AdminNotifier:
+    """Рассылка уведомлений администраторам.
+
+    Сообщения всем администраторам отправляются параллельно, с общим
+    ограничением частоты (Telegram допускает около 30 сообщений в секунду)
+    и ограничением на каждый чат. На TelegramRetryAfter рассылка ждёт
+    указанное время, на сетевые и серверные ошибки повторяет с нарастающей
+    паузой. Ошибка в одном чате не мешает доставке в остальные.
+
+    Если задан metrics, доставленные и недоставленные уведомления, повторы
+    и время доставки попадают в метрики бота.
+    """
+
+    def __init__(self, admin_ids: list[int], global_rate: float = 30, per_chat_rate: float = 1,
+                 per_chat_burst: float = 3, max_retries: int = 3, backoff: float = 0.5, metrics=None):
+        # Список не копируется: добавление и удаление администраторов видно сразу
+        self.admin_ids = admin_ids
+        self.global_limiter = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._chat_limiters: dict[int, TokenBucket] = {}
+        self.metrics = metrics
+
+    def _chat_limiter(self, chat_id: int) -> TokenBucket:
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self._chat_limiters[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return limiter
+
+    async def send(self, bot: Bot, chat_id: int, text: str, **kwargs) -> bool:
+        """Отправляет одно сообщение с учётом лимитов и повторов. Возвращает успех доставки."""
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            await self._chat_limiter(chat_id).acquire()
+            await self.global_limiter.acquire()
+            try:
+                await bot.send_message(chat_id, text, **kwargs)
+            except TelegramRetryAfter as e:
+                delay = e.retry_after
+            except (TelegramNetworkError, TelegramServerError) as e:
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Ошибка отправки уведомления в чат {chat_id}: {e}")
+            except TelegramAPIError as e:
+                # Бот заблокирован, чат не найден и т. п. — повтор не поможет
+                logging.warning(f"Уведомление в чат {chat_id} не доставлено: {e}")
+                break
+            else:
+                if self.metrics is not None:
+                    self.metrics.observe("bot_admin_notification_seconds", time.perf_counter() - started)
+                    self.metrics.inc("bot_admin_notifications_total", result="sent")
+                return True
+            if attempt < self.max_retries:
+                if self.metrics is not None:
+                    self.metrics.inc("bot_admin_notification_retries_total")
+                await asyncio.sleep(delay)
+        if self.metrics is not None:
+            self.metrics.inc("bot_admin_notifications_total", result="dropped")
+        return False
+
+    async def broadcast(self, bot: Bot, text: str, **kwargs) -> dict[int, bool]:
+        """Отправляет сообщение всем администраторам. Возвращает {chat_id: доставлено}."""
+        admin_ids = list(self.admin_ids)
+        if not admin_ids:
+            logging.warning("Список администраторов пуст, уведомление не отправлено.")
+            return {}
+        results = await asyncio.gather(*(self.send(bot, admin_id, text, **kwargs) for admin_id in admin_ids))
+        return dict(zip(admin_ids, results))
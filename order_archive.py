@@ -0,0 +1,279 @@
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from order_model import Order, json_default
+from statuses import STATUS_PROCESSED
+
+_SEGMENT_NAME = re.compile(r"^(\d{4}-\d{2}|unknown)-(\d{6})\.jsonl\.gz$")
+_REMOVED_LOG = "removed.log"
+
+
+def is_archivable(order: dict, now: datetime, after_days: float) -> bool:
+    """Заявка завершена: обработана и либо получила отзыв, либо обработана больше after_days дней назад."""
+    if order.get("status") != STATUS_PROCESSED:
+        return False
+    if order.get("feedback"):
+        return True
+    closed_at = next((entry.get("timestamp") for entry in reversed(order.get("history", []))), None)
+    if not closed_at:
+        return False
+    try:
+        return datetime.fromisoformat(closed_at) <= now - timedelta(days=after_days)
+    except ValueError:
+        return False
+
+
+def _month(order: dict) -> str:
+    created_at = order.get("created_at") or ""
+    return created_at[:7] if re.match(r"\d{4}-\d{2}", created_at) else "unknown"
+
+
+class OrderArchive:
+    """Архив завершённых заявок в неизменяемых сжатых сегментах по месяцам.
+
+    Каждый перенос пишет новые сегменты archive/ГГГГ-ММ-NNNNNN.jsonl.gz (месяц
+    создания заявки и порядковый номер, не больше segment_size заявок в
+    сегменте) и рядом маленький индекс .idx.json со столбцами ID, статусов и
+    user_id (столбцы, а не строки: при загрузке это три списка на сегмент,
+    а не по объекту на заявку, которые пришлось бы обходить сборщику мусора). При запуске читаются только индексы; сам
+    сегмент загружается при первом обращении к его заявке и остаётся в
+    LRU-кеше на cache_segments сегментов.
+
+    Сегменты не переписываются. Если заявку из архива снова меняют или
+    удаляют, её ID записывается в removed.log вместе с номером последнего
+    сегмента: более старые копии больше не видны, а при повторной архивации
+    заявка попадёт в новый сегмент и станет видна снова.
+    """
+
+    def __init__(self, directory: str, cache_segments: int = 4, segment_size: int = 2000):
+        self.directory = directory
+        self.cache_segments = cache_segments
+        self.segment_size = segment_size
+        # Номер сегмента -> имя файла
+        self._segments: dict[int, str] = {}
+        # ID видимой в архиве заявки -> номер сегмента, статус и user_id.
+        # Отдельные словари простых значений: кортежи на каждую заявку
+        # отслеживал бы сборщик мусора, что заметно замедляет загрузку.
+        self._orders: dict[int, int] = {}
+        self._statuses: dict[int, str] = {}
+        self._user_of: dict[int, int] = {}
+        self._user_ids: dict[int, list[int]] = {}
+        self._counts: dict[str, int] = {}
+        self._next_seq = 1
+        self._cache: OrderedDict[int, dict[int, dict]] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # Загрузка
+
+    async def load(self):
+        """Читает индексы сегментов и журнал удалений."""
+        segments, indexes, removed, last_seq = await asyncio.to_thread(self._read_indexes)
+        self._segments = segments
+        self._next_seq = last_seq + 1
+        # Более новые сегменты перекрывают старые копии той же заявки
+        orders, statuses, user_of = {}, {}, {}
+        for seq, index in sorted(indexes.items()):
+            for order_id, status, user_id in zip(index["ids"], index["statuses"], index["user_ids"]):
+                if removed.get(order_id, 0) < seq:
+                    orders[order_id] = seq
+                    statuses[order_id] = status
+                    user_of[order_id] = user_id
+        self._orders, self._statuses, self._user_of = orders, statuses, user_of
+        self._user_ids, self._counts = {}, {}
+        for order_id in sorted(orders):
+            status = statuses[order_id]
+            self._counts[status] = self._counts.get(status, 0) + 1
+            self._user_ids.setdefault(user_of[order_id], []).append(order_id)
+        logging.info(f"Архив заявок: {len(self._orders)} заявок в {len(segments)} сегментах")
+
+    def _read_indexes(self):
+        segments, indexes, removed, last_seq = {}, {}, {}, 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return segments, indexes, removed, last_seq
+        for name in names:
+            match = _SEGMENT_NAME.match(name)
+            if match is None:
+                continue
+            seq = int(match.group(2))
+            # Номер недописанного сегмента тоже не используется повторно
+            last_seq = max(last_seq, seq)
+            try:
+                with open(self._path(name + ".idx.json"), "r", encoding="utf-8") as file:
+                    index = json.load(file)
+                indexes[seq] = {column: index[column] for column in ("ids", "statuses", "user_ids")}
+            except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+                # Сегмент без индекса не дописан (сбой во время архивации) — заявки остались в основном хранилище
+                logging.warning(f"Сегмент архива {name} без индекса пропущен.")
+                continue
+            segments[seq] = name
+        try:
+            with open(self._path(_REMOVED_LOG), "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        order_id, after_seq = map(int, line.split())
+                    except ValueError:
+                        continue
+                    removed[order_id] = max(removed.get(order_id, 0), after_seq)
+        except FileNotFoundError:
+            pass
+        return segments, indexes, removed, last_seq
+
+    def _register(self, seq: int, index: dict):
+        for order_id, status, user_id in zip(index["ids"], index["statuses"], index["user_ids"]):
+            self._forget(order_id)
+            self._orders[order_id] = seq
+            self._statuses[order_id] = status
+            self._user_of[order_id] = user_id
+            self._counts[status] = self._counts.get(status, 0) + 1
+            bisect.insort(self._user_ids.setdefault(user_id, []), order_id)
+
+    def _forget(self, order_id: int) -> bool:
+        if self._orders.pop(order_id, None) is None:
+            return False
+        self._counts[self._statuses.pop(order_id)] -= 1
+        user_id = self._user_of.pop(order_id)
+        ids = self._user_ids.get(user_id)
+        if ids is not None and order_id in ids:
+            ids.remove(order_id)
+            if not ids:
+                del self._user_ids[user_id]
+        return True
+
+    # Чтение
+
+    def _read_segment(self, name: str) -> dict[int, Order]:
+        orders = {}
+        with gzip.open(self._path(name), "rt", encoding="utf-8") as file:
+            for line in file:
+                order = Order.from_dict(json.loads(line))
+                orders[order.id] = order
+        return orders
+
+    async def _segment(self, seq: int) -> dict[int, Order]:
+        orders = self._cache.get(seq)
+        if orders is not None:
+            self._cache.move_to_end(seq)
+            return orders
+        orders = await asyncio.to_thread(self._read_segment, self._segments[seq])
+        self._cache[seq] = orders
+        while len(self._cache) > self.cache_segments:
+            self._cache.popitem(last=False)
+        return orders
+
+    async def get(self, order_id: int) -> Order | None:
+        seq = self._orders.get(order_id)
+        if seq is None:
+            return None
+        return (await self._segment(seq)).get(order_id)
+
+    async def list_by_user(self, user_id: int) -> list[Order]:
+        orders = []
+        for order_id in self._user_ids.get(user_id, []):
+            order = await self.get(order_id)
+            if order is not None:
+                orders.append(order)
+        return orders
+
+    def max_id(self) -> int:
+        return max(self._orders, default=0)
+
+    def count_by_status(self) -> dict[str, int]:
+        return {status: count for status, count in self._counts.items() if count}
+
+    def months(self) -> list[tuple[str, int]]:
+        """(месяц, номер сегмента) от новых месяцев к старым."""
+        return sorted(((name[:-len("-000000.jsonl.gz")], seq) for seq, name in self._segments.items()), reverse=True)
+
+    async def read_segment(self, seq: int) -> list[Order]:
+        """Видимые заявки сегмента, без кеширования (для выгрузок и пересчётов)."""
+        orders = await asyncio.to_thread(self._read_segment, self._segments[seq])
+        return [
+            order for order_id, order in sorted(orders.items(), reverse=True)
+            if self._orders.get(order_id) == seq
+        ]
+
+    async def all(self) -> list[Order]:
+        orders = []
+        for seq in sorted(self._segments):
+            orders.extend(await self.read_segment(seq))
+        return orders
+
+    # Изменение
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_segment(self, name: str, orders: list[Order], index: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        lines = "".join(json.dumps(order, ensure_ascii=False, default=json_default) + "\n" for order in orders)
+        self._write_file(self._path(name), gzip.compress(lines.encode("utf-8"), compresslevel=6))
+        # Индекс пишется последним: сегмент без индекса при загрузке не учитывается
+        self._write_file(self._path(name + ".idx.json"), json.dumps(index, ensure_ascii=False).encode("utf-8"))
+
+    async def add(self, orders: list[Order]) -> int:
+        """Записывает заявки в новые сегменты по месяцам создания. Возвращает число сегментов."""
+        by_month: dict[str, list[dict]] = {}
+        for order in sorted(orders, key=lambda order: order["id"]):
+            by_month.setdefault(_month(order), []).append(order)
+        chunks = [
+            (month, group[i:i + self.segment_size])
+            for month, group in sorted(by_month.items())
+            for i in range(0, len(group), self.segment_size)
+        ]
+        async with self._lock:
+            for month, group in chunks:
+                seq = self._next_seq
+                self._next_seq += 1
+                name = f"{month}-{seq:06d}.jsonl.gz"
+                index = {
+                    "count": len(group),
+                    "ids": [order["id"] for order in group],
+                    "statuses": [order.get("status") for order in group],
+                    "user_ids": [order.get("user_id") for order in group],
+                }
+                await asyncio.to_thread(self._write_segment, name, group, index)
+                self._segments[seq] = name
+                self._register(seq, index)
+        return len(chunks)
+
+    def _append_removed(self, lines: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(_REMOVED_LOG), "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    async def remove(self, order_ids: list[int]):
+        """Скрывает заявки в архиве: они вернулись в основное хранилище или удалены."""
+        order_ids = [order_id for order_id in order_ids if order_id in self._orders]
+        if not order_ids:
+            return
+        async with self._lock:
+            after_seq = self._next_seq - 1
+            await asyncio.to_thread(self._append_removed, "".join(f"{order_id} {after_seq}\n" for order_id in order_ids))
+            for order_id in order_ids:
+                self._forget(order_id)
@@ -0,0 +1,129 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+
+from order_model import json_default
+
+# Колонки CSV в порядке вывода; в JSONL заявка выгружается целиком
+EXPORT_FIELDS = ["id", "created_at", "status", "full_name", "phone_number", "address", "service", "reason", "user_id"]
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+async def iter_orders(store, status: str | None = None, start: date | None = None, end: date | None = None,
+                      batch_size: int = 500):
+    """Активные заявки от новых к старым страницами по batch_size, затем архивные.
+
+    В памяти одновременно только одна страница или один сегмент архива.
+    start и end — границы даты создания (end включительно). ID растут вместе
+    с датой создания, поэтому обход активных заявок заканчивается на первой
+    заявке старше start, а из архива читаются только сегменты нужных месяцев.
+    """
+    start_key = start.isoformat() if start is not None else None
+    end_key = (end + timedelta(days=1)).isoformat() if end is not None else None
+
+    def matches(order: dict) -> bool:
+        created_at = order.get("created_at") or ""
+        return (start_key is None or created_at >= start_key) and (end_key is None or created_at < end_key)
+
+    before_id, has_older = None, True
+    while has_older:
+        orders, _, has_older = await store.page(status, before_id=before_id, limit=batch_size)
+        if not orders:
+            break
+        for order in orders:
+            if start_key is not None and (order.get("created_at") or "") < start_key:
+                has_older = False
+                break
+            if matches(order):
+                yield order
+        before_id = orders[-1]["id"]
+
+    archive = getattr(store, "archive", None)
+    if archive is None:
+        return
+    for month, seq in archive.months():
+        if (start_key is not None and month < start_key[:7]) or (end_key is not None and month > end_key[:7]):
+            continue
+        for order in await archive.read_segment(seq):
+            if (status is None or order.get("status") == status) and matches(order):
+                yield order
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        # utf-8-sig: Excel открывает кириллицу без выбора кодировки
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._file.write(self._rows([EXPORT_FIELDS]))
+
+    @staticmethod
+    def _rows(rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def encode(self, orders: list[dict]) -> str:
+        return self._rows([order.get(field, "") for field in EXPORT_FIELDS] for order in orders)
+
+    def write(self, chunk: str):
+        self._file.write(chunk)
+
+    def close(self):
+        self._file.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path: str):
+        # Уровень 6 сжимает почти как 9, но в несколько раз быстрее
+        self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+
+    @staticmethod
+    def encode(orders: list[dict]) -> str:
+        return "".join(json.dumps(order, ensure_ascii=False, default=json_default) + "\n" for order in orders)
+
+    def write(self, chunk: str):
+        self._file.write(chunk)
+
+    def close(self):
+        self._file.close()
+
+
+async def export_orders(store, fmt: str = "csv", status: str | None = None, start: date | None = None,
+                        end: date | None = None, progress=None, batch_size: int = 500) -> tuple[str, int]:
+    """Выгружает заявки во временный файл CSV или JSONL.gz. Возвращает (путь, число заявок).
+
+    Заявки сериализуются пачками по batch_size в цикле событий (хранилище
+    отдаёт живые словари), а запись на диск и сжатие идут в отдельном потоке,
+    так что память не зависит от размера базы. progress(count) — необязательная
+    корутина, вызывается после каждой пачки. Файл удаляет вызывающий.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    fd, path = tempfile.mkstemp(prefix="orders_", suffix=".csv" if fmt == "csv" else ".jsonl.gz")
+    os.close(fd)
+    count = 0
+    try:
+        writer = await asyncio.to_thread(_CsvWriter if fmt == "csv" else _JsonlWriter, path)
+        try:
+            batch = []
+            async for order in iter_orders(store, status, start, end, batch_size):
+                batch.append(order)
+                if len(batch) == batch_size:
+                    await asyncio.to_thread(writer.write, writer.encode(batch))
+                    count += len(batch)
+                    batch = []
+                    if progress is not None:
+                        await progress(count)
+            if batch:
+                await asyncio.to_thread(writer.write, writer.encode(batch))
+                count += len(batch)
+        finally:
+            await asyncio.to_thread(writer.close)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, count
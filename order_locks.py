@@ -0,0 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class OrderLocks:
+    """Блокировки по ID заявки для операций «прочитать — изменить — записать».
+
+    Изменения одной заявки выполняются по очереди, изменения разных заявок —
+    параллельно. Блокировка существует, только пока её кто-то держит или
+    ждёт, поэтому словарь не растёт с числом заявок.
+
+        async with order_locks(order_id):
+            order = await order_store.get(order_id)
+            ...
+            await order_store.update(order_id, fields)
+    """
+
+    def __init__(self):
+        # ID заявки -> [блокировка, число держащих и ожидающих]
+        self._locks: dict[int, list] = {}
+
+    def __len__(self):
+        return len(self._locks)
+
+    def locked(self, order_id: int) -> bool:
+        entry = self._locks.get(order_id)
+        return entry is not None and entry[0].locked()
+
+    @asynccontextmanager
+    async def __call__(self, order_id: int):
+        entry = self._locks.get(order_id)
+        if entry is None:
+            entry = self._locks[order_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[order_id]
@@ -0,0 +1,194 @@
+from collections.abc import MutableMapping
+from operator import itemgetter
+
+from statuses import LEGACY_STATUSES, STATUS_IN_PROGRESS, STATUS_PENDING, STATUS_PROCESSED
+
+_MISSING = object()
+
+
+class Vocabulary:
+    """Повторяющиеся строки (статусы, услуги): одна копия строки на процесс.
+
+    У каждой заявки, прочитанной из JSON, своя копия строки статуса и услуги;
+    shared возвращает вместо неё общую. Псевдонимы заменяются основным
+    значением, новые значения добавляются при первой встрече.
+    """
+
+    def __init__(self, values=(), aliases=None):
+        self._values: dict[str, str] = {value: value for value in values}
+        for alias, value in (aliases or {}).items():
+            self._values[alias] = self.shared(value)
+
+    def shared(self, value: str) -> str:
+        return self._values.setdefault(value, value)
+
+
+# Старые варианты написания статусов приводятся к единому уже при чтении заявки
+STATUSES = Vocabulary((STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_PROCESSED), LEGACY_STATUSES)
+SERVICES = Vocabulary(("🔧 Компьютерная помощь", "🔧 Монтажные работы"))
+
+# Поля заявки в порядке вывода в JSON; остальные ключи идут следом из extra
+ORDER_FIELDS = (
+    "id", "full_name", "address", "service", "phone_number", "reason",
+    "status", "user_id", "created_at", "history", "feedback",
+)
+_FIELD_SET = frozenset(ORDER_FIELDS)
+# Поля, которые есть у каждой заявки, созданной ботом
+_REQUIRED_FIELDS = ("id", "full_name", "address", "service", "phone_number", "reason", "status", "user_id", "created_at")
+_get_required = itemgetter(*_REQUIRED_FIELDS)
+_shared_status = STATUSES.shared
+_shared_service = SERVICES.shared
+
+
+class Order(MutableMapping):
+    """Заявка в компактном виде: слоты вместо словаря.
+
+    Поля заявки лежат в слотах, одноимённых ключам orders.json, и читаются
+    атрибутами (order.status, order.full_name); отсутствующее поле —
+    AttributeError. Статус и услуга — общие для всех заявок строки из
+    STATUSES и SERVICES. Время создания и история хранятся как прочитаны.
+
+    Для кода, который работает со словарями заявок, Order ведёт себя как
+    словарь в прежнем формате: order["status"], order.get("history", []),
+    dict(order), update(). from_dict/to_dict переводят заявку из формата
+    orders.json и обратно без потерь: незнакомые ключи хранятся в extra.
+    """
+
+    __slots__ = ORDER_FIELDS + ("extra",)
+
+    def __init__(self, fields: dict | None = None, **kwargs):
+        self.extra = None
+        if fields:
+            self.update(fields)
+        if kwargs:
+            self.update(kwargs)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Order":
+        try:
+            (order_id, full_name, address, service, phone_number, reason,
+             status, user_id, created_at) = _get_required(data)
+        except KeyError:
+            return cls._from_any_dict(data)
+        # Обычная заявка разбирается без цикла по ключам: это горячий путь загрузки orders.json
+        order = cls.__new__(cls)
+        order.id = order_id
+        order.full_name = full_name
+        order.address = address
+        order.service = _shared_service(service) if service.__class__ is str else service
+        order.phone_number = phone_number
+        order.reason = reason
+        order.status = _shared_status(status) if status.__class__ is str else status
+        order.user_id = user_id
+        order.created_at = created_at
+        fields = len(_REQUIRED_FIELDS)
+        history = data.get("history", _MISSING)
+        if history is not _MISSING:
+            order.history = history
+            fields += 1
+        feedback = data.get("feedback", _MISSING)
+        if feedback is not _MISSING:
+            order.feedback = feedback
+            fields += 1
+        if len(data) != fields:
+            return cls._from_any_dict(data)
+        order.extra = None
+        return order
+
+    @classmethod
+    def _from_any_dict(cls, data: dict) -> "Order":
+        order = cls.__new__(cls)
+        order.extra = None
+        for key, value in data.items():
+            order[key] = value
+        return order
+
+    def to_dict(self) -> dict:
+        data = {}
+        for key in ORDER_FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self) -> "Order":
+        order = Order.__new__(Order)
+        for slot in Order.__slots__:
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                setattr(order, slot, value)
+        if self.extra is not None:
+            order.extra = dict(self.extra)
+        # Списки копируются, чтобы изменение копии не задело исходную заявку
+        for key in ("history", "feedback"):
+            value = getattr(self, key, None)
+            if value.__class__ is list:
+                setattr(order, key, list(value))
+        return order
+
+    # Интерфейс словаря
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        extra = self.extra
+        return default if extra is None else extra.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if value.__class__ is str:
+                if key == "status":
+                    value = _shared_status(value)
+                elif key == "service":
+                    value = _shared_service(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in _FIELD_SET:
+            delattr(self, key)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        for key in ORDER_FIELDS:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, Order):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Order({self.to_dict()!r})"
+
+
+def json_default(value):
+    """Для json.dump(default=...): заявки пишутся в прежнем формате словаря."""
+    if isinstance(value, Order):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import math
+import os
+from datetime import datetime
+
+from statuses import STATUS_PROCESSED, normalize_status
+
+# Гистограмма времени обработки: логарифмические корзины по 4 на каждое
+# удвоение (шаг ~19%), корзина i покрывает (2^((i-1)/4), 2^(i/4)] секунд
+BUCKETS_PER_DOUBLING = 4
+
+
+def _bucket(seconds: float) -> int:
+    if seconds <= 1:
+        return 0
+    return math.ceil(BUCKETS_PER_DOUBLING * math.log2(seconds))
+
+
+def _bucket_upper_bound(bucket: int) -> float:
+    return 2 ** (bucket / BUCKETS_PER_DOUBLING)
+
+
+def _processing_seconds(order: dict, finished_at: str) -> float | None:
+    started_at = order.get("created_at")
+    if not started_at and order.get("history"):
+        started_at = order["history"][0].get("timestamp")
+    if not started_at:
+        return None
+    try:
+        delta = datetime.fromisoformat(finished_at) - datetime.fromisoformat(started_at)
+    except ValueError:
+        return None
+    return max(delta.total_seconds(), 0.0)
+
+
+def _last_processing_seconds(order: dict, skip_last: bool = False) -> float | None:
+    """Время обработки по последнему переходу заявки в «Обработано» из истории.
+
+    skip_last — не учитывать последнюю запись истории (только что сделанную смену статуса).
+    """
+    history = order.get("history", [])
+    if skip_last:
+        history = history[:-1]
+    finished = next(
+        (entry["timestamp"] for entry in reversed(history)
+         if normalize_status(entry.get("status")) == STATUS_PROCESSED),
+        None,
+    )
+    return _processing_seconds(order, finished) if finished else None
+
+
+class OrderStats:
+    """Статистика заявок, которая обновляется по событиям, а не пересчитывается.
+
+    Счётчики по статусам, число отмен, сумма и гистограмма времени обработки
+    меняются при создании заявки, смене статуса и отмене, поэтому ответ для
+    «Аналитики заявок» строится за O(1). Итоги периодически сохраняются в
+    JSON; если файла нет или он разошёлся с хранилищем, статистика один раз
+    пересчитывается по всем заявкам.
+    """
+
+    def __init__(self, path: str, save_interval: float = 10.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._state = self._empty_state()
+        self._dirty = False
+        self._save_task: asyncio.Task | None = None
+
+    @staticmethod
+    def _empty_state() -> dict:
+        return {"by_status": {}, "cancelled": 0, "processed_count": 0, "processing_sum": 0.0, "histogram": {}}
+
+    # Загрузка и сохранение
+
+    async def load(self, store):
+        """Загружает итоги с диска, а при расхождении с хранилищем пересчитывает их."""
+        state = await asyncio.to_thread(self._read)
+        counts = await store.count_by_status()
+        if state is None or sum(state["by_status"].values()) != sum(counts.values()):
+            logging.info("Статистика заявок пересчитывается по хранилищу.")
+            cancelled = state["cancelled"] if state is not None else 0
+            self._state = self._empty_state()
+            self._state["cancelled"] = cancelled
+            for order in await store.all():
+                self._count_order(order)
+            self._dirty = True
+            await self.save()
+        else:
+            self._state = state
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        state["histogram"] = {int(bucket): count for bucket, count in state["histogram"].items()}
+        return state
+
+    def _write(self, state: dict):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        state = json.loads(json.dumps(self._state))
+        try:
+            await asyncio.to_thread(self._write, state)
+        except OSError:
+            self._dirty = True
+            raise
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self.save()
+            except OSError as e:
+                logging.error(f"Ошибка сохранения статистики заявок: {e}")
+
+    def start(self):
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_loop())
+
+    async def close(self):
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        await self.save()
+
+    # События
+
+    def _add_status(self, status, delta: int):
+        by_status = self._state["by_status"]
+        by_status[status] = by_status.get(status, 0) + delta
+        if by_status[status] <= 0:
+            del by_status[status]
+
+    def _add_processing(self, seconds: float):
+        self._state["processed_count"] += 1
+        self._state["processing_sum"] += seconds
+        histogram = self._state["histogram"]
+        bucket = _bucket(seconds)
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def _remove_processing(self, seconds: float):
+        self._state["processed_count"] -= 1
+        self._state["processing_sum"] -= seconds
+        histogram = self._state["histogram"]
+        bucket = _bucket(seconds)
+        histogram[bucket] = histogram.get(bucket, 0) - 1
+        if histogram[bucket] <= 0:
+            del histogram[bucket]
+
+    def _count_order(self, order: dict):
+        status = normalize_status(order.get("status"))
+        self._add_status(status, 1)
+        if status == STATUS_PROCESSED:
+            seconds = _last_processing_seconds(order)
+            if seconds is not None:
+                self._add_processing(seconds)
+
+    def on_created(self, order: dict):
+        self._count_order(order)
+        self._dirty = True
+
+    def on_status_changed(self, order: dict, old_status, new_status, changed_at: str):
+        """order — заявка после смены статуса: запись о ней уже последняя в истории."""
+        old_status, new_status = normalize_status(old_status), normalize_status(new_status)
+        if old_status == new_status and new_status != STATUS_PROCESSED:
+            return
+        self._add_status(old_status, -1)
+        self._add_status(new_status, 1)
+        # Как и при пересчёте, учитывается только последнее закрытие заявки:
+        # время обработки по предыдущему закрытию вычитается
+        if old_status == STATUS_PROCESSED:
+            seconds = _last_processing_seconds(order, skip_last=True)
+            if seconds is not None:
+                self._remove_processing(seconds)
+        if new_status == STATUS_PROCESSED:
+            seconds = _processing_seconds(order, changed_at)
+            if seconds is not None:
+                self._add_processing(seconds)
+        self._dirty = True
+
+    def on_cancelled(self, order: dict):
+        status = normalize_status(order.get("status"))
+        self._add_status(status, -1)
+        if status == STATUS_PROCESSED:
+            seconds = _last_processing_seconds(order)
+            if seconds is not None:
+                self._remove_processing(seconds)
+        self._state["cancelled"] += 1
+        self._dirty = True
+
+    # Ответы
+
+    def percentile(self, p: float) -> float:
+        """Приближённый перцентиль времени обработки в секундах (точность ~19%)."""
+        histogram = self._state["histogram"]
+        total = sum(histogram.values())
+        if not total:
+            return 0.0
+        rank = p * total
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= rank:
+                return _bucket_upper_bound(bucket)
+        return _bucket_upper_bound(max(histogram))
+
+    def snapshot(self) -> dict:
+        state = self._state
+        processed = state["processed_count"]
+        return {
+            "total": sum(state["by_status"].values()),
+            "by_status": dict(state["by_status"]),
+            "cancelled": state["cancelled"],
+            "avg_processing": state["processing_sum"] / processed if processed else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
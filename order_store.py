@@ -0,0 +1,456 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+from datetime import datetime
+
+from id_allocator import IdAllocator
+from order_archive import OrderArchive, is_archivable
+from order_model import Order, json_default
+from statuses import STATUS_PROCESSED
+
+# В строках JSON перевод строки всегда экранирован, поэтому сдвиг строк текста безопасен
+_SNAPSHOT_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=4)
+
+
+class OrderStore:
+    """Хранилище заявок: индекс в памяти + журнал изменений (append-only).
+
+    Снимок хранится в orders.json в прежнем формате (список заявок), а каждое
+    изменение дописывается одной строкой в журнал рядом со снимком. Поиск и
+    обновление заявки по ID — O(1), стоимость записи не зависит от количества
+    заявок. Фоновая задача периодически сворачивает журнал в новый снимок.
+
+    Записи журнала пишет одна фоновая задача: изменения, пришедшие в течение
+    flush_interval секунд (но не больше flush_batch_size штук), сбрасываются
+    на диск одной записью с одним fsync. Вызывающий код ждёт, пока его
+    изменение не окажется на диске.
+
+    Для постраничного вывода поддерживаются отсортированные списки ID —
+    общий и по каждому статусу, так что страница строится за O(log N + размер
+    страницы). Отдельный индекс user_id -> ID заявок позволяет получить
+    заявки пользователя, не перебирая остальные.
+
+    ID новых заявок выдаёт IdAllocator с границей в отдельном файле,
+    поэтому номер удалённой или отменённой заявки не достанется новой даже
+    после перезапуска.
+
+    В памяти заявки хранятся компактными Order (см. order_model), на диске —
+    в прежнем формате словарей. Заявки, которые возвращает хранилище, нельзя
+    изменять напрямую — все изменения проходят через add/update/delete.
+
+    Если задан archive (OrderArchive), раз в archive_interval секунд
+    завершённые заявки (см. is_archivable) переносятся в архив, и в памяти и
+    в orders.json остаются только активные. get, exists, list_by_user,
+    count_by_status и all видят и архив; постраничный вывод и list_by_status —
+    только активные заявки. Изменение архивной заявки возвращает её в
+    основное хранилище.
+    """
+
+    def __init__(self, path: str, log_path: str | None = None,
+                 compact_threshold: int = 1000, compact_interval: float = 60.0,
+                 flush_interval: float = 0.02, flush_batch_size: int = 100,
+                 id_path: str | None = None, id_block_size: int = 100,
+                 archive: OrderArchive | None = None, archive_after_days: float = 30,
+                 archive_interval: float = 3600):
+        self.path = path
+        self.log_path = log_path or os.path.splitext(path)[0] + ".log"
+        self.id_allocator = IdAllocator(id_path or os.path.splitext(path)[0] + ".id", id_block_size)
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.archive = archive
+        self.archive_after_days = archive_after_days
+        self.archive_interval = archive_interval
+        self._orders: dict[int, Order] = {}
+        self._ids: list[int] = []
+        self._status_ids: dict[str, list[int]] = {}
+        self._user_ids: dict[int, list[int]] = {}
+        self._log_records = 0
+        self._lock = asyncio.Lock()
+        self._compaction_task: asyncio.Task | None = None
+        self._archive_task: asyncio.Task | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: asyncio.Task | None = None
+        self._log_file = None
+
+    # Загрузка и сохранение
+
+    async def load(self):
+        """Загружает снимок и применяет к нему журнал изменений."""
+        self._orders, self._log_records, max_id = await asyncio.to_thread(self._read_state)
+        if self.archive is not None:
+            await self.archive.load()
+            max_id = max(max_id, self.archive.max_id())
+            # Заявка есть и здесь, и в архиве, если перенос или возврат прервался;
+            # верна версия в основном хранилище
+            await self.archive.remove([order_id for order_id in self._orders if order_id in self.archive])
+        await self.id_allocator.load(floor=max_id)
+        self._rebuild_indexes()
+        logging.info(f"Загружено заявок: {len(self._orders)} (записей в журнале: {self._log_records})")
+
+    def _read_state(self):
+        orders = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for order in json.load(file):
+                    orders[order["id"]] = Order.from_dict(order)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        records = 0
+        max_id = max(orders, default=0)
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Недописанная строка после аварийного завершения
+                        logging.warning("Пропущена повреждённая запись журнала заявок.")
+                        continue
+                    self._apply(orders, record)
+                    records += 1
+                    # Удалённые заявки тоже занимали номер
+                    max_id = max(max_id, record.get("id") or record.get("order", {}).get("id", 0))
+        except FileNotFoundError:
+            pass
+        # Старые варианты написания статусов Order приводит к единому сам
+        return orders, records, max_id
+
+    # Индексы
+
+    def _rebuild_indexes(self):
+        self._ids = sorted(self._orders)
+        self._status_ids = {}
+        self._user_ids = {}
+        for order_id in self._ids:
+            order = self._orders[order_id]
+            self._status_ids.setdefault(getattr(order, "status", None), []).append(order_id)
+            self._user_ids.setdefault(getattr(order, "user_id", None), []).append(order_id)
+
+    @staticmethod
+    def _index_insert(ids: list[int], order_id: int):
+        # Новые ID больше всех существующих, поэтому обычно это просто append
+        if not ids or ids[-1] < order_id:
+            ids.append(order_id)
+        else:
+            bisect.insort(ids, order_id)
+
+    @staticmethod
+    def _index_remove(ids: list[int], order_id: int):
+        i = bisect.bisect_left(ids, order_id)
+        if i < len(ids) and ids[i] == order_id:
+            del ids[i]
+
+    def _index_order(self, order: Order):
+        self._index_insert(self._ids, order.id)
+        self._index_insert(self._status_ids.setdefault(order.get("status"), []), order.id)
+        self._index_insert(self._user_ids.setdefault(order.get("user_id"), []), order.id)
+
+    def _unindex_order(self, order: Order):
+        self._index_remove(self._ids, order.id)
+        self._index_remove(self._status_ids.get(order.get("status"), []), order.id)
+        user_ids = self._user_ids.get(order.get("user_id"))
+        if user_ids is not None:
+            self._index_remove(user_ids, order.id)
+            if not user_ids:
+                del self._user_ids[order.get("user_id")]
+
+    @staticmethod
+    def _apply(orders: dict, record: dict):
+        """Применяет запись журнала. Повторное применение ничего не меняет."""
+        op = record["op"]
+        if op == "put":
+            orders[record["order"]["id"]] = Order.from_dict(record["order"])
+        elif op == "set":
+            order = orders.get(record["id"])
+            if order is not None:
+                order.update(record["fields"])
+        elif op == "del":
+            orders.pop(record["id"], None)
+
+    def _enqueue(self, record: dict) -> asyncio.Future:
+        """Ставит запись журнала в очередь на запись и возвращает future её сохранения."""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        future = asyncio.get_running_loop().create_future()
+        line = json.dumps(record, ensure_ascii=False, default=json_default) + "\n"
+        self._queue.put_nowait((line, future))
+        return future
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await asyncio.to_thread(self._write_lines, "".join(line for line, _ in batch))
+            except OSError as e:
+                logging.error(f"Ошибка записи журнала заявок: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self._log_records += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_lines(self, data: str):
+        if self._log_file is None:
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+        self._log_file.write(data)
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+
+    async def compact(self):
+        """Сворачивает журнал в новый снимок orders.json."""
+        async with self._lock:
+            # Новые изменения ждут на блокировке, а уже принятые дописываются
+            await self._queue.join()
+            if not self._log_records:
+                return
+            await asyncio.to_thread(self._write_snapshot)
+            self._log_records = 0
+        logging.info(f"Журнал заявок свёрнут, заявок в снимке: {len(self._orders)}")
+
+    def _write_snapshot(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            # Заявки переводятся в словари и кодируются по одной, со сдвигом на
+            # уровень списка: получается тот же текст, что у json.dump(..., indent=4),
+            # но без захода в default= и лишнего генератора на каждую заявку
+            separator = "\n    "
+            file.write("[")
+            for order in self._orders.values():
+                file.write(separator)
+                file.write(_SNAPSHOT_ENCODER.encode(order.to_dict()).replace("\n", "\n    "))
+                separator = ",\n    "
+            file.write("\n]" if self._orders else "]")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        # Если процесс упадёт до очистки журнала, повторное применение
+        # записей к новому снимку даст то же состояние
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        open(self.log_path, "w", encoding="utf-8").close()
+
+    async def _compaction_loop(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            if self._log_records >= self.compact_threshold:
+                try:
+                    await self.compact()
+                except OSError as e:
+                    logging.error(f"Ошибка при сворачивании журнала заявок: {e}")
+
+    async def _archive_loop(self):
+        while True:
+            try:
+                await self.archive_orders()
+            except OSError as e:
+                logging.error(f"Ошибка архивации заявок: {e}")
+            await asyncio.sleep(self.archive_interval)
+
+    def start(self):
+        """Запускает фоновую запись, сворачивание журнала и архивацию."""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        if self._compaction_task is None:
+            self._compaction_task = asyncio.create_task(self._compaction_loop())
+        if self.archive is not None and self.archive_interval > 0 and self._archive_task is None:
+            self._archive_task = asyncio.create_task(self._archive_loop())
+
+    async def close(self):
+        for task in (self._compaction_task, self._archive_task):
+            if task is not None:
+                task.cancel()
+        self._compaction_task = self._archive_task = None
+        await self.compact()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    # Чтение
+
+    def __len__(self):
+        """Число активных заявок (без архива)."""
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    async def exists(self, order_id: int) -> bool:
+        return order_id in self._orders or (self.archive is not None and order_id in self.archive)
+
+    async def get(self, order_id: int) -> Order | None:
+        order = self._orders.get(order_id)
+        if order is None and self.archive is not None:
+            return await self.archive.get(order_id)
+        return order
+
+    async def all(self) -> list[Order]:
+        """Все заявки, включая архив (читает все сегменты — только для пересчётов)."""
+        orders = list(self._orders.values())
+        if self.archive is not None:
+            orders.extend(await self.archive.all())
+        return orders
+
+    async def list_by_status(self, status: str) -> list[Order]:
+        return [self._orders[order_id] for order_id in self._status_ids.get(status, [])]
+
+    async def list_by_user(self, user_id: int) -> list[Order]:
+        orders = [self._orders[order_id] for order_id in self._user_ids.get(user_id, [])]
+        if self.archive is not None:
+            archived = await self.archive.list_by_user(user_id)
+            if archived:
+                orders = sorted(archived + orders, key=lambda order: order.id)
+        return orders
+
+    async def count_by_status(self) -> dict[str, int]:
+        counts = {status: len(ids) for status, ids in self._status_ids.items() if ids}
+        if self.archive is not None:
+            for status, count in self.archive.count_by_status().items():
+                counts[status] = counts.get(status, 0) + count
+        return counts
+
+    async def page(self, status: str | None = None, before_id: int | None = None,
+                   after_id: int | None = None, limit: int = 10) -> tuple[list[Order], bool, bool]:
+        """Страница заявок от новых к старым.
+
+        before_id — взять заявки старше указанной (листание вперёд), after_id —
+        новее указанной (листание назад). Возвращает (заявки, есть_новее, есть_старше).
+        """
+        ids = self._ids if status is None else self._status_ids.get(status, [])
+        if after_id is not None:
+            start = bisect.bisect_right(ids, after_id)
+            end = min(len(ids), start + limit)
+        else:
+            end = bisect.bisect_left(ids, before_id) if before_id is not None else len(ids)
+            start = max(0, end - limit)
+        page_ids = ids[start:end]
+        page_ids.reverse()
+        return [self._orders[order_id] for order_id in page_ids], end < len(ids), start > 0
+
+    # Изменение
+
+    async def add(self, order: dict) -> Order:
+        """Добавляет заявку, назначая ей следующий ID. Возвращает сохранённую заявку."""
+        order = Order.from_dict(order)
+        async with self._lock:
+            order.id = await self.id_allocator.allocate()
+            self._orders[order.id] = order
+            self._index_order(order)
+            saved = self._enqueue({"op": "put", "order": order})
+        await saved
+        return order
+
+    async def update(self, order_id: int, fields: dict) -> Order | None:
+        """Обновляет поля заявки. Возвращает заявку или None, если её нет."""
+        restored = False
+        async with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                order = await self._restore(order_id)
+                if order is None:
+                    return None
+                restored = True
+            old_status, old_user_id = order.get("status"), order.get("user_id")
+            order.update(fields)
+            if order.get("status") != old_status:
+                self._index_remove(self._status_ids.get(old_status, []), order_id)
+                self._index_insert(self._status_ids.setdefault(order.get("status"), []), order_id)
+            if order.get("user_id") != old_user_id:
+                self._index_remove(self._user_ids.get(old_user_id, []), order_id)
+                self._index_insert(self._user_ids.setdefault(order.get("user_id"), []), order_id)
+            saved = self._enqueue({"op": "set", "id": order_id, "fields": fields})
+        await saved
+        if restored:
+            # Скрыть архивную копию можно, только когда заявка уже в журнале
+            await self.archive.remove([order_id])
+        return order
+
+    async def _restore(self, order_id: int) -> Order | None:
+        """Возвращает заявку из архива в основное хранилище (вызывается под self._lock)."""
+        if self.archive is None:
+            return None
+        archived = await self.archive.get(order_id)
+        if archived is None:
+            return None
+        order = archived.copy()
+        self._orders[order_id] = order
+        self._index_order(order)
+        self._enqueue({"op": "put", "order": order})
+        logging.info(f"Заявка #{order_id} возвращена из архива.")
+        return order
+
+    async def delete(self, order_id: int) -> Order | None:
+        """Удаляет заявку. Возвращает удалённую заявку или None."""
+        async with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                if self.archive is None or order_id not in self.archive:
+                    return None
+                order = await self.archive.get(order_id)
+                await self.archive.remove([order_id])
+                return order
+            self._unindex_order(order)
+            saved = self._enqueue({"op": "del", "id": order_id})
+        await saved
+        return order
+
+    # Архивация
+
+    async def archive_orders(self, now: datetime | None = None) -> int:
+        """Переносит завершённые заявки в архив. Возвращает число перенесённых."""
+        if self.archive is None:
+            return 0
+        now = now or datetime.now()
+        candidates = [
+            order.copy() for order in await self.list_by_status(STATUS_PROCESSED)
+            if is_archivable(order, now, self.archive_after_days)
+        ]
+        if not candidates:
+            return 0
+        await self.archive.add(candidates)
+
+        # Пока писались сегменты, заявку могли изменить или удалить: тогда
+        # она остаётся здесь, а её копия в архиве скрывается
+        saved, changed = [], []
+        async with self._lock:
+            for snapshot in candidates:
+                order = self._orders.get(snapshot.id)
+                if order != snapshot:
+                    changed.append(snapshot.id)
+                    continue
+                del self._orders[snapshot.id]
+                self._unindex_order(order)
+                saved.append(self._enqueue({"op": "del", "id": snapshot.id}))
+        await asyncio.gather(*saved)
+        await self.archive.remove(changed)
+        await self.compact()
+        logging.info(f"В архив перенесено заявок: {len(saved)}")
+        return len(saved)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from rate_limiter import TokenBucket
+
+# Классы приоритета исходящих запросов: меньше — важнее
+PRIORITY_INTERACTIVE = 0   # ответы пользователю, который сейчас в диалоге с ботом
+PRIORITY_NOTIFICATION = 1  # уведомления пользователям о заявках
+PRIORITY_BROADCAST = 2     # рассылки администраторам
+PRIORITY_NAMES = ("interactive", "notification", "broadcast")
+
+# Методы, которые не отправляют сообщений в чаты и не должны ждать в очереди
+_DIRECT_METHODS = {"getUpdates", "getMe", "setWebhook", "deleteWebhook", "getWebhookInfo", "getFile", "close", "logOut"}
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Вызовы Telegram API внутри блока (и в созданных в нём задачах) идут с этим приоритетом."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class OutboundQueue(BaseRequestMiddleware):
+    """Очередь исходящих запросов к Telegram с приоритетами и общим лимитом частоты.
+
+    Подключается мидлварью сессии бота, поэтому через неё проходят и
+    message.answer, и bot.send_message, и рассылки. Приоритет берётся из
+    контекста (см. priority()), по умолчанию запрос считается ответом в
+    диалоге. Воркеры забирают запросы по одному, не чаще rate в секунду,
+    всегда из самого важного непустого класса: пачка рассылок не задерживает
+    ответ пользователю.
+
+    У каждого класса своя очередь на max_size запросов; когда она заполнена,
+    отправитель ждёт места, то есть переполненные рассылки притормаживают
+    только сами себя. До start() и после close() запросы идут напрямую.
+    """
+
+    def __init__(self, rate: float = 30, workers: int = 4, max_size: int = 1000, burst: float = 1, metrics=None):
+        # Ведро почти без запаса: за любую секунду уходит не больше rate запросов
+        self.limiter = TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_size = max_size
+        # Задаётся и позже: метрики бота создаются после очереди
+        self.metrics = metrics
+        self._queues = [deque() for _ in PRIORITY_NAMES]
+        self._space: list[asyncio.Semaphore] = []
+        self._ready: asyncio.Semaphore | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._background: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues)
+
+    def _gauge(self, level: int, amount: int):
+        if self.metrics is not None:
+            self.metrics.gauge_add("bot_outbound_queue_depth", amount, priority=PRIORITY_NAMES[level])
+
+    async def __call__(self, make_request, bot, method):
+        if not self._tasks or method.__api_method__ in _DIRECT_METHODS:
+            return await make_request(bot, method)
+        level = _priority.get()
+        await self._space[level].acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[level].append((time.monotonic(), make_request, bot, method, future))
+        self._gauge(level, 1)
+        self._ready.release()
+        return await future
+
+    def _pop(self):
+        for level, queue in enumerate(self._queues):
+            if queue:
+                self._space[level].release()
+                self._gauge(level, -1)
+                return level, queue.popleft()
+        raise RuntimeError("Очередь исходящих запросов пуста")
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            # Класс выбирается после ожидания лимита, чтобы ответ, пришедший
+            # за это время, обогнал уже ждущие рассылки
+            await self.limiter.acquire()
+            level, (enqueued_at, make_request, bot, method, future) = self._pop()
+            if future.done():
+                # Отправитель перестал ждать (например, обработчик отменён)
+                continue
+            if self.metrics is not None:
+                name = PRIORITY_NAMES[level]
+                self.metrics.observe("bot_outbound_wait_seconds", time.monotonic() - enqueued_at, priority=name)
+                self.metrics.inc("bot_outbound_requests_total", priority=name)
+            try:
+                result = await make_request(bot, method)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def spawn(self, coro, level: int = PRIORITY_BROADCAST) -> asyncio.Task:
+        """Запускает отправку в фоне, чтобы обработчик не ждал её окончания.
+
+        close() дожидается таких задач, так что при остановке бота они не теряются.
+        """
+        with priority(level):
+            task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def start(self):
+        if self._tasks:
+            return
+        self._space = [asyncio.Semaphore(self.max_size) for _ in PRIORITY_NAMES]
+        self._ready = asyncio.Semaphore(0)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, timeout: float = 10.0):
+        """Дожидается фоновых отправок и очереди, затем останавливает воркеров."""
+        if self._background:
+            _, pending = await asyncio.wait(set(self._background), timeout=timeout)
+            if pending:
+                logging.warning(f"При остановке не дождались фоновых отправок: {len(pending)}")
+        deadline = time.monotonic() + timeout
+        while len(self) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for level, queue in enumerate(self._queues):
+            while queue:
+                queue.popleft()[-1].cancel()
+                self._gauge(level, -1)
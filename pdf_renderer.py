@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+class RendererBusy(RuntimeError):
+    """Все места для рендера заняты; запрос стоит повторить позже."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_file_name(sha256: str, engine: str, page: int, dpi: int, fmt: str) -> str:
+    return f"{sha256}-{engine}-p{page}-{dpi}.{fmt}"
+
+
+# Функции ниже выполняются в дочерних процессах, поэтому объявлены на уровне
+# модуля. Страницы пишутся сразу в кеш, обратно передаются только имена и размеры.
+
+def _render_fitz(pdf_path, cache_dir, sha256, dpi, fmt):
+    import fitz
+
+    pages = []
+    with fitz.open(pdf_path) as document:
+        for page_num in range(len(document)):
+            pix = document.load_page(page_num).get_pixmap(dpi=dpi)
+            name = page_file_name(sha256, "fitz", page_num + 1, dpi, fmt)
+            tmp_path = os.path.join(cache_dir, name + ".tmp")
+            pix.save(tmp_path, output=fmt)
+            os.replace(tmp_path, os.path.join(cache_dir, name))
+            pages.append((name, os.path.getsize(os.path.join(cache_dir, name))))
+    return pages
+
+
+def _render_poppler(pdf_path, cache_dir, sha256, dpi, fmt, poppler_path):
+    from pdf2image import convert_from_path
+
+    pages = []
+    images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
+    for i, image in enumerate(images):
+        name = page_file_name(sha256, "poppler", i + 1, dpi, fmt)
+        tmp_path = os.path.join(cache_dir, name + ".tmp")
+        image.save(tmp_path, "JPEG" if fmt == "jpg" else fmt.upper())
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+        pages.append((name, os.path.getsize(os.path.join(cache_dir, name))))
+    return pages
+
+
+class PdfRenderer:
+    """Сервис растеризации PDF в пуле процессов с кешем на диске.
+
+    Страницы кешируются по ключу (sha256 PDF, движок, страница, DPI, формат), так что
+    повторный запрос того же документа не рендерит его заново, даже после
+    перезапуска. Размер кеша ограничен max_cache_bytes, при переполнении
+    удаляются давно не использованные документы. Одновременно рендерятся не
+    больше max_workers документов и ещё max_pending ждут свободного воркера;
+    если заняты все места, render сразу выбрасывает RendererBusy. Запросы
+    документа, который уже рендерится, ждут этот рендер и мест не занимают.
+    """
+
+    def __init__(self, cache_dir: str, max_cache_bytes: int = 200 * 1024 * 1024,
+                 max_workers: int = 2, max_pending: int = 8,
+                 engine: str = "fitz", poppler_path: str | None = None):
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.engine = engine
+        self.poppler_path = poppler_path
+        self._slots = asyncio.Semaphore(max_workers + max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # (sha256, engine, dpi, fmt) -> список файлов страниц; время последнего доступа и размер
+        self._documents: dict[tuple, list[str]] = {}
+        self._access: dict[tuple, float] = {}
+        self._sizes: dict[tuple, int] = {}
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    # Индекс кеша
+
+    def _load_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entries = []
+        for entry in entries:
+            paths = [os.path.join(self.cache_dir, name) for name in entry["pages"]]
+            if "engine" not in entry:
+                # Страницы из кеша без движка в ключе: неизвестно, кто их отрендерил
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                continue
+            if not all(os.path.exists(path) for path in paths):
+                continue
+            key = (entry["sha256"], entry["engine"], entry["dpi"], entry["fmt"])
+            self._documents[key] = paths
+            self._access[key] = entry["accessed"]
+            self._sizes[key] = sum(os.path.getsize(path) for path in paths)
+        self._loaded = True
+
+    def _index_entries(self) -> list[dict]:
+        return [
+            {
+                "sha256": key[0], "engine": key[1], "dpi": key[2], "fmt": key[3],
+                "pages": [os.path.basename(path) for path in paths],
+                "accessed": self._access[key],
+            }
+            for key, paths in self._documents.items()
+        ]
+
+    def _write_index(self, entries: list[dict]):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, self._index_path)
+
+    def _evict(self, keep: tuple):
+        total = sum(self._sizes.values())
+        for key in sorted(self._access, key=self._access.get):
+            if total <= self.max_cache_bytes:
+                break
+            if key == keep:
+                continue
+            for path in self._documents.pop(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            del self._access[key]
+            total -= self._sizes.pop(key)
+            logging.info(f"Из кеша PDF удалён документ {key[0][:12]} ({key[1]}, {key[2]} dpi, {key[3]})")
+
+    # Рендеринг
+
+    async def render(self, pdf_path: str, dpi: int = 150, fmt: str = "png", engine: str | None = None,
+                     poppler_path: str | None = None) -> list[str]:
+        """Возвращает пути к страницам PDF в кеше, рендеря их при необходимости.
+
+        poppler_path заменяет путь к Poppler из настроек для этого вызова.
+        """
+        async with self._load_lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load_index)
+        sha256 = await asyncio.to_thread(file_sha256, pdf_path)
+        key = (sha256, engine or self.engine, dpi, fmt)
+
+        paths = self._documents.get(key)
+        if paths is not None:
+            self._access[key] = time.time()
+            return paths
+
+        # Один и тот же документ рендерится один раз, даже если его запросили параллельно
+        future = self._inflight.get(key)
+        if future is None:
+            # Каждый рендер в _inflight занимает или ждёт место в _slots
+            if len(self._inflight) >= self.max_workers + self.max_pending:
+                raise RendererBusy(f"В работе уже {self.max_workers + self.max_pending} PDF")
+            future = asyncio.ensure_future(self._render(pdf_path, key, poppler_path or self.poppler_path))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _render(self, pdf_path: str, key: tuple, poppler_path: str | None) -> list[str]:
+        sha256, engine, dpi, fmt = key
+        async with self._slots:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            if engine == "poppler":
+                pages = await loop.run_in_executor(
+                    self._executor, _render_poppler, pdf_path, self.cache_dir, sha256, dpi, fmt, poppler_path
+                )
+            else:
+                pages = await loop.run_in_executor(
+                    self._executor, _render_fitz, pdf_path, self.cache_dir, sha256, dpi, fmt
+                )
+        logging.info(f"PDF {os.path.basename(pdf_path)} отрендерен ({engine}, {len(pages)} стр.) "
+                     f"за {time.perf_counter() - started:.2f} с")
+
+        paths = [os.path.join(self.cache_dir, name) for name, _ in pages]
+        self._documents[key] = paths
+        self._sizes[key] = sum(size for _, size in pages)
+        self._access[key] = time.time()
+        self._evict(keep=key)
+        await asyncio.to_thread(self._write_index, self._index_entries())
+        return paths
+
+    async def close(self):
+        if self._loaded:
+            await asyncio.to_thread(self._write_index, self._index_entries())
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
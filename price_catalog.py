@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from aiogram.utils.formatting import Bold, Pre, Text
+
+# Лимит длины одного сообщения Telegram
+MESSAGE_LIMIT = 4096
+HEADERS = ["Услуга", "Цена (KZT)", "Примечание"]
+
+
+def _table(services: list[dict]) -> str:
+    from tabulate import tabulate
+
+    rows = [[service["name"], service["price"], service["note"]] for service in services]
+    return tabulate(rows, HEADERS, tablefmt="grid")
+
+
+def render_prices(services: list[dict]) -> Text:
+    """Прайс-лист одним сообщением: заголовок и таблица моноширинным блоком."""
+    return Text("💲 ", Bold("Стоимость услуг:"), "\n\n", Pre(_table(services)))
+
+
+def render_chunks(services: list[dict], max_length: int = MESSAGE_LIMIT) -> list[str]:
+    """Прайс-лист в MarkdownV2, разбитый на сообщения по строкам таблицы.
+
+    В отличие от split_message, граница не попадает внутрь блока кода:
+    каждая часть — законченная таблица со своей шапкой.
+    """
+    def chunk(group: list[dict], first: bool) -> str:
+        return (render_prices(group) if first else Text(Pre(_table(group)))).as_markdown()
+
+    chunks, group = [], []
+    for service in services:
+        if group and len(chunk(group + [service], not chunks)) > max_length:
+            chunks.append(chunk(group, not chunks))
+            group = []
+        group.append(service)
+    chunks.append(chunk(group, not chunks))
+    return chunks
+
+
+class _Rendered:
+    __slots__ = ("services", "markdown", "text", "chunks")
+
+    def __init__(self, services: list[dict]):
+        self.services = services
+        formatted = render_prices(services)
+        self.markdown = formatted.as_markdown()
+        self.text = formatted.render()[0]
+        self.chunks = render_chunks(services)
+
+
+class PriceCatalog:
+    """Прайс-лист из prices.json, разобранный и отформатированный один раз.
+
+    Таблица в MarkdownV2, простой текст и готовые части для отправки
+    хранятся в памяти. Файл проверяется не чаще раза в check_interval
+    секунд: сначала по mtime и размеру, а при их изменении — по sha256,
+    так что перезапись тем же содержимым не вызывает повторного
+    форматирования. Правки prices.json подхватываются без перезапуска бота.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._rendered: _Rendered | None = None
+        self._stat = None
+        self._sha256 = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _read(self):
+        with open(self.path, "rb") as file:
+            raw = file.read()
+        sha256 = hashlib.sha256(raw).hexdigest()
+        if sha256 == self._sha256:
+            return sha256, None
+        return sha256, _Rendered(json.loads(raw)["services"])
+
+    async def reload(self):
+        """Перечитывает prices.json, если он изменился."""
+        async with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                stat = (stat.st_mtime_ns, stat.st_size)
+                if stat == self._stat and self._rendered is not None:
+                    return
+                sha256, rendered = await asyncio.to_thread(self._read)
+            except (OSError, ValueError, KeyError) as e:
+                if self._rendered is None:
+                    raise
+                # Файл правят прямо сейчас или в нём ошибка — работаем со старой версией
+                logging.error(f"Не удалось перечитать прайс-лист {self.path}: {e}")
+                return
+            self._stat = stat
+            if rendered is not None:
+                self._sha256, self._rendered = sha256, rendered
+                logging.info(f"Прайс-лист загружен: {len(rendered.services)} услуг")
+
+    async def get(self) -> _Rendered:
+        """Актуальный прайс-лист; файл проверяется не чаще раза в check_interval."""
+        if self._rendered is None or time.monotonic() - self._checked_at >= self.check_interval:
+            await self.reload()
+        return self._rendered
+
+    async def send(self, message):
+        """Отправляет прайс-лист текстом в чат сообщения."""
+        rendered = await self.get()
+        for chunk in rendered.chunks:
+            await message.answer(chunk, parse_mode="MarkdownV2")
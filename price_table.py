@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import os
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from pdf_renderer import PdfRenderer, file_sha256
+
+
+class PriceTable:
+    """Прайс-лист из PDF, отрендеренный один раз и отправляемый по file_id.
+
+    Страницы берутся из кеша PdfRenderer при запуске или когда меняется
+    содержимое PDF (проверяется sha256). После первой загрузки в Telegram
+    сохраняются file_id фотографий, и дальше отправляется только
+    идентификатор. Кеш (хеш PDF, пути к картинкам, file_id) хранится в JSON
+    и переживает перезапуск бота.
+    """
+
+    def __init__(self, pdf_path: str, renderer: PdfRenderer, cache_path: str, dpi: int = 200):
+        self.pdf_path = pdf_path
+        self.renderer = renderer
+        self.cache_path = cache_path
+        self.dpi = dpi
+        self._cache = {"sha256": None, "images": [], "file_ids": []}
+        self._pdf_stat = None
+        self._lock = asyncio.Lock()
+        # Загрузки страниц в Telegram идут по одной, чтобы параллельные
+        # первые запросы не загружали одну и ту же страницу каждый
+        self._upload_lock = asyncio.Lock()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                self._cache = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def _save_cache(self, cache: dict):
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(cache, file, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.cache_path)
+
+    def _stat(self):
+        stat = os.stat(self.pdf_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    async def prepare(self):
+        """Готовит картинки при запуске бота или после изменения PDF."""
+        async with self._lock:
+            await asyncio.to_thread(self._load_cache)
+            stat = self._stat()
+            sha256 = await asyncio.to_thread(file_sha256, self.pdf_path)
+            images_ok = self._cache["images"] and all(os.path.exists(path) for path in self._cache["images"])
+            if sha256 != self._cache["sha256"] or not images_ok:
+                images = await self.renderer.render(self.pdf_path, dpi=self.dpi)
+                # file_id старых страниц не переиспользуются, если PDF изменился
+                file_ids = self._cache["file_ids"] if sha256 == self._cache["sha256"] else []
+                file_ids = (file_ids + [None] * len(images))[:len(images)]
+                self._cache = {"sha256": sha256, "images": images, "file_ids": file_ids}
+                await asyncio.to_thread(self._save_cache, dict(self._cache))
+                logging.info(f"Прайс-лист подготовлен: {len(images)} стр.")
+            self._pdf_stat = stat
+
+    async def _ensure_fresh(self):
+        # Дешёвая проверка по mtime/размеру; хеш считается, только если они изменились
+        if self._pdf_stat is None or self._stat() != self._pdf_stat:
+            await self.prepare()
+
+    async def send(self, message: Message):
+        """Отправляет страницы прайс-листа в чат сообщения."""
+        await self._ensure_fresh()
+        changed = False
+        for i in range(len(self._cache["images"])):
+            file_id = self._cache["file_ids"][i]
+            if file_id and await self._send_by_file_id(message, file_id, i):
+                continue
+            async with self._upload_lock:
+                # Пока ждали, страницу мог загрузить параллельный запрос
+                uploaded_id = self._cache["file_ids"][i]
+                if uploaded_id and uploaded_id != file_id and await self._send_by_file_id(message, uploaded_id, i):
+                    continue
+                image_path = self._cache["images"][i]
+                if not os.path.exists(image_path):
+                    # Страница вытеснена из кеша рендера — готовим заново
+                    await self.prepare()
+                    image_path = self._cache["images"][i]
+                sent = await message.answer_photo(FSInputFile(image_path))
+                self._cache["file_ids"][i] = sent.photo[-1].file_id
+                changed = True
+        if changed:
+            await asyncio.to_thread(self._save_cache, dict(self._cache))
+
+    @staticmethod
+    async def _send_by_file_id(message: Message, file_id: str, page: int) -> bool:
+        try:
+            await message.answer_photo(file_id)
+            return True
+        except TelegramBadRequest:
+            # file_id недействителен (например, сменился токен бота) — загружаем заново
+            logging.warning(f"Не удалось отправить прайс-лист по file_id, страница {page + 1}")
+            return False
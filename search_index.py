@@ -0,0 +1,288 @@
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+# Поля заявки, по которым ищут администраторы
+SEARCH_FIELDS = ("full_name", "address", "reason", "service")
+
+_WORD = re.compile(r"\w+")
+_NON_DIGIT = re.compile(r"\D")
+# Телефон в запросе, набранный с пробелами, дефисами или скобками
+_PHONE = re.compile(r"\+?\d[\d\s()-]{5,}\d")
+# Окончания, которые отбрасываются, чтобы «Абая», «переустановку» и
+# «переустановка» находили друг друга. Это не полноценный стеммер, а
+# дешёвое приближение: проверяются от длинных к коротким.
+_ENDINGS = (
+    frozenset(("ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими")),
+    frozenset(("ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев",
+               "ую", "юю", "ию", "ия", "ие", "ки")),
+    frozenset(("а", "я", "о", "е", "и", "ы", "у", "ю", "ь", "й")),
+)
+_MIN_STEM = 3
+# Префикс короче этого ищется только как целое слово, иначе одна буква
+# вытащила бы половину индекса
+_MIN_PREFIX = 2
+# Меняется вместе с правилами нормализации слов: сохранённый индекс
+# другой версии строится заново
+INDEX_VERSION = 1
+# Сколько ID подряд проверять, отбирая новые заявки из большого результата
+_WALK = 2000
+
+
+# Словарь заявок невелик, поэтому основы слов кешируются
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    if not word.isalpha():
+        return word
+    for length, endings in zip((3, 2, 1), _ENDINGS):
+        if len(word) - length >= _MIN_STEM and word[-length:] in endings:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Слова текста в нижнем регистре, ё → е, без типичных русских окончаний."""
+    if not text:
+        return []
+    text = str(text).lower().replace("ё", "е")
+    return [_stem(word) for word in _WORD.findall(text)]
+
+
+def phone_terms(phone: str) -> list[str]:
+    """Номер телефона цифрами, с кодом страны и без него (+7 / 8)."""
+    digits = _NON_DIGIT.sub("", str(phone or ""))
+    if not digits:
+        return []
+    terms = {"#" + digits}
+    if len(digits) == 11 and digits[0] in "78":
+        terms.add("#" + digits[1:])
+    return sorted(terms)
+
+
+def order_terms(order: dict) -> set[str]:
+    terms = set()
+    for field in SEARCH_FIELDS:
+        terms.update(tokenize(order.get(field)))
+    terms.update(phone_terms(order.get("phone_number")))
+    return terms
+
+
+class SearchIndex:
+    """Инвертированный индекс заявок для поиска администраторами.
+
+    Для каждого слова (после нормализации) хранится множество ID заявок,
+    словарь слов отсортирован, так что слово запроса ищется и целиком, и как
+    начало слов («абай» найдёт «Абая»). Цифры запроса ищутся и среди слов, и
+    по началу номеров телефонов. Все слова запроса должны встретиться в заявке.
+
+    Индекс обновляется при каждом создании, правке и отмене заявки: слова,
+    которые нужно убрать, берутся из прежней версии заявки, так что в памяти
+    и на диске хранятся только списки ID по словам. Индекс периодически
+    сохраняется в JSON и при запуске загружается, а не строится заново; если
+    число заявок в нём разошлось с хранилищем или сменилась нормализация
+    слов (INDEX_VERSION), индекс пересобирается. Загруженные списки
+    превращаются в множества только при первом обращении к слову.
+    """
+
+    def __init__(self, path: str, save_interval: float = 10.0):
+        self.path = path
+        self.save_interval = save_interval
+        # Слово -> ID заявок: множество или список, ещё не тронутый после загрузки
+        self._postings: dict[str, set[int] | list[int]] = {}
+        self._terms: list[str] = []
+        self._count = 0
+        self._max_id = 0
+        # Снимок, который сейчас пишется на диск: его множества не меняются,
+        # а копируются перед первым изменением
+        self._saving: dict | None = None
+        self._dirty = False
+        self._save_task: asyncio.Task | None = None
+
+    def __len__(self):
+        return self._count
+
+    def _ids(self, term: str, writable: bool = False) -> set[int] | None:
+        ids = self._postings.get(term)
+        if ids is None:
+            return None
+        if type(ids) is list or (writable and self._saving is not None and self._saving.get(term) is ids):
+            ids = self._postings[term] = set(ids)
+        return ids
+
+    # Изменения
+
+    def _add_terms(self, order_id: int, terms: set[str]):
+        for term in terms:
+            ids = self._ids(term, writable=True)
+            if ids is None:
+                ids = self._postings[term] = set()
+                bisect.insort(self._terms, term)
+            ids.add(order_id)
+
+    def _remove_terms(self, order_id: int, terms: set[str]):
+        for term in terms:
+            ids = self._ids(term, writable=True)
+            if ids is None:
+                continue
+            ids.discard(order_id)
+            if not ids:
+                del self._postings[term]
+                i = bisect.bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    del self._terms[i]
+
+    def add(self, order: dict):
+        """Добавляет новую заявку."""
+        self._add_terms(order["id"], order_terms(order))
+        self._count += 1
+        self._max_id = max(self._max_id, order["id"])
+        self._dirty = True
+
+    def update(self, old: dict, new: dict):
+        """Переиндексирует заявку после правки; old — версия до изменения."""
+        old_terms, new_terms = order_terms(old), order_terms(new)
+        if old_terms != new_terms:
+            self._remove_terms(new["id"], old_terms - new_terms)
+            self._add_terms(new["id"], new_terms - old_terms)
+            self._dirty = True
+
+    def remove(self, order: dict):
+        """Убирает отменённую заявку."""
+        self._remove_terms(order["id"], order_terms(order))
+        self._count -= 1
+        self._dirty = True
+
+    def rebuild(self, orders: list[dict]):
+        postings = {}
+        for order in orders:
+            for term in order_terms(order):
+                postings.setdefault(term, set()).add(order["id"])
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._count = len(orders)
+        self._max_id = max((order["id"] for order in orders), default=0)
+        self._dirty = True
+
+    # Поиск
+
+    def _prefixed(self, prefix: str) -> list[set[int]]:
+        if len(prefix) < _MIN_PREFIX:
+            ids = self._ids(prefix)
+            return [ids] if ids else []
+        found = []
+        i = bisect.bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            found.append(self._ids(self._terms[i]))
+            i += 1
+        return found
+
+    def _matching(self, word: str) -> set[int]:
+        found = self._prefixed(_stem(word))
+        if word.isdigit() and len(word) >= 3:
+            # Цифры могут быть и номером дома, и частью телефона
+            if len(word) == 11 and word[0] in "78":
+                word = word[1:]
+            found += self._prefixed("#" + word)
+        if len(found) == 1:
+            return found[0]
+        return set().union(*found)
+
+    def _newest(self, ids: set[int], limit: int) -> list[int]:
+        if len(ids) > _WALK:
+            # Слово есть почти в каждой заявке: быстрее пройти ID от последнего
+            # вниз, чем выбирать наибольшие из всего множества
+            found = []
+            for order_id in range(self._max_id, max(self._max_id - _WALK, 0), -1):
+                if order_id in ids:
+                    found.append(order_id)
+                    if len(found) == limit:
+                        return found
+        return heapq.nlargest(limit, ids)
+
+    def search(self, query: str, limit: int = 10) -> list[int]:
+        """ID заявок, подходящих под все слова запроса, от новых к старым."""
+        query = _PHONE.sub(lambda match: _NON_DIGIT.sub("", match.group()), str(query))
+        words = _WORD.findall(query.lower().replace("ё", "е"))
+        if not words:
+            return []
+        result = None
+        # Сначала самые редкие слова: пересечение быстро становится маленьким
+        for ids in sorted((self._matching(word) for word in words), key=len):
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return self._newest(result, limit)
+
+    # Загрузка и сохранение
+
+    async def load(self, store):
+        """Загружает индекс с диска; если он устарел или повреждён — строит по хранилищу."""
+        state = await asyncio.to_thread(self._read)
+        total = sum((await store.count_by_status()).values())
+        if state is None or state[0] != total:
+            logging.info("Поисковый индекс заявок строится по хранилищу.")
+            await asyncio.to_thread(self.rebuild, await store.all())
+            await self.save()
+            return
+        self._count, self._max_id, self._postings, self._terms = state
+        logging.info(f"Поисковый индекс загружен: {self._count} заявок, {len(self._terms)} слов")
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return data["count"], data["max_id"], data["postings"], sorted(data["postings"])
+
+    def _write(self, count: int, max_id: int, postings: dict):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": INDEX_VERSION, "count": count, "max_id": max_id,
+                    "postings": {term: list(ids) for term, ids in postings.items()},
+                },
+                file, ensure_ascii=False, separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        if not self._dirty or self._saving is not None:
+            return
+        self._dirty = False
+        # Снимок — неглубокая копия словаря; пока он пишется в отдельном потоке,
+        # изменяемые множества подменяются копиями (_ids с writable=True)
+        self._saving = dict(self._postings)
+        try:
+            await asyncio.to_thread(self._write, self._count, self._max_id, self._saving)
+        except OSError:
+            self._dirty = True
+            raise
+        finally:
+            self._saving = None
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self.save()
+            except OSError as e:
+                logging.error(f"Ошибка сохранения поискового индекса: {e}")
+
+    def start(self):
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_loop())
+
+    async def close(self):
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        await self.save()
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import os
+
+import aiosqlite
+
+from order_archive import OrderArchive
+from order_model import Order, json_default
+from order_store import OrderStore
+from statuses import LEGACY_STATUSES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    status TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders (user_id);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at);
+"""
+
+
+class SqliteOrderStore:
+    """Хранилище заявок в SQLite (режим WAL) с тем же интерфейсом, что и OrderStore.
+
+    Заявка целиком хранится в колонке data (JSON), а поля, по которым идут
+    выборки (user_id, status, created_at), продублированы в индексируемых
+    колонках. Запросы выполняются aiosqlite в отдельном потоке, не блокируя
+    цикл событий.
+
+    Прочитанные заявки возвращаются как Order, как и из OrderStore.
+    """
+
+    def __init__(self, path: str, migrate_from: str | None = None, migrate_archive_dir: str | None = None):
+        self.path = path
+        self.migrate_from = migrate_from
+        self.migrate_archive_dir = migrate_archive_dir
+        self._db: aiosqlite.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        """Открывает базу и при первом запуске переносит заявки из orders.json."""
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.executescript(SCHEMA)
+        # Старые варианты написания статусов приводятся к единому
+        for legacy, status in LEGACY_STATUSES.items():
+            await self._db.execute(
+                "UPDATE orders SET status = ?, data = json_set(data, '$.status', ?) WHERE status = ?",
+                (status, status, legacy),
+            )
+        await self._db.commit()
+
+        if self.migrate_from and os.path.exists(self.migrate_from) and not await self._count():
+            await self.migrate_from_json(self.migrate_from, self.migrate_archive_dir)
+        logging.info(f"База заявок SQLite: {self.path}, заявок: {await self._count()}")
+
+    async def migrate_from_json(self, json_path: str, archive_dir: str | None = None) -> int:
+        """Однократно переносит заявки из orders.json (с учётом журнала изменений)
+        и из архива завершённых заявок в archive_dir, если он задан.
+
+        Счётчик AUTOINCREMENT продолжает нумерацию с границы IdAllocator
+        JSON-хранилища: номера, выданные до переноса (в том числе удалённых
+        заявок), повторно не выдаются."""
+        source = OrderStore(json_path, archive=OrderArchive(archive_dir) if archive_dir else None)
+        await source.load()
+        orders = await source.all()
+        archived = len(source.archive) if source.archive is not None else 0
+        last_id = max(
+            source.id_allocator.reserved,
+            source.archive.max_id() if source.archive is not None else 0,
+            max((order.id for order in orders), default=0),
+        )
+        async with self._lock:
+            await self._db.executemany(
+                "INSERT OR REPLACE INTO orders (id, user_id, status, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                [self._row(order) for order in orders],
+            )
+            await self._db.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'orders' AND seq < ?", (last_id, last_id)
+            )
+            await self._db.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')",
+                (last_id,),
+            )
+            await self._db.commit()
+        logging.info(f"Перенесено заявок из {json_path} в SQLite: {len(orders)}, из них из архива: {archived}")
+        return len(orders)
+
+    def start(self):
+        """Фоновых задач у SQLite-хранилища нет; метод оставлен для единого интерфейса."""
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    @staticmethod
+    def _row(order: Order):
+        return (
+            order.id,
+            order.get("user_id"),
+            order.get("status"),
+            order.get("created_at"),
+            json.dumps(order, ensure_ascii=False, default=json_default),
+        )
+
+    async def _count(self) -> int:
+        async with self._db.execute("SELECT COUNT(*) FROM orders") as cursor:
+            (count,) = await cursor.fetchone()
+        return count
+
+    async def _fetch_orders(self, query: str, params=()) -> list[Order]:
+        async with self._db.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+        return [Order.from_dict(json.loads(data)) for (data,) in rows]
+
+    # Чтение
+
+    async def exists(self, order_id: int) -> bool:
+        async with self._db.execute("SELECT 1 FROM orders WHERE id = ?", (order_id,)) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def get(self, order_id: int) -> Order | None:
+        return await self._get(order_id)
+
+    async def _get(self, order_id: int) -> Order | None:
+        # update и delete читают заявку через _get: get подменяется обёрткой
+        # Metrics.instrument, и каждое изменение засчитывалось бы ещё и как чтение
+        orders = await self._fetch_orders("SELECT data FROM orders WHERE id = ?", (order_id,))
+        return orders[0] if orders else None
+
+    async def all(self) -> list[Order]:
+        return await self._fetch_orders("SELECT data FROM orders ORDER BY id")
+
+    async def list_by_status(self, status: str) -> list[Order]:
+        return await self._fetch_orders("SELECT data FROM orders WHERE status = ? ORDER BY id", (status,))
+
+    async def list_by_user(self, user_id: int) -> list[Order]:
+        return await self._fetch_orders("SELECT data FROM orders WHERE user_id = ? ORDER BY id", (user_id,))
+
+    async def count_by_status(self) -> dict[str, int]:
+        async with self._db.execute("SELECT status, COUNT(*) FROM orders GROUP BY status") as cursor:
+            return dict(await cursor.fetchall())
+
+    async def page(self, status: str | None = None, before_id: int | None = None,
+                   after_id: int | None = None, limit: int = 10) -> tuple[list[Order], bool, bool]:
+        """Страница заявок от новых к старым (см. OrderStore.page)."""
+        where, params = ("WHERE status = ?", [status]) if status is not None else ("WHERE 1", [])
+        if after_id is not None:
+            orders = await self._fetch_orders(
+                f"SELECT data FROM orders {where} AND id > ? ORDER BY id ASC LIMIT ?", (*params, after_id, limit + 1)
+            )
+            has_newer = len(orders) > limit
+            orders = orders[:limit]
+            orders.reverse()
+            has_older = await self._exists_where(f"{where} AND id <= ?", (*params, after_id))
+        else:
+            bound = before_id if before_id is not None else -1
+            cond = "AND id < ?" if before_id is not None else "AND id > ?"
+            orders = await self._fetch_orders(
+                f"SELECT data FROM orders {where} {cond} ORDER BY id DESC LIMIT ?", (*params, bound, limit + 1)
+            )
+            has_older = len(orders) > limit
+            orders = orders[:limit]
+            has_newer = before_id is not None and await self._exists_where(f"{where} AND id >= ?", (*params, before_id))
+        return orders, has_newer, has_older
+
+    async def _exists_where(self, where: str, params) -> bool:
+        async with self._db.execute(f"SELECT EXISTS (SELECT 1 FROM orders {where})", params) as cursor:
+            (found,) = await cursor.fetchone()
+        return bool(found)
+
+    # Изменение
+
+    async def add(self, order: dict) -> Order:
+        """Добавляет заявку; ID назначает SQLite (AUTOINCREMENT не переиспользует номера)."""
+        order = Order.from_dict(order)
+        async with self._lock:
+            cursor = await self._db.execute(
+                "INSERT INTO orders (user_id, status, created_at, data) VALUES (?, ?, ?, '{}')",
+                (order.get("user_id"), order.get("status"), order.get("created_at")),
+            )
+            order.id = cursor.lastrowid
+            await self._db.execute(
+                "UPDATE orders SET data = ? WHERE id = ?",
+                (json.dumps(order, ensure_ascii=False, default=json_default), order.id),
+            )
+            await self._db.commit()
+        return order
+
+    async def update(self, order_id: int, fields: dict) -> Order | None:
+        """Обновляет поля заявки. Возвращает заявку или None, если её нет."""
+        async with self._lock:
+            order = await self._get(order_id)
+            if order is None:
+                return None
+            order.update(fields)
+            await self._db.execute(
+                "UPDATE orders SET user_id = ?, status = ?, created_at = ?, data = ? WHERE id = ?",
+                self._row(order)[1:] + (order_id,),
+            )
+            await self._db.commit()
+        return order
+
+    async def delete(self, order_id: int) -> Order | None:
+        """Удаляет заявку. Возвращает удалённую заявку или None."""
+        async with self._lock:
+            order = await self._get(order_id)
+            if order is not None:
+                await self._db.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+                await self._db.commit()
+        return order
+
+
+if __name__ == "__main__":
+    # Ручной перенос: python sqlite_store.py
+    from config import ARCHIVE_DIR, ORDERS_DB_PATH, ORDERS_FILE_PATH
+
+    async def _migrate():
+        store = SqliteOrderStore(ORDERS_DB_PATH)
+        await store.load()
+        await store.migrate_from_json(ORDERS_FILE_PATH, ARCHIVE_DIR)
+        await store.close()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(_migrate())
@@ -0,0 +1,16 @@
+# Статусы заявок. Раньше одни и те же статусы записывались по-разному
+# ("Обработано" / "✅ Обработано"), поэтому старые варианты приводятся к одному.
+STATUS_PENDING = "Ожидает обработки"
+STATUS_IN_PROGRESS = "🔧 В работе"
+STATUS_PROCESSED = "✅ Обработано"
+
+LEGACY_STATUSES = {
+    "Обработано": STATUS_PROCESSED,
+    "🔄 Ожидает обработки": STATUS_PENDING,
+    "В работе": STATUS_IN_PROGRESS,
+}
+
+
+def normalize_status(status):
+    """Возвращает статус в едином написании."""
+    return LEGACY_STATUSES.get(status, status)
@@ -1,64 +1,87 @@
 import aiofiles
+import asyncio
 import json
 import os
 import logging
 import re
+import shutil
+import tempfile
 from datetime import datetime
 from aiogram import Bot
 from aiogram.types import FSInputFile, Message
-from dotenv import load_dotenv
-from pdf2image import convert_from_path
-import fitz
-from tabulate import tabulate
-from aiogram.utils.formatting import Bold, Text
-from pdf2image import convert_from_path
 
-# Указываем абсолютный путь к файлу orders.json
-ORDERS_FILE_PATH = os.path.join(os.path.dirname(__file__), 'orders.json')
+from config import (
+    ADMIN_IDS, ARCHIVE_AFTER_DAYS, ARCHIVE_CACHE_SEGMENTS, ARCHIVE_DIR, ARCHIVE_INTERVAL, ARCHIVE_SEGMENT_SIZE, EVENTS_DIR, ORDER_STORAGE,
+    ORDERS_DB_PATH, ORDERS_FILE_PATH, ORDERS_FLUSH_BATCH_SIZE, ORDERS_FLUSH_INTERVAL, OUTBOUND_QUEUE_SIZE, OUTBOUND_RATE, OUTBOUND_WORKERS,
+    PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES, PDF_RENDER_ENGINE, PDF_RENDER_QUEUE, PDF_RENDER_WORKERS, POPPLER_PATH,
+    PRICES_PATH, SEARCH_INDEX_PATH, STATS_FILE_PATH,
+)
+from event_log import EVENT_CANCEL, EVENT_CREATED, EVENT_EDIT, EVENT_FEEDBACK, EVENT_STATUS, EventLog
+from notifier import AdminNotifier
+from order_archive import OrderArchive
+from order_locks import OrderLocks
+from order_stats import OrderStats
+from order_store import OrderStore
+from outbound_queue import PRIORITY_NOTIFICATION, OutboundQueue, priority
+from pdf_renderer import PdfRenderer, RendererBusy
+from price_catalog import PriceCatalog, render_prices
+from search_index import SearchIndex
+from statuses import STATUS_PENDING
+
+# Рассылка уведомлений администраторам (общая для utils и bot.py)
+admin_notifier = AdminNotifier(ADMIN_IDS)
+
+# Все исходящие запросы к Telegram идут через очередь с приоритетами
+# (подключается к сессии бота в bot.py)
+outbound = OutboundQueue(OUTBOUND_RATE, workers=OUTBOUND_WORKERS, max_size=OUTBOUND_QUEUE_SIZE)
+
+# Хранилище заявок (загружается при запуске бота)
+if ORDER_STORAGE == "sqlite":
+    # aiosqlite нужен только этому бэкенду, поэтому импортируется по требованию
+    from sqlite_store import SqliteOrderStore
+
+    order_store = SqliteOrderStore(ORDERS_DB_PATH, migrate_from=ORDERS_FILE_PATH, migrate_archive_dir=ARCHIVE_DIR)
+else:
+    order_store = OrderStore(
+        ORDERS_FILE_PATH, flush_interval=ORDERS_FLUSH_INTERVAL, flush_batch_size=ORDERS_FLUSH_BATCH_SIZE,
+        archive=OrderArchive(ARCHIVE_DIR, cache_segments=ARCHIVE_CACHE_SEGMENTS, segment_size=ARCHIVE_SEGMENT_SIZE),
+        archive_after_days=ARCHIVE_AFTER_DAYS, archive_interval=ARCHIVE_INTERVAL,
+    )
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Изменения одной заявки выполняются по очереди, чтобы не терять обновления
+order_locks = OrderLocks()
 
-logging.info(f"Используемый путь к файлу: {ORDERS_FILE_PATH}")
+# Журнал событий заявок для выборок по времени и нагрузки администраторов
+event_log = EventLog(EVENTS_DIR)
 
-# Загрузка переменных окружения
-load_dotenv()
+# Статистика заявок, обновляемая при каждом изменении
+order_stats = OrderStats(STATS_FILE_PATH)
 
-# Получение токена бота и ID админа
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = os.getenv("ADMIN_ID")
-if not BOT_TOKEN or not ADMIN_IDS:
-    raise ValueError("Токен бота или ID админа не найден. Убедитесь, что переменные окружения BOT_TOKEN и ADMIN_ID заданы.")
+# Полнотекстовый поиск заявок для администраторов
+search_index = SearchIndex(SEARCH_INDEX_PATH)
 
-# Преобразование строки с ID админов в список целых чисел
-if ADMIN_IDS:
-    ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS.split(',')]
-else:
-    ADMIN_IDS = []
+# Все PDF рендерятся в пуле процессов через общий кеш страниц
+pdf_renderer = PdfRenderer(
+    PDF_CACHE_DIR,
+    max_cache_bytes=PDF_CACHE_MAX_BYTES,
+    max_workers=PDF_RENDER_WORKERS,
+    max_pending=PDF_RENDER_QUEUE,
+    engine=PDF_RENDER_ENGINE,
+    poppler_path=POPPLER_PATH,
+)
 
-# Создаём экземпляр Bot
-bot = Bot(token=BOT_TOKEN)
-
-async def load_orders():
-    try:
-        async with aiofiles.open("orders.json", mode="r", encoding="utf-8") as file:
-            contents = await file.read()
-            return json.loads(contents)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-async def save_orders(orders):
-    async with aiofiles.open("orders.json", mode="w", encoding="utf-8") as file:
-        await file.write(json.dumps(orders, ensure_ascii=False, indent=4))
+# Текстовый прайс-лист: форматируется один раз и перечитывается при изменении prices.json
+price_catalog = PriceCatalog(PRICES_PATH)
 
 async def notify_admins(bot: Bot, message: str):
-    admin_ids_str = os.getenv("ADMIN_ID")
-    if admin_ids_str:
-        admin_ids = [int(admin_id.strip()) for admin_id in admin_ids_str.split(',')]
-        for admin_id in admin_ids:
-            await bot.send_message(admin_id, message)
-    else:
-        logging.warning("Переменная окружения ADMIN_ID не задана.")
+    """Отправляет сообщение всем администраторам в фоне, не задерживая ответ пользователю."""
+    outbound.spawn(_broadcast(bot, message))
+
+async def _broadcast(bot: Bot, message: str):
+    results = await admin_notifier.broadcast(bot, message)
+    failed = [admin_id for admin_id, delivered in results.items() if not delivered]
+    if failed:
+        logging.warning(f"Уведомление не доставлено администраторам: {failed}")
 
 async def notify_new_order(bot: Bot, order_data):
     message_text = (
@@ -83,13 +106,6 @@ async def notify_order_update(bot: Bot, order_data):
     await notify_admins(bot, message_text)
 
 async def save_order_to_json(bot: Bot, order_data: dict) -> int:
-    orders = load_orders()
-    if orders:
-        last_order_id = orders[-1].get("id", 0)
-        order_data["id"] = last_order_id + 1
-    else:
-        order_data["id"] = 1
-
     # Добавление даты создания заявки
     order_data["created_at"] = datetime.now().isoformat()
 
@@ -97,87 +113,92 @@ async def save_order_to_json(bot: Bot, order_data: dict) -> int:
     if "history" not in order_data:
         order_data["history"] = []
 
-    orders.append(order_data)
-    save_orders(orders)
+    order = await order_store.add(order_data)
+    order_stats.on_created(order)
+    event_log.append(EVENT_CREATED, order.id, actor=order.get("user_id"), at=order.created_at)
+    search_index.add(order)
 
     # Уведомление администраторов
-    await notify_new_order(bot, order_data)
-    return order_data["id"]
-
-def cancel_order(request_id: int):
-    """Удаляет заявку из JSON-файла по ID."""
-    orders = load_orders()
-    orders = [order for order in orders if order["id"] != request_id]
-    save_orders(orders)
-
-def get_order_status(order_id: int) -> str:
+    await notify_new_order(bot, order)
+    return order.id
+
+async def cancel_order(request_id: int):
+    """Удаляет заявку из хранилища по ID."""
+    async with order_locks(request_id):
+        order = await order_store.delete(request_id)
+    if order is not None:
+        order_stats.on_cancelled(order)
+        event_log.append(EVENT_CANCEL, request_id, actor=order.get("user_id"))
+        search_index.remove(order)
+    return order
+
+async def get_order_status(order_id: int) -> str:
     """Возвращает статус заявки по её ID."""
-    orders = load_orders()
-    if not isinstance(orders, list):
-        return "Ошибка загрузки заявок"
+    order = await order_store.get(order_id)
+    if order is None:
+        return "Заявка не найдена"
 
-    for order in orders:
-        if order["id"] == order_id:
-            reason = order.get("reason", "Причина не указана")
-            status = order.get("status", "Статус не указан")
-            return f"{reason}\n{status}"
-
-    return "Заявка не найдена"
+    reason = order.get("reason", "Причина не указана")
+    status = order.get("status", "Статус не указан")
+    return f"{reason}\n{status}"
 
-def update_order(order_id, key, value):
+async def update_order(order_id, key, value):
     """Обновляет заявку по ID."""
     try:
-        orders = load_orders()
-        order = next((order for order in orders if order["id"] == order_id), None)
-        if order:
-            current_value = order.get(key, None)
-            order[key] = value
-            save_orders(orders)
-            return current_value, value
+        async with order_locks(order_id):
+            order = await order_store.get(order_id)
+            if order:
+                current_value = order.get(key, None)
+                # Хранилище меняет заявку на месте, поэтому прежняя версия копируется
+                old = dict(order)
+                search_index.update(old, await order_store.update(order_id, {key: value}))
+                event_log.append(EVENT_EDIT, order_id, value=[key])
+                return current_value, value
         return None, None
     except Exception as e:
         return None, None
 
-def is_valid_request_id(request_id):
+async def is_valid_request_id(request_id):
     """Проверяет валидность ID заявки."""
-    orders = load_orders()
-    return any(order["id"] == request_id for order in orders)
+    return await order_store.exists(request_id)
 
-def update_request(request_id, new_data):
+async def update_request(request_id, new_data):
     """Обновляет заявку по request_id."""
-    orders = load_orders()
-    for order in orders:
-        if order['id'] == request_id:
-            order.update(new_data)
-            save_orders(orders)
-            return True
-    return False
-
-def update_order_status(request_id: int, new_status: str):
-    """Обновляет статус заявки и сохраняет изменения в JSON-файл."""
-    orders = load_orders()
-    for order in orders:
-        if order["id"] == request_id:
-            if "history" not in order:
-                order["history"] = []
-            order["status"] = new_status
-            order["history"].append({'timestamp': datetime.now().isoformat(), 'status': new_status})
-            save_orders(orders)
-            logging.info(f"Статус заявки #{request_id} обновлен на '{new_status}'.")
-            return order
-    logging.warning(f"Заявка с ID {request_id} не найдена.")
-    return None
+    async with order_locks(request_id):
+        order = await order_store.get(request_id)
+        if order is not None:
+            old = dict(order)
+            order = await order_store.update(request_id, new_data)
+            search_index.update(old, order)
+    if order is not None:
+        event_log.append(EVENT_EDIT, request_id, value=sorted(new_data))
+    return order is not None
+
+async def update_order_status(request_id: int, new_status: str, admin_id: int | None = None):
+    """Обновляет статус заявки и добавляет запись в историю."""
+    async with order_locks(request_id):
+        order = await order_store.get(request_id)
+        if order is None:
+            logging.warning(f"Заявка с ID {request_id} не найдена.")
+            return None
+
+        old_status = order.get("status")
+        entry = {'timestamp': datetime.now().isoformat(), 'status': new_status}
+        if admin_id is not None:
+            entry['admin_id'] = admin_id
+        history = order.get("history", []) + [entry]
+        order = await order_store.update(request_id, {"status": new_status, "history": history})
+        order_stats.on_status_changed(order, old_status, new_status, entry['timestamp'])
+        event_log.append(EVENT_STATUS, request_id, actor=admin_id, value=new_status, at=entry['timestamp'])
+    logging.info(f"Статус заявки #{request_id} обновлен на '{new_status}'.")
+    return order
 
 async def get_order_data_by_id(order_id):
-    orders = await load_orders()
-    for order in orders:
-        if order['id'] == order_id:
-            return order
-    return None
+    return await order_store.get(order_id)
 
-def get_new_orders_list() -> str:
+async def get_new_orders_list() -> str:
     """Возвращает список новых заявок."""
-    orders = load_orders()
+    orders = await order_store.list_by_status(STATUS_PENDING)
     if not orders:
         return "Нет новых заявок."
 
@@ -188,7 +209,7 @@ def get_new_orders_list() -> str:
         address = order.get('address', 'Не указан')
         phone_number = order.get('phone_number', 'Не указан')
         reason = order.get('reason', 'Не указана')
-        status = order.get('status', 'Ожидает обработки')
+        status = order.get('status', STATUS_PENDING)
 
         if request_id == 'Не указан':
             logging.warning(f"Заявка без ID: {order}")
@@ -204,53 +225,58 @@ def get_new_orders_list() -> str:
 
     return response_text
 
-def save_feedback_to_json(request_id: int, feedback: str):
-    """Сохраняет отзыв пользователя в JSON-файл."""
-    orders = load_orders()
-    for order in orders:
-        if order["id"] == request_id:
-            if "feedback" not in order:
-                order["feedback"] = []
-            order["feedback"].append({'timestamp': datetime.now().isoformat(), 'feedback': feedback})
-            save_orders(orders)
-            logging.info(f"Отзыв для заявки #{request_id} успешно сохранен.")
-            return order
-    logging.warning(f"Заявка с ID {request_id} не найдена.")
-    return None
-
-async def notify_user(bot: Bot, user_id: int, message: str):
-    """Отправляет уведомление пользователю."""
-    await bot.send_message(user_id, message)
+async def save_feedback_to_json(request_id: int, feedback: str):
+    """Сохраняет отзыв пользователя к заявке."""
+    async with order_locks(request_id):
+        order = await order_store.get(request_id)
+        if order is None:
+            logging.warning(f"Заявка с ID {request_id} не найдена.")
+            return None
+
+        entries = order.get("feedback", []) + [{'timestamp': datetime.now().isoformat(), 'feedback': feedback}]
+        order = await order_store.update(request_id, {"feedback": entries})
+        event_log.append(EVENT_FEEDBACK, request_id, actor=order.get("user_id"), at=entries[-1]['timestamp'])
+    logging.info(f"Отзыв для заявки #{request_id} успешно сохранен.")
+    return order
+
+async def notify_user(bot: Bot, user_id: int, message: str, **kwargs):
+    """Отправляет уведомление пользователю (после ответов в диалогах, но раньше рассылок)."""
+    with priority(PRIORITY_NOTIFICATION):
+        await bot.send_message(user_id, message, **kwargs)
 
 async def process_pdf(message: Message):
     """Обрабатывает загруженный PDF-документ, конвертирует в изображения и отправляет в Telegram."""
-    file_path = await message.document.download()
-    images = convert_from_path(file_path.name)
-
+    fd, file_path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
     try:
-        for i, image in enumerate(images):
-            image_path = f"page_{i+1}.jpg"
-            image.save(image_path, "JPEG")
+        await message.bot.download(message.document, destination=file_path)
+        try:
+            image_paths = await pdf_renderer.render(file_path, fmt="jpg")
+        except RendererBusy:
+            await message.answer("Сейчас обрабатывается слишком много PDF, попробуйте позже.")
+            return
+        for image_path in image_paths:
             await message.answer_photo(FSInputFile(image_path))
-            os.remove(image_path)
     finally:
-        os.remove(file_path.name)
-
-def convert_pdf_to_images(pdf_path, output_folder="images"):
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-
-    pdf_document = fitz.open(pdf_path)
-    image_paths = []
-
-    for page_num in range(len(pdf_document)):
-        page = pdf_document.load_page(page_num)
-        pix = page.get_pixmap()
-        image_path = f"{output_folder}/page_{page_num + 1}.png"
-        pix.save(image_path)
-        image_paths.append(image_path)
-
-    return image_paths
+        os.remove(file_path)
+
+async def _copy_pages(image_paths, output_folder):
+    """Копирует страницы из кеша рендера в указанную папку."""
+    def copy():
+        os.makedirs(output_folder, exist_ok=True)
+        copied = []
+        for page_num, image_path in enumerate(image_paths):
+            target = os.path.join(output_folder, f"page_{page_num + 1}{os.path.splitext(image_path)[1]}")
+            shutil.copyfile(image_path, target)
+            copied.append(target)
+        return copied
+
+    return await asyncio.to_thread(copy)
+
+async def convert_pdf_to_images(pdf_path, output_folder="images"):
+    """Конвертирует PDF в PNG (PyMuPDF) и складывает страницы в output_folder."""
+    image_paths = await pdf_renderer.render(pdf_path, dpi=72, engine="fitz")
+    return await _copy_pages(image_paths, output_folder)
 
 def escape_md(text: str) -> str:
     """Экранирует специальные символы для MarkdownV2."""
@@ -262,25 +288,12 @@ def escape_md(text: str) -> str:
     return re.sub(r'([%s])' % re.escape(special_chars), r'\\\1', text)
 
 def load_prices():
-    with open('prices.json', 'r', encoding='utf-8') as file:
+    with open(PRICES_PATH, 'r', encoding='utf-8') as file:
         return json.load(file)
 
 def format_prices(prices):
-    table_data = []
-    for service in prices['services']:
-        name = service['name']
-        price = service['price']
-        note = service['note']
-        table_data.append([name, price, note])
-    
-    headers = ["Услуга", "Цена (KZT)", "Примечание"]
-    formatted_prices = Text(
-        "💲 ", Bold("Стоимость услуг:"), "\n\n",
-        "```\n",
-        tabulate(table_data, headers, tablefmt="grid"),
-        "\n```"
-    )
-    return formatted_prices.as_markdown()
+    # Для отправки пользователям есть price_catalog с уже готовым текстом
+    return render_prices(prices['services']).as_markdown()
 
 def split_message(message, max_length=4096):
     """Разбивает сообщение на части, чтобы избежать ошибки MESSAGE_TOO_LONG"""
@@ -294,20 +307,7 @@ def split_message(message, max_length=4096):
     parts.append(message)
     return parts
 
-def pdf_to_image(pdf_path, output_folder, poppler_path):
-    # Проверяем, существует ли выходная директория; если нет, создаём её
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-
-    # Конвертируем PDF в изображения
-    images = convert_from_path(pdf_path, poppler_path=poppler_path)
-
-    image_paths = pdf_to_image(pdf_path, output_folder, poppler_path)
-    for i, image in enumerate(images):
-        # Формируем путь для сохранения каждого изображения
-        image_path = os.path.join(output_folder, f'page_{i + 1}.png')
-        # Сохраняем изображение
-        image.save(image_path, 'PNG')
-        image_paths.append(image_path)
-
-    return image_paths
+async def pdf_to_image(pdf_path, output_folder, poppler_path=None):
+    """Конвертирует PDF в PNG (Poppler) и складывает страницы в output_folder."""
+    image_paths = await pdf_renderer.render(pdf_path, dpi=200, engine="poppler", poppler_path=poppler_path)
+    return await _copy_pages(image_paths, output_folder)
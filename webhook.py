@@ -0,0 +1,76 @@
+import asyncio
+import hmac
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Приём обновлений через вебхук на встроенном aiohttp-сервере.
+
+    Запрос проверяется по заголовку секретного токена, Telegram сразу
+    получает ответ 200, а обработка идёт в фоне. Одновременно
+    обрабатывается не больше max_concurrency обновлений; если в очереди
+    накопилось max_pending, сервер отвечает 503 и Telegram повторит
+    доставку позже.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, path: str = "/webhook",
+                 secret_token: str | None = None, max_concurrency: int = 64, max_pending: int = 1000):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._runner: web.AppRunner | None = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret_token
+        ):
+            return web.Response(status=401)
+        if len(self._tasks) >= self.max_pending:
+            logging.warning("Очередь обновлений переполнена, Telegram повторит доставку.")
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except ValueError:
+            return web.Response(status=400)
+
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update):
+        async with self._semaphore:
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception as e:
+                logging.exception(f"Ошибка обработки обновления {update.update_id}: {e}")
+
+    async def start(self, host: str, port: int):
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info(f"Вебхук слушает {host}:{port}{self.path}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        # Дожидаемся обновлений, которые уже приняты
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)